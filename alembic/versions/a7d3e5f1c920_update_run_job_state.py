@@ -0,0 +1,75 @@
+"""update run job state
+
+Revision ID: a7d3e5f1c920
+Revises: f5b8c2d4e9a7
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7d3e5f1c920"
+down_revision: Union[str, Sequence[str], None] = "f5b8c2d4e9a7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = (
+    ("planned", sa.Integer()),
+    ("done", sa.Integer()),
+    ("skipped", sa.Integer()),
+    ("failed", sa.Integer()),
+    ("changed", sa.Integer()),
+    ("bgmtv_requests", sa.Integer()),
+    ("bgmtv_seconds", sa.Float()),
+    ("db_calls", sa.Integer()),
+    ("db_seconds", sa.Float()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "update_run",
+        sa.Column("job_id", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    )
+    op.add_column(
+        "update_run",
+        sa.Column("name", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    )
+    op.add_column(
+        "update_run",
+        sa.Column("error", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    )
+    op.add_column("update_run", sa.Column("created_at", sa.DateTime(), nullable=True))
+    op.add_column("update_run", sa.Column("finished_at", sa.DateTime(), nullable=True))
+    for name, type_ in COUNTERS:
+        op.add_column(
+            "update_run",
+            sa.Column(name, type_, server_default="0", nullable=False),
+        )
+    # 已有的检查点以开始时间作为创建时间
+    op.execute("UPDATE update_run SET created_at = started_at")
+    op.alter_column("update_run", "created_at", nullable=False)
+    op.alter_column("update_run", "started_at", nullable=True)
+    op.create_index(op.f("ix_update_run_job_id"), "update_run", ["job_id"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_update_run_job_id"), table_name="update_run")
+    # 还未开始的任务没有开始时间，降级时以创建时间代替
+    op.execute("UPDATE update_run SET started_at = created_at WHERE started_at IS NULL")
+    op.alter_column("update_run", "started_at", nullable=False)
+    for name, _ in reversed(COUNTERS):
+        op.drop_column("update_run", name)
+    op.drop_column("update_run", "finished_at")
+    op.drop_column("update_run", "created_at")
+    op.drop_column("update_run", "error")
+    op.drop_column("update_run", "name")
+    op.drop_column("update_run", "job_id")
@@ -0,0 +1,36 @@
+"""update run queue
+
+Revision ID: b8e4f2a6d153
+Revises: a7d3e5f1c920
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8e4f2a6d153"
+down_revision: Union[str, Sequence[str], None] = "a7d3e5f1c920"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "update_run",
+        sa.Column("fast_refresh", sa.Boolean(), server_default="false", nullable=False),
+    )
+    op.add_column("update_run", sa.Column("claimed_at", sa.DateTime(), nullable=True))
+    # 已有的任务都已由登记它的进程处理
+    op.execute("UPDATE update_run SET claimed_at = created_at")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("update_run", "claimed_at")
+    op.drop_column("update_run", "fast_refresh")
@@ -0,0 +1,42 @@
+"""deploy request
+
+Revision ID: d3f6a8c2e417
+Revises: b8e4f2a6d153
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d3f6a8c2e417"
+down_revision: Union[str, Sequence[str], None] = "b8e4f2a6d153"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "deploy_request",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("requested_at", sa.DateTime(), nullable=True),
+        sa.Column(
+            "reasons",
+            postgresql.ARRAY(sa.String()),
+            server_default="{}",
+            nullable=False,
+        ),
+        sa.Column("fired_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("deploy_request")
@@ -0,0 +1,33 @@
+"""update run merged into
+
+Revision ID: e7b1c4d9f286
+Revises: d3f6a8c2e417
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7b1c4d9f286"
+down_revision: Union[str, Sequence[str], None] = "d3f6a8c2e417"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "update_run",
+        sa.Column("merged_into", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("update_run", "merged_into")
@@ -1,157 +1,1012 @@
-from datetime import datetime, timedelta
+import asyncio
+import zlib
+from contextlib import aclosing
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Iterable, TypeVar
 
-from fastapi import APIRouter, BackgroundTasks, Depends, FastAPI
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from loguru import logger
-from returns.result import Failure, Success
+from returns.result import Failure, Result, Success
 
 from app.api.v0.update.data import DATA
-from app.api.v0.update.models import Empty, UpdateResponse
+from app.api.v0.update.jobs import MAX_JOBS, UpdateJob, job_registry
+from app.api.v0.update.refresh import RefreshPolicy, refresh_policy
+from app.api.v0.update.models import (
+    SeasonTier,
+    UpdateIndexRequest,
+    UpdateJobResponse,
+    UpdateResponse,
+    UpdateStatus,
+    UpdateSubjectsRequest,
+)
 from app.api.v0.utils import (
-    trigger_deploy_hooks,
+    ancient_season_ids,
+    current_season_id,
+    future_season_ids,
+    deploy_hooks,
+    older_season_ids,
+    recent_season_ids,
     verify_password,
 )
+from app.config import config
 from app.dependencies import get_bgmtv_client, get_db_client
 from app.services import BGMTVClient, DBClient
+from app.services.db import (
+    BulkUpsertResult,
+    EpisodeStat,
+    Index,
+    RefreshState,
+    Subject,
+    SubjectRefresh,
+    UpdateRun,
+)
+from app.services.timing import collect_timings
+
+T = TypeVar("T")
+
+# 条目更新任务的 advisory lock，保证多个 worker 中同时只有一个更新任务在执行；
+# 各更新范围另有一把锁（高 32 位为 UPDATE_LOCK_KEY），用于跳过重复的触发
+UPDATE_LOCK_KEY = 0x62676D01
 
 router = APIRouter(prefix="/update", tags=["update"])
 
+SEASON_TIERS: dict[SeasonTier, Callable[[], set[int]]] = {
+    "recent": recent_season_ids,
+    "older": older_season_ids,
+    "ancient": ancient_season_ids,
+    "future": future_season_ids,
+}
+
 
 @router.post("/index")
 async def update_index(
-    _request: Empty,
+    request: UpdateIndexRequest,
     bgmtv_client: BGMTVClient = Depends(get_bgmtv_client),
     db_client: DBClient = Depends(get_db_client),
     _: bool = Depends(verify_password),
 ) -> UpdateResponse:
+    """
+    并发获取各季度的索引，只写入条目列表有变化的季度
+
+    请求速率仍受 bgm.tv 限流器约束。
+    """
+    start_time = datetime.now()
+    seasons = DATA
+    if request.active_only:
+        active = {current_season_id()} | future_season_ids()
+        seasons = {
+            season_id: index_id
+            for season_id, index_id in DATA.items()
+            if season_id in active
+        }
     success = []
     failed = []
-    for season_id, index_id in DATA.items():
-        subject_ids = await bgmtv_client.get_index_subject_ids(index_id)
-        match subject_ids:
-            case Failure(e):
-                logger.error(f"获取 {season_id} 季度条目 ID 失败: {e}")
-                failed.append(season_id)
-                continue
-            case Success(subject_ids):
-                logger.info(f"获取 {season_id} 季度条目 ID 成功: {subject_ids}")
-                result = await db_client.upsert_index(season_id, index_id, subject_ids)
-                match result:
+    indices: list[Index] = []
+
+    async def fetch(item: tuple[int, int]) -> None:
+        season_id, index_id = item
+        subject_ids: list[int] = []
+        error: Exception | None = None
+        async with aclosing(bgmtv_client.iter_index_subject_ids(index_id)) as pages:
+            async for page in pages:
+                match page:
                     case Failure(e):
-                        logger.error(f"更新 {season_id} 季度条目失败: {e}")
-                        failed.append(season_id)
-                    case Success():
-                        success.append(season_id)
+                        error = e
+                        break
+                    case Success(ids):
+                        subject_ids.extend(ids)
+        if error is not None:
+            logger.error(f"获取 {season_id} 季度条目 ID 失败: {error}")
+            failed.append(season_id)
+            return
+
+        logger.info(f"获取 {season_id} 季度条目 ID 成功: {len(subject_ids)} 个条目")
+        indices.append(
+            Index(season_id=season_id, index_id=index_id, subject_ids=subject_ids)
+        )
+
+    await _run_bounded(seasons.items(), fetch, config.update_concurrency)
+    logger.info(
+        f"获取 {len(seasons)} 个季度的索引完成，耗时 {datetime.now() - start_time}"
+    )
+
+    result = await db_client.bulk_upsert_indices(indices)
+    match result:
+        case Failure(e):
+            logger.error(f"更新季度条目失败: {e}")
+            failed.extend(index.season_id for index in indices)
+        case Success(written):
+            for index in indices:
+                if index.season_id in written.failed:
+                    logger.error(f"更新 {index.season_id} 季度条目失败")
+                    failed.append(index.season_id)
+                else:
+                    success.append(index.season_id)
+            logger.info(
+                f"写入 {len(indices)} 个季度的索引: {len(written.changed)} 有变化, "
+                f"{len(written.unchanged)} 未变化, {len(written.failed)} 失败"
+            )
+            if written.changed:
+                await deploy_hooks.request(
+                    db_client, f"更新索引: {len(written.changed)} 个季度有变化"
+                )
+            return UpdateResponse(
+                success=success, failed=failed, changed=written.changed
+            )
     return UpdateResponse(success=success, failed=failed)
 
 
+def season_date_range(season_id: int) -> tuple[date, date]:
+    """季度的播出日期范围 [start, end)"""
+    year = season_id // 100
+    month = season_id % 100
+    start = date(year, month, 1)
+    if month + 3 > 12:
+        end = date(year + 1, month + 3 - 12, 1)
+    else:
+        end = date(year, month + 3, 1)
+    return start, end
+
+
+class SubjectWriter:
+    """
+    按批写入条目
+
+    条目先放入缓冲区，达到 config.db_batch_size 时一次批量写入，写入结果记入
+    outcomes，内容有变化的条目记入 changed。内容未变化的条目只更新 checked_at。
+    写入失败的条目清除 bgm.tv 条件请求缓存，下次运行重新获取。
+    写入成功的条目同时记入 run_id 对应任务的检查点（连同 job 的进度），并按
+    schedule 保存下一次刷新的计划；随条目一起获取的剧集统计在条目写入成功后保存。
+    """
+
+    def __init__(
+        self,
+        outcomes: dict[int, bool],
+        bgmtv_client: BGMTVClient,
+        db_client: DBClient,
+        run_id: int | None = None,
+        job: UpdateJob | None = None,
+        schedule: Callable[[int, Subject | None], SubjectRefresh | None] | None = None,
+    ) -> None:
+        self.outcomes = outcomes
+        self.bgmtv_client = bgmtv_client
+        self.db_client = db_client
+        self.run_id = run_id
+        self.job = job
+        self.schedule = schedule
+        self.batch_size = config.db_batch_size
+        self.changed: set[int] = set()
+        self._pending: list[Subject] = []
+        self._touched: list[int] = []
+        self._episodes: list[EpisodeStat] = []
+        self._stale_episodes: list[tuple[int, int]] = []
+
+    async def add(
+        self,
+        subject: Subject,
+        episodes: list[EpisodeStat] | None = None,
+        stale_episode_ids: list[int] | None = None,
+    ) -> None:
+        self._pending.append(subject)
+        self._episodes.extend(episodes or [])
+        self._stale_episodes.extend(
+            (subject.id, episode_id) for episode_id in stale_episode_ids or []
+        )
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def touch(self, subject_id: int) -> None:
+        """记录条目已检查且未变化"""
+        self._touched.append(subject_id)
+        if len(self._touched) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        # 先换出缓冲区，写库期间其他 worker 继续往新缓冲区里添加
+        pending, self._pending = self._pending, []
+        touched, self._touched = self._touched, []
+        episodes, self._episodes = self._episodes, []
+        stale_episodes, self._stale_episodes = self._stale_episodes, []
+        done: list[int] = []
+        if touched:
+            match await self.db_client.touch_subjects(touched):
+                case Failure(e):
+                    logger.warning(f"更新 {len(touched)} 个条目的检查时间失败: {e}")
+                    await self._record([], touched)
+                case Success():
+                    await self._record(touched, [])
+                    done.extend(touched)
+        if pending:
+            written = await self._write(pending)
+            done.extend(written)
+            await self._save_episodes(episodes, stale_episodes, set(written))
+        if done and self.schedule:
+            await self._save_schedule(
+                done, {subject.id: subject for subject in pending}
+            )
+        if done and self.run_id is not None:
+            state = self.job.state_values() if self.job else None
+            match await self.db_client.add_run_progress(self.run_id, done, state):
+                case Failure(e):
+                    logger.warning(f"保存任务 #{self.run_id} 的检查点失败: {e}")
+
+    async def _save_episodes(
+        self,
+        episodes: list[EpisodeStat],
+        stale_episodes: list[tuple[int, int]],
+        subject_ids: set[int],
+    ) -> None:
+        """保存写入成功的条目的剧集统计，删除其中已不存在的剧集"""
+        rows = [episode for episode in episodes if episode.subject_id in subject_ids]
+        if rows:
+            match await self.db_client.bulk_upsert_episode_stats(rows):
+                case Failure(e):
+                    logger.warning(f"保存 {len(rows)} 个剧集统计失败: {e}")
+        stale = [pair for pair in stale_episodes if pair[0] in subject_ids]
+        if stale:
+            match await self.db_client.delete_episode_stats(stale):
+                case Failure(e):
+                    logger.warning(f"删除 {len(stale)} 个已不存在的剧集统计失败: {e}")
+
+    async def _save_schedule(
+        self, subject_ids: list[int], subjects: dict[int, Subject]
+    ) -> None:
+        """保存刷新计划，未变化（304）的条目不在 subjects 中"""
+        assert self.schedule is not None
+        rows = [
+            row
+            for subject_id in subject_ids
+            if (row := self.schedule(subject_id, subjects.get(subject_id)))
+        ]
+        if not rows:
+            return
+        match await self.db_client.bulk_upsert_refresh(rows):
+            case Failure(e):
+                logger.warning(f"保存 {len(rows)} 个条目的刷新计划失败: {e}")
+
+    async def _record(self, succeeded: list[int], failed: list[int]) -> None:
+        for subject_id in succeeded:
+            self.outcomes[subject_id] = True
+        for subject_id in failed:
+            self.outcomes[subject_id] = False
+            await self.bgmtv_client.forget_subject(subject_id)
+        if self.job:
+            self.job.record("done", len(succeeded))
+            self.job.record("failed", len(failed))
+
+    async def _write(self, pending: list[Subject]) -> list[int]:
+        """批量写入条目，返回写入成功的条目ID"""
+        result = await self.db_client.bulk_upsert_subjects(pending)
+        match result:
+            case Failure(e):
+                logger.error(f"批量写入 {len(pending)} 个条目失败: {e}")
+                written = BulkUpsertResult(failed=[subject.id for subject in pending])
+            case Success(_written):
+                written = _written
+        self.changed.update(written.changed)
+        await self._record(written.changed + written.unchanged, written.failed)
+        logger.info(
+            f"批量写入 {len(pending)} 个条目: {len(written.changed)} 有变化, "
+            f"{len(written.unchanged)} 未变化, {len(written.failed)} 失败"
+        )
+        return written.changed + written.unchanged
+
+
 async def update_subject(
-    season_id: int,
     subject_id: int,
-    updated_at: datetime,
     bgmtv_client: BGMTVClient,
-    db_client: DBClient,
+    writer: SubjectWriter,
+    stored_episodes: list[EpisodeStat] | None = None,
 ) -> bool:
-    year = season_id // 100
-    month = season_id % 100
-    days = (datetime.now() - datetime(year, month, 1)).days // 90
-    if updated_at >= datetime.now() - timedelta(days=days):
-        logger.info(f"条目 {subject_id} 已是最新")
-        return True
+    """
+    Args:
+        stored_episodes: 已保存的剧集统计，播出超过冻结期的剧集不再重新获取
 
-    wrapped_subject = await bgmtv_client.get_subject_details(subject_id)
+    Returns:
+        True: 已交给 writer 写入（未变化时只更新检查时间），结果由 writer 记录;
+        False: 获取失败
+    """
+    wrapped_subject = await bgmtv_client.get_subject_details(
+        subject_id, stored_episodes
+    )
     match wrapped_subject:
         case Failure(e):
             logger.error(f"获取条目 {subject_id} 失败: {e}")
             return False
-        case Success(subject):
+        case Success(None):
+            logger.info(f"条目 {subject_id} 未变化，跳过写入")
+            await writer.touch(subject_id)
+            return True
+        case Success(details):
+            subject = details.subject
             if subject.id != subject_id:  # redirect
+                logger.info(f"条目 {subject_id} 已合并到 {subject.id}，按原ID写入")
                 subject.id = subject_id
-            result = await db_client.upsert_subject(subject)
-            match result:
-                case Failure(e):
-                    logger.error(f"更新条目 {subject_id} 失败: {e}")
-                    return False
-                case Success():
-                    logger.info(f"更新条目 {subject_id} 成功")
-                    return True
+            await writer.add(subject, details.episodes, details.stale_episode_ids)
+            return True
     return False
 
 
-async def update_season(
+async def refresh_season_from_search(
     season_id: int,
     subject_ids: list[int],
     bgmtv_client: BGMTVClient,
     db_client: DBClient,
-) -> UpdateResponse:
-    logger.info(f"开始更新 {season_id} 季度条目")
-    success = []
-    failed = []
+    writer: SubjectWriter,
+) -> list[int]:
+    """
+    用搜索接口批量刷新季度条目的评分、排名和收藏
+
+    一页搜索结果包含多个条目，代替逐条请求条目详情。数据库中还没有的条目
+    以及搜索结果中找不到的条目需要完整更新（含剧集统计），作为 remaining 返回。
+    刷新后的条目交给 writer 写入，写入结果由 writer 记录。
+
+    Args:
+        subject_ids: 需要刷新的条目
+
+    Returns:
+        remaining
+    """
+    wrapped_existing = await db_client.get_season_subjects(season_id)
+    match wrapped_existing:
+        case Failure(e):
+            logger.warning(f"获取 {season_id} 季度已有条目失败，逐条更新: {e}")
+            return list(subject_ids)
+        case Success(_existing):
+            existing: dict[int, Subject] = {
+                subject.id: subject for subject in _existing
+            }
+
+    remaining: list[int] = []
+    stale: list[Subject] = []
     for subject_id in subject_ids:
-        exsit_subject = await db_client.get_subject(subject_id)
-        match exsit_subject:
-            case Failure(_):
-                updated_at = datetime(2010, 1, 1)
-            case Success(subject):
-                updated_at = subject.updated_at
-        if await update_subject(
-            season_id, subject_id, updated_at, bgmtv_client, db_client
-        ):
-            success.append(subject_id)
+        subject = existing.get(subject_id)
+        if subject is None:
+            remaining.append(subject_id)
         else:
-            failed.append(subject_id)
+            stale.append(subject)
+    if not stale:
+        return remaining
+
+    start, end = season_date_range(season_id)
+    # 季度索引里常有上个月末提前开播的条目，搜索范围向前多取一个月
+    wrapped_results = await bgmtv_client.search_anime_by_air_date(
+        start - timedelta(days=31), end
+    )
+    match wrapped_results:
+        case Failure(e):
+            logger.warning(f"搜索 {season_id} 季度条目失败，逐条更新: {e}")
+            remaining.extend(subject.id for subject in stale)
+            return remaining
+        case Success(results):
+            pass
+
+    refreshed = 0
+    for subject in stale:
+        result = results.get(bgmtv_client.resolve_subject_id(subject.id))
+        if result is None:
+            remaining.append(subject.id)
+            continue
+        await writer.add(bgmtv_client.refresh_subject(subject, result))
+        refreshed += 1
     logger.info(
-        f"更新 {season_id} 季度条目完成: {len(success)} 成功, {len(failed)} 失败"
+        f"{season_id} 季度批量刷新 {refreshed} 个条目, "
+        f"{len(remaining)} 个条目需逐条更新"
     )
-    return UpdateResponse(success=success, failed=failed)
+    return remaining
+
+
+async def _run_bounded(
+    items: Iterable[T], func: Callable[[T], Awaitable[None]], concurrency: int
+) -> None:
+    """用 concurrency 个 worker 共享同一个迭代器，并发处理 items"""
+    iterator = iter(items)
+
+    async def worker() -> None:
+        for item in iterator:
+            await func(item)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+def plan_subjects(seasons: dict[int, list[int]]) -> dict[int, list[int]]:
+    """
+    跨季度去重
+
+    同一条目出现在多个季度的索引中时（续作、分割放送、长篇），只归入其中最近
+    的季度，按该季度的新鲜度策略更新一次。
+
+    Returns:
+        {季度ID: 归入该季度的条目ID}
+    """
+    owners: dict[int, int] = {}
+    for season_id, subject_ids in seasons.items():
+        for subject_id in subject_ids:
+            if season_id > owners.get(subject_id, 0):
+                owners[subject_id] = season_id
+    plan: dict[int, list[int]] = {season_id: [] for season_id in seasons}
+    for subject_id, season_id in owners.items():
+        plan[season_id].append(subject_id)
+    return plan
+
+
+async def update_seasons(
+    seasons: dict[int, list[int]],
+    bgmtv_client: BGMTVClient,
+    db_client: DBClient,
+    fast_refresh: bool = False,
+    season_ids: set[int] | None = None,
+    run_id: int | None = None,
+    completed: set[int] | None = None,
+    job: UpdateJob | None = None,
+    policy: RefreshPolicy = refresh_policy,
+) -> dict[int, UpdateResponse]:
+    """
+    并发更新多个季度的条目
+
+    条目先跨季度去重，再放进同一个工作队列，由 config.update_concurrency 个
+    worker 并发处理，bgm.tv 请求速率由全局限流器约束。每个条目只处理一次，
+    结果记入它所在的每一个季度。bgm.tv 熔断后不再处理新的条目，各季度的
+    status 记为 aborted，未处理的条目不计入 success/failed。
+
+    Args:
+        season_ids: 只更新归入这些季度的条目，去重仍然基于全部季度，
+            同时属于其他季度的条目由所属的最近季度负责；为 None 时更新全部
+        run_id: 写入成功的条目记入该任务的检查点
+        completed: 中断前已完成的条目，直接计为成功，不再处理
+        job: 记录计划和处理的条目数
+        policy: 刷新策略，决定哪些条目需要重新获取，以及下一次刷新的计划
+    """
+    concurrency = config.update_concurrency
+    completed = completed or set()
+    outcomes: dict[int, bool] = dict.fromkeys(completed, True)
+    aborted = False
+    pending = plan_subjects(seasons)
+    if season_ids is not None:
+        seasons = {
+            season_id: subject_ids
+            for season_id, subject_ids in seasons.items()
+            if season_id in season_ids
+        }
+        pending = {season_id: pending[season_id] for season_id in seasons}
+    if job:
+        job.plan(sum(map(len, pending.values())))
+    if completed:
+        pending = {
+            season_id: [
+                subject_id for subject_id in subject_ids if subject_id not in completed
+            ]
+            for season_id, subject_ids in pending.items()
+        }
+        if job:
+            job.record("skipped", job.planned - sum(map(len, pending.values())))
+    logger.info(
+        f"开始更新 {len(seasons)} 个季度共 {sum(map(len, seasons.values()))} 个条目"
+        f"（去重后 {sum(map(len, pending.values()))} 个），并发数 {concurrency}"
+    )
+
+    # 一次查询拿到所有条目的刷新状态，由刷新策略判断哪些条目需要刷新
+    wrapped_states = await db_client.get_refresh_states(
+        {subject_id for subject_ids in pending.values() for subject_id in subject_ids}
+    )
+    match wrapped_states:
+        case Failure(e):
+            logger.warning(f"获取条目刷新状态失败，全部重新获取: {e}")
+            states: dict[int, RefreshState] = {}
+        case Success(_states):
+            states = _states
+    now = datetime.now()
+    owners = {
+        subject_id: season_id
+        for season_id, subject_ids in pending.items()
+        for subject_id in subject_ids
+    }
+    due: dict[int, list[int]] = {}
+    for season_id, subject_ids in pending.items():
+        due[season_id] = [
+            subject_id
+            for subject_id in subject_ids
+            if policy.is_due(season_id, states.get(subject_id), now)
+        ]
+        fresh = len(subject_ids) - len(due[season_id])
+        outcomes.update(
+            (subject_id, True)
+            for subject_id in set(subject_ids).difference(due[season_id])
+        )
+        if job:
+            job.record("skipped", fresh)
+    pending = due
+    logger.info(
+        f"刷新策略 {policy.name}: {sum(map(len, pending.values()))} 个条目需要刷新"
+    )
+
+    def schedule(subject_id: int, subject: Subject | None) -> SubjectRefresh | None:
+        return policy.schedule(
+            owners[subject_id], subject_id, states.get(subject_id), subject, now
+        )
+
+    writer = SubjectWriter(outcomes, bgmtv_client, db_client, run_id, job, schedule)
+
+    if fast_refresh:
+        # 正在播出和即将播出的季度需要剧集统计，只对已完结的季度批量刷新
+        active_season_ids = recent_season_ids() | future_season_ids()
+
+        async def refresh(season_id: int) -> None:
+            pending[season_id] = await refresh_season_from_search(
+                season_id, pending[season_id], bgmtv_client, db_client, writer
+            )
+
+        await _run_bounded(
+            [
+                season_id
+                for season_id, subject_ids in pending.items()
+                if subject_ids and season_id not in active_season_ids
+            ],
+            refresh,
+            concurrency,
+        )
+
+    async def update(item: tuple[int, int]) -> None:
+        nonlocal aborted
+        season_id, subject_id = item
+        if aborted:
+            return
+        try:
+            updated = await update_subject(
+                subject_id, bgmtv_client, writer, episode_stats.get(subject_id)
+            )
+        except Exception as e:
+            logger.error(f"更新条目 {subject_id} 出错: {e}")
+            updated = False
+        if updated:
+            return
+        outcomes[subject_id] = False
+        if job:
+            job.record("failed")
+        if bgmtv_client.circuit_open and not aborted:
+            aborted = True
+            logger.error("bgm.tv 熔断，停止处理剩余条目")
+
+    # 一次查询拿到逐条更新的条目已保存的剧集统计，冻结的剧集不再重新获取
+    wrapped_episode_stats = await db_client.get_episode_stats(
+        {subject_id for subject_ids in pending.values() for subject_id in subject_ids}
+    )
+    match wrapped_episode_stats:
+        case Failure(e):
+            logger.warning(f"获取剧集统计失败，全部重新获取: {e}")
+            episode_stats: dict[int, list[EpisodeStat]] = {}
+        case Success(_episode_stats):
+            episode_stats = _episode_stats
+
+    await _run_bounded(
+        (
+            (season_id, subject_id)
+            for season_id, subject_ids in pending.items()
+            for subject_id in subject_ids
+        ),
+        update,
+        concurrency,
+    )
+    await writer.flush()
+
+    results: dict[int, UpdateResponse] = {}
+    for season_id, subject_ids in seasons.items():
+        result = UpdateResponse(
+            success=[], failed=[], status="aborted" if aborted else "completed"
+        )
+        for subject_id in subject_ids:
+            # 归入其他季度、本次没有处理的条目不计入
+            match outcomes.get(subject_id):
+                case True:
+                    result.success.append(subject_id)
+                case False:
+                    result.failed.append(subject_id)
+            if subject_id in writer.changed:
+                result.changed.append(subject_id)
+        logger.info(
+            f"更新 {season_id} 季度条目{'提前结束' if aborted else '完成'}: "
+            f"{len(result.success)} 成功 ({len(result.changed)} 有变化), "
+            f"{len(result.failed)} 失败"
+        )
+        results[season_id] = result
+    return results
+
+
+async def save_subject_aliases(
+    bgmtv_client: BGMTVClient,
+    db_client: DBClient,
+) -> None:
+    new_aliases = bgmtv_client.pending_subject_aliases()
+    if not new_aliases:
+        return
+    result = await db_client.upsert_subject_aliases(new_aliases)
+    match result:
+        case Failure(e):
+            logger.error(f"保存条目重定向映射失败: {e}")
+        case Success():
+            bgmtv_client.mark_subject_aliases_saved(new_aliases)
+            logger.info(f"保存 {len(new_aliases)} 条条目重定向映射")
+
+
+def run_scope(season_ids: set[int] | None) -> str:
+    """更新范围的标识，用于检查点和 advisory lock"""
+    return "all" if season_ids is None else ",".join(map(str, sorted(season_ids)))
+
+
+def scope_lock_key(season_ids: set[int] | None) -> int:
+    return UPDATE_LOCK_KEY << 32 | zlib.crc32(run_scope(season_ids).encode())
+
+
+async def start_run(
+    db_client: DBClient,
+    job: UpdateJob,
+) -> Result[tuple[dict[int, list[int]], set[int]], Exception]:
+    """
+    开始或继续一次更新任务
+
+    同一范围内有 config.update_resume_window 小时内开始、未正常结束的任务时，
+    沿用它计划的工作集并跳过已完成的条目；否则（包括中断的任务还没有写入
+    工作集时）读取所有索引。工作集写入
+    job 对应的 update_run 行作为检查点，读写失败时不影响更新，只是不能继续执行。
+
+    Returns:
+        ({季度ID: 条目ID}, 已完成的条目ID)
+    """
+    scope = run_scope(job.season_ids)
+    since = datetime.now() - timedelta(hours=config.update_resume_window)
+    resumed_from = None
+    seasons: dict[int, list[int]] | None = None
+    completed: set[int] = set()
+    match await db_client.get_resumable_run(scope, since, job.run_id):
+        case Failure(e):
+            logger.warning(f"获取未完成的更新任务失败: {e}")
+        case Success(None):
+            pass
+        case Success(run) if not run.seasons:
+            # 中断时还没有写入工作集，重新计划；该任务同样标记为已接手
+            logger.info(f"更新任务 #{run.id} ({scope}) 没有保存工作集，重新计划")
+            resumed_from = run.id
+        case Success(run):
+            logger.info(
+                f"继续更新任务 #{run.id} ({scope})，已完成 {len(run.completed)} 个条目"
+            )
+            resumed_from = run.id
+            seasons = {
+                int(season_id): subject_ids
+                for season_id, subject_ids in run.seasons.items()
+            }
+            completed = set(run.completed)
+
+    if seasons is None:
+        wrapped_index_subject_ids = await db_client.get_all_subjects()
+        match wrapped_index_subject_ids:
+            case Failure(e):
+                return Failure(e)
+            case Success(_index_subject_ids):
+                seasons = _index_subject_ids
+                logger.info(f"开始更新任务 #{job.run_id} ({scope})")
+    if job.run_id is not None:
+        match await db_client.plan_run(
+            job.run_id, seasons, list(completed), resumed_from
+        ):
+            case Failure(e):
+                logger.warning(f"保存更新任务 #{job.run_id} 的检查点失败: {e}")
+    return Success((seasons, completed))
 
 
 async def update_all(
     bgmtv_client: BGMTVClient,
     db_client: DBClient,
+    job: UpdateJob,
+    fast_refresh: bool = False,
 ) -> UpdateResponse:
     start_time = datetime.now()
     success = []
     failed = []
-    wrapped_index_subject_ids = await db_client.get_all_subjects()
-    match wrapped_index_subject_ids:
+    changed = []
+    changed_seasons: dict[int, int] = {}
+    status: UpdateStatus = "completed"
+    wrapped_aliases = await db_client.get_subject_aliases()
+    match wrapped_aliases:
+        case Failure(e):
+            logger.warning(f"获取条目重定向映射失败: {e}")
+        case Success(aliases):
+            bgmtv_client.load_subject_aliases(aliases)
+
+    wrapped_run = await start_run(db_client, job)
+    match wrapped_run:
         case Failure(e):
             logger.error(f"获取所有条目 ID 失败: {e}")
             return UpdateResponse(success=[], failed=[])
-        case Success(_index_subject_ids):
-            for season_id, subject_ids in _index_subject_ids.items():
-                result = await update_season(
-                    season_id, subject_ids, bgmtv_client, db_client
-                )
+        case Success(_run):
+            index_subject_ids, completed = _run
+            results = await update_seasons(
+                index_subject_ids,
+                bgmtv_client,
+                db_client,
+                fast_refresh,
+                job.season_ids,
+                job.run_id,
+                completed,
+                job,
+            )
+            for season_id, result in results.items():
                 success.extend(result.success)
                 failed.extend(result.failed)
+                changed.extend(result.changed)
+                if result.changed:
+                    changed_seasons[season_id] = len(result.changed)
+                if result.status == "aborted":
+                    status = "aborted"
+    await save_subject_aliases(bgmtv_client, db_client)
     end_time = datetime.now()
-    logger.info(f"全量更新任务完成，耗时 {end_time - start_time}")
-    return UpdateResponse(success=success, failed=failed)
+    if status == "aborted":
+        logger.error(
+            f"全量更新任务因 bgm.tv 熔断提前结束，耗时 {end_time - start_time}"
+        )
+    else:
+        logger.info(f"全量更新任务完成，耗时 {end_time - start_time}")
+    if changed_seasons:
+        logger.info(f"有变化的季度 (季度: 条目数): {changed_seasons}")
+    else:
+        logger.info("没有季度发生变化")
+    # 同一条目可能出现在多个季度中，汇总时去重
+    return UpdateResponse(
+        success=list(dict.fromkeys(success)),
+        failed=list(dict.fromkeys(failed)),
+        status=status,
+        changed=list(dict.fromkeys(changed)),
+    )
+
+
+async def register_update_job(
+    name: str,
+    season_ids: set[int] | None,
+    db_client: DBClient,
+    fast_refresh: bool = False,
+    queued: bool = False,
+) -> tuple[UpdateJob, bool]:
+    """
+    登记更新任务；本进程已有范围包含 season_ids 的任务在等待或执行，或已有
+    这样的任务在排队等待 worker 领取时，合并到该任务而不是重复执行
+
+    新任务同时登记到 update_run，供各进程查询状态，登记失败时任务照常执行，
+    只是不能跨进程查询和中断后继续。
+
+    Args:
+        queued: 任务交给 worker 执行（APP_SCHEDULER_ENABLED=false），本进程
+            只登记；登记失败时 job.run_id 为 None，需要由本进程执行
+
+    Returns:
+        (任务, 是否为新登记的任务)
+    """
+    if running := job_registry.find_active(season_ids):
+        logger.info(f"{name}合并到正在执行的更新任务 {running.id} ({running.name})")
+        return running, False
+    scope = run_scope(season_ids)
+    since = datetime.now() - timedelta(seconds=config.update_lock_timeout)
+    match await db_client.find_queued_run(scope, since):
+        case Failure(e):
+            logger.warning(f"查找排队中的更新任务失败: {e}")
+        case Success(UpdateRun() as run):
+            queued_job = UpdateJob.from_run(run)
+            logger.info(
+                f"{name}合并到等待 worker 执行的更新任务 {queued_job.id} ({queued_job.name})"
+            )
+            return queued_job, False
+    job = UpdateJob(name, season_ids)
+    match await db_client.create_run(job.id, name, scope, fast_refresh, queued):
+        case Failure(e):
+            logger.warning(f"登记更新任务 {job.id} 失败: {e}")
+        case Success(run):
+            job.run_id = run.id
+    if not queued or job.run_id is None:
+        job_registry.add(job)
+    return job, True
+
+
+async def save_job_state(db_client: DBClient, job: UpdateJob) -> None:
+    if job.run_id is None:
+        return
+    match await db_client.save_run_state(job.run_id, job.state_values()):
+        case Failure(e):
+            logger.warning(f"保存更新任务 {job.id} 的状态失败: {e}")
+
+
+async def run_exclusive(
+    bgmtv_client: BGMTVClient,
+    db_client: DBClient,
+    job: UpdateJob,
+    fast_refresh: bool = False,
+) -> UpdateResponse:
+    """
+    获取全局 advisory lock 后执行任务
+
+    其他进程正在执行其他范围的更新任务时排队等待，最多等待
+    config.update_lock_timeout 秒，超时后跳过。
+    """
+    async with db_client.advisory_lock(
+        UPDATE_LOCK_KEY, config.update_lock_timeout
+    ) as lock:
+        match lock:
+            case Failure(e):
+                raise e
+            case Success(False):
+                logger.warning(f"等待其他更新任务结束超时，跳过{job.name}")
+                return UpdateResponse(success=[], failed=[], status="skipped")
+        job.start()
+        await save_job_state(db_client, job)
+        with collect_timings(job.timings):
+            return await update_all(bgmtv_client, db_client, job, fast_refresh)
+
+
+async def merge_into_running(db_client: DBClient, job: UpdateJob) -> UpdateResponse:
+    """其他进程持有相同范围的锁时，本次任务合并到该进程正在等待或执行的任务"""
+    match await db_client.get_running_run(run_scope(job.season_ids), job.run_id):
+        case Success(UpdateRun(job_id=str() as job_id)):
+            logger.info(
+                f"其他进程正在执行相同范围的更新任务 {job_id}，{job.name}合并到该任务"
+            )
+            job.merged_into = job_id
+        case Failure(e):
+            logger.warning(f"查找正在执行的更新任务失败，跳过{job.name}: {e}")
+        case _:
+            logger.info(f"其他进程正在执行相同范围的更新任务，跳过{job.name}")
+    return UpdateResponse(success=[], failed=[], status="skipped")
+
+
+async def update_and_deploy(
+    bgmtv_client: BGMTVClient,
+    db_client: DBClient,
+    job: UpdateJob,
+    fast_refresh: bool = False,
+) -> UpdateResponse:
+    """
+    执行登记过的更新任务，有条目变化时请求部署（合并窗口内的多次请求只部署一次）
+
+    其他进程（如另一个 worker）正在执行相同范围的任务时合并到该任务，返回
+    该任务的 job_id；执行其他范围的任务时排队等待其结束。任务期间的 bgm.tv 请求和数据库操作耗时计入 job。
+    """
+    try:
+        async with db_client.advisory_lock(scope_lock_key(job.season_ids)) as lock:
+            match lock:
+                case Failure(e):
+                    raise e
+                case Success(False):
+                    result = await merge_into_running(db_client, job)
+                case Success(True):
+                    result = await run_exclusive(
+                        bgmtv_client, db_client, job, fast_refresh
+                    )
+    except asyncio.CancelledError:
+        job.cancel()
+        await save_job_state(db_client, job)
+        raise
+    except Exception as e:
+        job.fail(e)
+        await save_job_state(db_client, job)
+        raise
+    result.job_id = job.merged_into or job.id
+    job.finish(result)
+    await save_job_state(db_client, job)
+    if result.status == "skipped":
+        return result
+    if result.changed:
+        await deploy_hooks.request(
+            db_client, f"{job.name}: {len(result.changed)} 个条目有变化"
+        )
+    else:
+        logger.info(f"{job.name}没有条目变化，跳过部署")
+    return result
+
+
+async def run_queued_update(
+    bgmtv_client: BGMTVClient, db_client: DBClient, run: UpdateRun
+) -> UpdateResponse:
+    """在 worker 中执行 API 进程登记的更新任务"""
+    job = UpdateJob.from_run(run)
+    job_registry.add(job)
+    logger.info(f"开始执行 API 登记的更新任务 {job.id} ({job.name})")
+    return await update_and_deploy(bgmtv_client, db_client, job, run.fast_refresh)
 
 
 @router.post("/subjects")
 async def update_subjects(
-    _request: Empty,
+    request: UpdateSubjectsRequest,
     background_tasks: BackgroundTasks,
     bgmtv_client: BGMTVClient = Depends(get_bgmtv_client),
     db_client: DBClient = Depends(get_db_client),
     _: bool = Depends(verify_password),
 ) -> UpdateResponse:
-    background_tasks.add_task(update_all, bgmtv_client, db_client)
-    return UpdateResponse(success=[], failed=[])
+    """
+    登记更新任务并立即返回 job_id，任务进度通过 GET /jobs/{job_id} 查询
+
+    APP_SCHEDULER_ENABLED=false 时 API 进程只登记任务，由 worker 领取执行。
+    """
+    season_ids = SEASON_TIERS[request.tier]() if request.tier else None
+    queued = not config.app_scheduler_enabled
+    job, created = await register_update_job(
+        f"手动更新 ({request.tier or 'all'})",
+        season_ids,
+        db_client,
+        request.fast_refresh,
+        queued,
+    )
+    if not created:
+        # 已有范围包含本次请求的任务在等待或执行，本次触发不再单独执行
+        return UpdateResponse(success=[], failed=[], status="skipped", job_id=job.id)
+    if queued and job.run_id is not None:
+        logger.info(f"更新任务 {job.id} 已登记，等待 worker 执行")
+        return UpdateResponse(success=[], failed=[], status="pending", job_id=job.id)
+    background_tasks.add_task(
+        update_and_deploy,
+        bgmtv_client,
+        db_client,
+        job,
+        request.fast_refresh,
+    )
+    return UpdateResponse(success=[], failed=[], status="pending", job_id=job.id)
+
+
+def job_snapshot(run: UpdateRun) -> UpdateJobResponse:
+    """本进程正在执行的任务使用内存中的最新进度，其余读取 update_run"""
+    job = job_registry.get(run.job_id) if run.job_id else None
+    if job is None or not job.active:
+        job = UpdateJob.from_run(run)
+    return job.snapshot()
+
+
+@router.get("/jobs")
+async def get_update_jobs(
+    db_client: DBClient = Depends(get_db_client),
+    _: bool = Depends(verify_password),
+) -> list[UpdateJobResponse]:
+    """最近的更新任务（包括其他进程中的任务），按创建时间倒序"""
+    match await db_client.list_runs(MAX_JOBS):
+        case Failure(e):
+            logger.warning(f"获取更新任务失败，只返回本进程的任务: {e}")
+            return [job.snapshot() for job in job_registry.list()]
+        case Success(runs):
+            return [job_snapshot(run) for run in runs]
+    return []
+
+
+@router.get("/jobs/{job_id}")
+async def get_update_job(
+    job_id: str,
+    db_client: DBClient = Depends(get_db_client),
+    _: bool = Depends(verify_password),
+) -> UpdateJobResponse:
+    match await db_client.get_run(job_id):
+        case Failure(e):
+            logger.warning(f"获取更新任务 {job_id} 失败，查找本进程的任务: {e}")
+            job = job_registry.get(job_id)
+            if job is not None:
+                return job.snapshot()
+        case Success(UpdateRun() as run):
+            return job_snapshot(run)
+    raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
 
 
-async def scheduled_update_all_subjects(app: FastAPI) -> None:
-    logger.info("开始执行全量更新任务")
+async def scheduled_update_subjects(
+    bgmtv_client: BGMTVClient, db_client: DBClient, tier: SeasonTier
+) -> None:
+    """定时更新某一档季度的条目"""
+    logger.info(f"开始执行 {tier} 季度更新任务")
     start_time = datetime.now()
     try:
-        bgmtv_client = app.state.bgmtv_client
-        db_client = app.state.db_client
-
-        await update_all(bgmtv_client, db_client)
+        job, created = await register_update_job(
+            f"{tier} 季度定时更新", SEASON_TIERS[tier](), db_client
+        )
+        if not created:
+            return
+        result = await update_and_deploy(
+            bgmtv_client, db_client, job, config.update_fast_refresh
+        )
 
         end_time = datetime.now()
-        logger.info(f"全量更新任务完成，耗时 {end_time - start_time}")
-        await trigger_deploy_hooks()
+        logger.info(
+            f"{tier} 季度更新任务结束 ({result.status})，耗时 {end_time - start_time}"
+        )
     except Exception as e:
-        logger.error(f"定时任务：更新所有条目失败: {e}")
+        logger.error(f"定时任务：更新 {tier} 季度条目失败: {e}")
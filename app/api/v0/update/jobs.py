@@ -0,0 +1,199 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Literal, cast
+from uuid import uuid4
+
+from app.api.v0.update.models import JobState, UpdateJobResponse, UpdateResponse
+from app.services.db import UpdateRun
+from app.services.timing import Timings
+
+# 保留最近的任务数量，用于比较不同配置下的吞吐
+MAX_JOBS = 20
+
+
+class UpdateJob:
+    """
+    一次更新任务的状态、进度和耗时统计
+
+    执行任务的进程在内存中更新，并通过 state_values() 保存到 update_run 的
+    run_id 行，其他进程用 from_run() 读取。
+    """
+
+    def __init__(self, name: str, season_ids: set[int] | None = None) -> None:
+        self.id = uuid4().hex[:8]
+        self.run_id: int | None = None
+        self.name = name
+        # 更新范围，None 表示全部季度
+        self.season_ids = season_ids
+        self.state: JobState = "pending"
+        self.error: str | None = None
+        self.merged_into: str | None = None
+        self.created_at = datetime.now()
+        self.started_at: datetime | None = None
+        self.finished_at: datetime | None = None
+        self.planned = 0
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.changed = 0
+        self.timings = Timings()
+
+    @classmethod
+    def from_run(cls, run: UpdateRun) -> "UpdateJob":
+        """由 update_run 中保存的任务状态还原"""
+        season_ids = (
+            None
+            if run.scope == "all"
+            else {int(season_id) for season_id in run.scope.split(",") if season_id}
+        )
+        job = cls(run.name or run.scope, season_ids)
+        job.id = run.job_id or str(run.id)
+        job.run_id = run.id
+        # resumed 的任务在中断时已结束，对外显示为 aborted
+        job.state = cast(JobState, "aborted" if run.status == "resumed" else run.status)
+        job.error = run.error
+        job.merged_into = run.merged_into
+        job.created_at = run.created_at
+        job.started_at = run.started_at
+        job.finished_at = run.finished_at
+        job.planned = run.planned
+        job.done = run.done
+        job.skipped = run.skipped
+        job.failed = run.failed
+        job.changed = run.changed
+        job.timings = Timings(
+            run.bgmtv_requests, run.bgmtv_seconds, run.db_calls, run.db_seconds
+        )
+        return job
+
+    def state_values(self) -> dict[str, Any]:
+        """需要保存到 update_run 的任务状态"""
+        return {
+            "status": self.state,
+            "error": self.error,
+            "merged_into": self.merged_into,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "planned": self.planned,
+            "done": self.done,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "changed": self.changed,
+            "bgmtv_requests": self.timings.bgmtv_requests,
+            "bgmtv_seconds": self.timings.bgmtv_seconds,
+            "db_calls": self.timings.db_calls,
+            "db_seconds": self.timings.db_seconds,
+        }
+
+    @property
+    def active(self) -> bool:
+        return self.state in ("pending", "running")
+
+    def covers(self, season_ids: set[int] | None) -> bool:
+        """更新范围是否包含 season_ids"""
+        if self.season_ids is None:
+            return True
+        return season_ids is not None and season_ids <= self.season_ids
+
+    def start(self) -> None:
+        self.state = "running"
+        self.started_at = datetime.now()
+
+    def plan(self, count: int) -> None:
+        self.planned += count
+
+    def record(
+        self, outcome: Literal["done", "skipped", "failed"], count: int = 1
+    ) -> None:
+        match outcome:
+            case "done":
+                self.done += count
+            case "skipped":
+                self.skipped += count
+            case "failed":
+                self.failed += count
+
+    def finish(self, result: UpdateResponse) -> None:
+        self.state = result.status
+        self.changed = len(result.changed)
+        self.finished_at = datetime.now()
+
+    def fail(self, error: Exception) -> None:
+        self.state = "failed"
+        self.error = str(error)
+        self.finished_at = datetime.now()
+
+    def cancel(self) -> None:
+        """进程退出时被取消，检查点保留，下一次同范围的任务继续执行"""
+        self.state = "aborted"
+        self.error = "任务被取消"
+        self.finished_at = datetime.now()
+
+    def snapshot(self) -> UpdateJobResponse:
+        elapsed = 0.0
+        if self.started_at:
+            elapsed = (
+                (self.finished_at or datetime.now()) - self.started_at
+            ).total_seconds()
+        processed = self.done + self.skipped + self.failed
+        eta = None
+        if self.state == "running" and processed and elapsed > 0:
+            eta = (self.planned - processed) / (processed / elapsed)
+        return UpdateJobResponse(
+            id=self.id,
+            name=self.name,
+            state=self.state,
+            error=self.error,
+            merged_into=self.merged_into,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            planned=self.planned,
+            done=self.done,
+            skipped=self.skipped,
+            failed=self.failed,
+            changed=self.changed,
+            elapsed_seconds=elapsed,
+            bgmtv_requests=self.timings.bgmtv_requests,
+            bgmtv_seconds=self.timings.bgmtv_seconds,
+            requests_per_second=(
+                self.timings.bgmtv_requests / elapsed if elapsed > 0 else 0.0
+            ),
+            db_calls=self.timings.db_calls,
+            db_seconds=self.timings.db_seconds,
+            eta_seconds=eta,
+        )
+
+
+class JobRegistry:
+    """
+    进程内的更新任务登记表，只保留最近 max_jobs 个任务
+
+    用于合并本进程内重复的触发；各进程的任务状态以 update_run 为准。
+    """
+
+    def __init__(self, max_jobs: int = MAX_JOBS) -> None:
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict[str, UpdateJob] = OrderedDict()
+
+    def add(self, job: UpdateJob) -> None:
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+
+    def get(self, job_id: str) -> UpdateJob | None:
+        return self._jobs.get(job_id)
+
+    def find_active(self, season_ids: set[int] | None) -> UpdateJob | None:
+        """等待或正在执行、且更新范围包含 season_ids 的任务"""
+        for job in self._jobs.values():
+            if job.active and job.covers(season_ids):
+                return job
+        return None
+
+    def list(self) -> list[UpdateJob]:
+        """按创建时间倒序"""
+        return list(reversed(self._jobs.values()))
+
+
+job_registry = JobRegistry()
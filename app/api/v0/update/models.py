@@ -1,10 +1,60 @@
+from datetime import datetime
+from typing import Literal
+
 from pydantic import BaseModel
 
+# completed: 正常结束; aborted: bgm.tv 熔断导致提前结束;
+# skipped: 已有相同范围的任务在执行（或排队超时），本次未执行;
+# pending: 触发接口已登记任务，在后台排队执行
+UpdateStatus = Literal["completed", "aborted", "skipped", "pending"]
+# recent: 最近四个季度; older: 近四年的其余季度; ancient: 更早的季度; future: 下一季度
+SeasonTier = Literal["recent", "older", "ancient", "future"]
+# pending: 等待执行; running: 执行中; failed: 执行出错; 其余同 UpdateStatus
+JobState = Literal["pending", "running", "completed", "aborted", "skipped", "failed"]
+
+
+class UpdateIndexRequest(BaseModel):
+    # 只更新当前和下一季度的索引，更早季度的索引基本不再变化
+    active_only: bool = False
 
-class Empty(BaseModel):
-    pass
+
+class UpdateSubjectsRequest(BaseModel):
+    # 对已完结季度使用搜索接口批量刷新评分、排名和收藏，不再逐条请求
+    fast_refresh: bool = False
+    # 只更新某一档季度的条目，不传时更新所有季度
+    tier: SeasonTier | None = None
 
 
 class UpdateResponse(BaseModel):
     success: list[int]
     failed: list[int]
+    status: UpdateStatus = "completed"
+    # 内容有变化的条目（更新索引时为季度）
+    changed: list[int] = []
+    # 后台任务ID，用于查询进度
+    job_id: str | None = None
+
+
+class UpdateJobResponse(BaseModel):
+    id: str
+    name: str
+    state: JobState
+    error: str | None = None
+    # 其他进程正在执行相同范围的任务时，本任务合并到的任务ID
+    merged_into: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    # 计划处理的条目数，以及其中已写入/跳过（已是最新或已完成）/失败的条目数
+    planned: int
+    done: int
+    skipped: int
+    failed: int
+    changed: int
+    elapsed_seconds: float
+    bgmtv_requests: int
+    bgmtv_seconds: float
+    requests_per_second: float
+    db_calls: int
+    db_seconds: float
+    eta_seconds: float | None = None
@@ -0,0 +1,158 @@
+"""
+条目刷新策略
+
+决定每次更新任务中哪些条目需要重新获取，以及获取之后下一次何时刷新。
+通过 UPDATE_REFRESH_POLICY 选择策略，便于比较不同策略的请求量和数据新鲜度。
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+from loguru import logger
+
+from app.config import config
+from app.services.db import RefreshState, Subject, SubjectRefresh
+
+
+def season_age_days(season_id: int) -> int:
+    """按开播时间计算的刷新间隔（天）：开播后每 90 天增加一天"""
+    year = season_id // 100
+    month = season_id % 100
+    return (datetime.now() - datetime(year, month, 1)).days // 90
+
+
+def is_subject_fresh(season_id: int, updated_at: datetime) -> bool:
+    days = season_age_days(season_id)
+    return updated_at >= datetime.now() - timedelta(days=days)
+
+
+class RefreshPolicy(ABC):
+    name: str
+
+    @abstractmethod
+    def is_due(self, season_id: int, state: RefreshState | None, now: datetime) -> bool:
+        """条目是否需要在本次任务中重新获取，数据库中没有的条目 state 为 None"""
+
+    def schedule(
+        self,
+        season_id: int,
+        subject_id: int,
+        state: RefreshState | None,
+        subject: Subject | None,
+        now: datetime,
+    ) -> SubjectRefresh | None:
+        """
+        条目获取后计算下一次刷新的计划，返回 None 时不保存
+
+        Args:
+            state: 获取前的状态，数据库中没有时为 None
+            subject: 获取到的条目，bgm.tv 返回 304 时为 None
+        """
+        return None
+
+
+class SeasonAgePolicy(RefreshPolicy):
+    """按所属季度的开播时间刷新，不保存刷新计划"""
+
+    name = "season_age"
+
+    def is_due(self, season_id: int, state: RefreshState | None, now: datetime) -> bool:
+        return state is None or not is_subject_fresh(season_id, state.checked_at)
+
+
+class AdaptivePolicy(RefreshPolicy):
+    """
+    按观测到的变化调整每个条目的刷新间隔
+
+    评分、排名或收藏数的变化超过阈值时间隔减半，否则乘以 GROWTH，限制在
+    [min_hours, 上限] 之间。收藏数超过 popular_collections 的热门条目按比例
+    降低上限，更频繁地刷新。还没有刷新计划的条目沿用开播时间规则，
+    第一次获取后从开播时间对应的间隔开始调整。
+    """
+
+    name = "adaptive"
+
+    SCORE_DELTA = 0.05
+    # 排名和收藏数按相对变化判断
+    RELATIVE_DELTA = 0.01
+    GROWTH = 1.5
+
+    def __init__(
+        self, min_hours: float, max_hours: float, popular_collections: int
+    ) -> None:
+        self.min_hours = min_hours
+        self.max_hours = max(min_hours, max_hours)
+        self.popular_collections = popular_collections
+
+    def is_due(self, season_id: int, state: RefreshState | None, now: datetime) -> bool:
+        if state is None:
+            return True
+        if state.next_refresh_at is None:
+            return not is_subject_fresh(season_id, state.checked_at)
+        return now >= state.next_refresh_at
+
+    def has_moved(self, state: RefreshState, subject: Subject) -> bool:
+        """评分、排名或收藏数的变化是否超过阈值"""
+        if abs((subject.score or 0) - (state.score or 0)) >= self.SCORE_DELTA:
+            return True
+        for before, after in (
+            (state.rank, subject.rank),
+            (state.collection_total, subject.collection_total),
+        ):
+            if before is None or after is None:
+                if before != after:
+                    return True
+                continue
+            if abs(after - before) >= max(1, before * self.RELATIVE_DELTA):
+                return True
+        return False
+
+    def max_interval(self, collection_total: int | None) -> float:
+        collections = max(self.popular_collections, collection_total or 0, 1)
+        limit = self.max_hours * self.popular_collections / collections
+        return max(self.min_hours, limit)
+
+    def schedule(
+        self,
+        season_id: int,
+        subject_id: int,
+        state: RefreshState | None,
+        subject: Subject | None,
+        now: datetime,
+    ) -> SubjectRefresh | None:
+        if state is None or state.interval_hours is None:
+            interval = season_age_days(season_id) * 24
+        elif subject is not None and self.has_moved(state, subject):
+            interval = state.interval_hours / 2
+        else:
+            interval = state.interval_hours * self.GROWTH
+        collection_total = (
+            subject.collection_total
+            if subject is not None
+            else state.collection_total
+            if state is not None
+            else None
+        )
+        interval = min(
+            max(interval, self.min_hours), self.max_interval(collection_total)
+        )
+        return SubjectRefresh(
+            id=subject_id,
+            interval_hours=interval,
+            next_refresh_at=now + timedelta(hours=interval),
+            policy=self.name,
+            updated_at=now,
+        )
+
+
+def create_refresh_policy(name: str) -> RefreshPolicy:
+    match name:
+        case AdaptivePolicy.name:
+            return AdaptivePolicy(**config.get_refresh_policy_config())
+        case SeasonAgePolicy.name:
+            return SeasonAgePolicy()
+    logger.warning(f"未知的刷新策略 {name}，使用 {SeasonAgePolicy.name}")
+    return SeasonAgePolicy()
+
+
+refresh_policy = create_refresh_policy(config.update_refresh_policy)
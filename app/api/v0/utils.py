@@ -1,12 +1,16 @@
-from datetime import datetime
+import asyncio
+from datetime import datetime, timedelta
 from typing import Any
 
 import httpx
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from loguru import logger
+from returns.result import Failure, Success
 
+from app.api.v0.update.data import DATA
 from app.config import config
+from app.services import DBClient
 
 security = HTTPBasic()
 
@@ -61,16 +65,8 @@ def older_season_ids() -> set[int]:
 
 
 def ancient_season_ids() -> set[int]:
-    now = datetime.now()
-    years = [year for year in range(now.year, 2011, -1)]
-    months = [1, 4, 7, 10]
-    seasons = []
-    for year in years:
-        for month in months:
-            if month > now.month and year == now.year:
-                continue
-            seasons.append(int(f"{year}{month:02d}"))
-    return set(seasons) - set(recent_season_ids()) - set(older_season_ids()) - {201201}
+    """DATA 中不属于 recent、older、future 的所有季度"""
+    return set(DATA) - recent_season_ids() - older_season_ids() - future_season_ids()
 
 
 def future_season_ids() -> set[int]:
@@ -104,6 +100,82 @@ async def trigger_deploy_hooks() -> None:
             )
 
 
+class DeployHookDebouncer:
+    """
+    合并短时间内的多次部署请求
+
+    第一次请求后等待 delay 秒再触发部署，等待期间的请求（手动或定时更新）
+    合并为一次。等待窗口保存在 deploy_request 表中，由所有进程（多个 API
+    worker 和更新 worker）共享，到期后只有领取到请求的进程触发部署。
+    """
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self._task: asyncio.Task[None] | None = None
+
+    async def request(self, db_client: DBClient, reason: str) -> None:
+        match await db_client.request_deploy(reason):
+            case Failure(e):
+                logger.warning(f"保存部署请求失败，立即触发部署: {e}")
+                await self._trigger([reason])
+                return
+            case Success(requested_at):
+                wait = self._remaining(requested_at)
+        if self._task is not None:
+            logger.info(f"部署请求已合并: {reason}")
+            return
+        logger.info(f"{wait:.0f} 秒后触发部署: {reason}")
+        self._task = asyncio.create_task(self._run(db_client, wait))
+
+    def _remaining(self, requested_at: datetime) -> float:
+        elapsed = (datetime.now() - requested_at).total_seconds()
+        return max(self.delay - elapsed, 0.0)
+
+    async def _run(self, db_client: DBClient, wait: float) -> None:
+        while True:
+            await asyncio.sleep(wait)
+            due = datetime.now() - timedelta(seconds=self.delay)
+            match await db_client.claim_deploy(due):
+                case Success(list() as reasons):
+                    # 触发期间的新请求重新计时
+                    self._task = None
+                    await self._trigger(reasons)
+                    return
+                case Failure(e):
+                    logger.error(f"领取部署请求失败: {e}")
+                    self._task = None
+                    return
+            # 其他进程已触发部署；之后又有新的请求时等待新的窗口到期
+            match await db_client.get_deploy_request():
+                case Success(datetime() as requested_at):
+                    wait = self._remaining(requested_at)
+                case _:
+                    self._task = None
+                    return
+
+    async def _trigger(self, reasons: list[str]) -> None:
+        logger.info(f"触发部署，合并了 {len(reasons)} 次请求: {'; '.join(reasons)}")
+        try:
+            await trigger_deploy_hooks()
+        except Exception as e:
+            logger.error(f"触发部署失败: {e}")
+
+    async def flush(self, db_client: DBClient) -> None:
+        """立即触发本进程等待中的部署，用于关闭应用时"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        match await db_client.claim_deploy():
+            case Success(list() as reasons):
+                await self._trigger(reasons)
+            case Failure(e):
+                logger.error(f"领取部署请求失败: {e}")
+
+
+deploy_hooks = DeployHookDebouncer(config.cf_pages_hooks_debounce)
+
+
 if __name__ == "__main__":
     print(current_season_id())
     print(sorted(list(future_season_ids())))
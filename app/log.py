@@ -0,0 +1,20 @@
+import os
+import sys
+
+from loguru import logger
+
+from app.config import config
+
+
+def setup_logging(filename: str) -> None:
+    """输出到标准输出和 app/logs 下的日志文件，API 和 worker 使用不同的文件"""
+    logger.remove()
+    logger.add(sys.stdout, level=config.app_log_level)
+    log_filename = os.path.join(os.path.dirname(__file__), "logs", filename)
+    logger.add(
+        log_filename,
+        level=config.app_log_level,
+        rotation="10 MB",
+        retention="14 days",
+        enqueue=True,
+    )
@@ -1,62 +1,43 @@
-import os
-import sys
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
 from app.api.v0.routers import routers as v0_routers
-from app.api.v0.update.endpoints import scheduled_update_all_subjects
+from app.api.v0.utils import deploy_hooks
 from app.config import config
+from app.log import setup_logging
+from app.scheduler import create_scheduler, shutdown_scheduler
 from app.services import BGMTVClient, DBClient
-
-scheduler = AsyncIOScheduler()
+from app.services.bgmtv import create_http_client
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    logger.remove()
-    logger.add(sys.stdout, level=config.app_log_level)
-    log_filename = os.path.join(os.path.dirname(__file__), "logs", "app.log")
-    logger.add(
-        log_filename,
-        level=config.app_log_level,
-        rotation="10 MB",
-        retention="14 days",
-        enqueue=True,
-    )
+    setup_logging("app.log")
 
     app.state.db_client = DBClient(config.db_url)
-    app.state.bgmtv_client = BGMTVClient()
+    app.state.bgmtv_client = BGMTVClient(create_http_client())
 
     logger.info("Starting up...")
 
-    async def scheduled_update_wrapper() -> None:
-        """异步包装函数，用于调度器执行定时更新任务"""
-        try:
-            await scheduled_update_all_subjects(app)
-        except Exception as e:
-            logger.error(f"调度器全量更新任务执行失败: {e}")
-
-    scheduler.add_job(
-        scheduled_update_wrapper,
-        "cron",
-        hour="0,4,8,12,16,20",
-        id="update_all_subjects",
-        name="每天0、4、8、12、16、20点更新所有条目",
-        replace_existing=True,
-    )
-    scheduler.start()
-    logger.info("调度器已启动，每4小时执行一次全量更新任务")
+    scheduler = None
+    if config.app_scheduler_enabled:
+        scheduler = create_scheduler(app.state.bgmtv_client, app.state.db_client)
+        scheduler.start()
+        logger.info("调度器已启动，按季度分档执行更新任务")
+    else:
+        logger.info("调度器已关闭，定时更新任务由 worker 执行")
 
     yield
 
     logger.info("Shutting down...")
-    scheduler.shutdown()
-    logger.info("调度器已停止")
+    if scheduler:
+        await shutdown_scheduler(scheduler)
+    await deploy_hooks.flush(app.state.db_client)
+    await app.state.bgmtv_client.close()
     await app.state.db_client.close()
     logger.stop()
     logger.complete()
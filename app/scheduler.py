@@ -0,0 +1,118 @@
+import asyncio
+from contextlib import suppress
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from loguru import logger
+from returns.result import Failure, Success
+
+from app.api.v0.update.endpoints import run_queued_update, scheduled_update_subjects
+from app.api.v0.update.models import SeasonTier
+from app.config import config
+from app.services import BGMTVClient, DBClient
+from app.services.db import UpdateRun
+
+# 调度器正在执行的更新任务，退出时等待或取消
+_running_updates: set[asyncio.Task] = set()
+
+# 各档季度的更新频率：新番数据变化快，老番的评分几乎不再变化
+SCHEDULED_TIERS: list[tuple[SeasonTier, dict[str, str], str]] = [
+    ("future", {"hour": "5", "minute": "30"}, "每天5点30分更新下一季度的条目"),
+    (
+        "recent",
+        {"hour": "0,4,8,12,16,20"},
+        "每天0、4、8、12、16、20点更新最近四个季度的条目",
+    ),
+    ("older", {"hour": "2", "minute": "15"}, "每天2点15分更新近四年其余季度的条目"),
+    (
+        "ancient",
+        {"day_of_week": "mon", "hour": "3", "minute": "45"},
+        "每周一3点45分更新更早季度的条目",
+    ),
+]
+
+
+def create_scheduler(
+    bgmtv_client: BGMTVClient, db_client: DBClient
+) -> AsyncIOScheduler:
+    """创建按季度分档执行更新任务的调度器，API 进程和 worker 共用"""
+    scheduler = AsyncIOScheduler()
+
+    async def scheduled_update_wrapper(tier: SeasonTier) -> None:
+        """异步包装函数，用于调度器执行定时更新任务"""
+        task = asyncio.current_task()
+        if task:
+            _running_updates.add(task)
+        try:
+            await scheduled_update_subjects(bgmtv_client, db_client, tier)
+        except asyncio.CancelledError:
+            # 由 shutdown_scheduler 取消，检查点已保存，不作为任务出错记录
+            logger.warning(f"调度器 {tier} 季度更新任务已取消")
+        except Exception as e:
+            logger.error(f"调度器 {tier} 季度更新任务执行失败: {e}")
+        finally:
+            if task:
+                _running_updates.discard(task)
+
+    for tier, trigger_args, name in SCHEDULED_TIERS:
+        scheduler.add_job(
+            scheduled_update_wrapper,
+            "cron",
+            args=[tier],
+            id=f"update_{tier}_subjects",
+            name=name,
+            replace_existing=True,
+            **trigger_args,
+        )
+    return scheduler
+
+
+async def run_queued_updates(
+    bgmtv_client: BGMTVClient, db_client: DBClient, stop: asyncio.Event
+) -> None:
+    """
+    worker 中依次领取并执行 API 进程登记的更新任务，直到 stop 被设置
+
+    执行中的任务与定时任务一样由 shutdown_scheduler 等待或取消。
+    """
+    task = asyncio.current_task()
+    while not stop.is_set():
+        match await db_client.claim_queued_run():
+            case Failure(e):
+                logger.warning(f"领取 API 登记的更新任务失败: {e}")
+            case Success(UpdateRun() as run):
+                if task:
+                    _running_updates.add(task)
+                try:
+                    await run_queued_update(bgmtv_client, db_client, run)
+                except asyncio.CancelledError:
+                    logger.warning(f"更新任务 {run.job_id} 已取消")
+                    return
+                except Exception as e:
+                    logger.error(f"更新任务 {run.job_id} 执行失败: {e}")
+                finally:
+                    if task:
+                        _running_updates.discard(task)
+                continue
+        with suppress(TimeoutError):
+            await asyncio.wait_for(stop.wait(), config.update_poll_interval)
+
+
+async def shutdown_scheduler(scheduler: AsyncIOScheduler) -> None:
+    """
+    停止调度器，并在关闭数据库连接之前结束正在执行的更新任务
+
+    最多等待 config.update_shutdown_timeout 秒，超时后取消任务；被取消的任务
+    保留检查点，下一次同范围的任务从中断处继续。
+    """
+    scheduler.pause()
+    running = set(_running_updates)
+    if running:
+        logger.info(f"等待 {len(running)} 个正在执行的更新任务结束")
+        _, pending = await asyncio.wait(running, timeout=config.update_shutdown_timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"取消 {len(pending)} 个未结束的更新任务")
+            await asyncio.gather(*pending, return_exceptions=True)
+    scheduler.shutdown(wait=False)
+    logger.info("调度器已停止")
@@ -1,8 +1,14 @@
 from .api import (
+    create_http_client,
+    decode_episodes,
+    decode_paged_subjects,
+    decode_subject,
     get_episodes,
     get_index,
     get_subject,
+    search_subjects,
 )
+from .breaker import CircuitOpenError
 from .client import BGMTVClient
 from .models import (
     AddSubjectToIndexRequest,
@@ -11,19 +17,31 @@ from .models import (
     PagedSubject,
     SearchFilter,
     SearchRequest,
+    SlimPagedEpisode,
+    SlimPagedSubject,
+    SlimSubject,
     Subject,
 )
 
 __all__ = [
+    "create_http_client",
+    "decode_episodes",
+    "decode_paged_subjects",
+    "decode_subject",
     "get_episodes",
     "get_index",
     "get_subject",
+    "search_subjects",
     "BGMTVClient",
+    "CircuitOpenError",
     "AddSubjectToIndexRequest",
     "IndexBasicInfo",
     "PagedIndexSubject",
     "PagedSubject",
     "SearchRequest",
     "SearchFilter",
+    "SlimPagedEpisode",
+    "SlimPagedSubject",
+    "SlimSubject",
     "Subject",
 ]
@@ -1,5 +1,8 @@
 import asyncio
 import functools
+import hashlib
+import importlib.util
+import json
 import random
 import re
 from typing import Any, Callable, Coroutine, TypeVar
@@ -9,21 +12,36 @@ from loguru import logger
 from returns.result import Failure, Result, Success
 
 from app.config import config
+from app.services.bgmtv.breaker import CircuitOpenError, circuit_breaker
+from app.services.bgmtv.cache import CacheEntry, response_cache
+from app.services.bgmtv.limiter import parse_retry_after, rate_limiter
 from app.services.bgmtv.models import (
+    AnyPagedEpisode,
+    AnyPagedSubject,
+    AnySubject,
     PagedEpisode,
     PagedIndexSubject,
+    PagedSubject,
+    SearchRequest,
+    SlimPagedEpisode,
+    SlimPagedSubject,
+    SlimSubject,
     Subject,
 )
+from app.services.timing import timed
 
 DEFAULT_USER_AGENT = (
     "rinshankaiho.fun (https://github.com/hexsix/bangumi-seasonal-rank-updater)"
 )
 
-BASE_URL = "https://api.bgm.tv"
+BASE_URL = config.bgmtv_base_url
 
 T = TypeVar("T")
 R = TypeVar("R")
 
+# 每个 URL 最近一次成功响应的 ETag / Last-Modified，用于条件请求
+_validators: dict[str, dict[str, str]] = {}
+
 
 def _extract_subject_id_from_redirect_url(redirect_url: str) -> int:
     """
@@ -74,6 +92,9 @@ def retry_on_failure(
             for attempt in range(max_retries + 1):  # +1 因为第一次不算重试
                 try:
                     return await func(*args, **kwargs)
+                except CircuitOpenError as e:
+                    # 熔断中不再重试，直接失败
+                    return Failure(e)
                 except (httpx.HTTPStatusError, httpx.RequestError, ValueError) as e:
                     last_exception = e
 
@@ -111,28 +132,256 @@ def _get_headers() -> dict:
     return headers
 
 
+def create_http_client() -> httpx.AsyncClient:
+    """
+    创建进程内共享的 bgm.tv HTTP 客户端
+
+    复用 keep-alive 连接池，避免每次请求都重新握手；默认启用 HTTP/2
+    （h2 随 httpx[http2] 安装，环境中缺少 h2 时退回 HTTP/1.1）。
+    调用方负责在退出时调用 aclose()。
+    """
+    http_config = config.get_bgmtv_http_config()
+    http2 = http_config["http2"] and importlib.util.find_spec("h2") is not None
+    limits = httpx.Limits(
+        max_connections=http_config["max_connections"],
+        max_keepalive_connections=http_config["max_keepalive_connections"],
+        keepalive_expiry=http_config["keepalive_expiry"],
+    )
+    logger.info(f"创建 bgm.tv HTTP 客户端: http2={http2}, limits={limits}")
+    return httpx.AsyncClient(
+        headers=_get_headers(),
+        http2=http2,
+        limits=limits,
+        timeout=http_config["timeout"],
+        follow_redirects=False,
+    )
+
+
+def decode_subject(content: bytes, full: bool | None = None) -> AnySubject:
+    """
+    解析条目响应
+
+    默认直接从原始字节解析为精简模型，跳过简介、标签等不写库的字段；
+    full 为 True（或配置 BGMTV_FULL_MODELS=true）时解析完整模型，便于调试。
+    """
+    if full is None:
+        full = config.bgmtv_full_models
+    if full:
+        return Subject.model_validate_json(content)
+    return SlimSubject.model_validate_json(content)
+
+
+def decode_episodes(content: bytes, full: bool | None = None) -> AnyPagedEpisode:
+    """解析剧集响应，规则同 decode_subject"""
+    if full is None:
+        full = config.bgmtv_full_models
+    if full:
+        return PagedEpisode.model_validate_json(content)
+    return SlimPagedEpisode.model_validate_json(content)
+
+
+def decode_paged_subjects(content: bytes, full: bool | None = None) -> AnyPagedSubject:
+    """解析条目搜索响应，规则同 decode_subject"""
+    if full is None:
+        full = config.bgmtv_full_models
+    if full:
+        return PagedSubject.model_validate_json(content)
+    return SlimPagedSubject.model_validate_json(content)
+
+
+def _request_key(
+    url: str, params: dict | None = None, json_body: dict | None = None
+) -> str:
+    """校验值和磁盘缓存的键：URL（含查询参数），POST 请求附加请求体的摘要"""
+    key = str(httpx.URL(url, params=params))
+    if json_body is not None:
+        body_digest = hashlib.sha256(
+            json.dumps(json_body, sort_keys=True).encode()
+        ).hexdigest()
+        key = f"{key}#{body_digest}"
+    return key
+
+
+def _conditional_headers(validators: dict[str, str]) -> dict[str, str]:
+    """根据校验值生成条件请求头"""
+    headers = {}
+    if "etag" in validators:
+        headers["If-None-Match"] = validators["etag"]
+    if "last-modified" in validators:
+        headers["If-Modified-Since"] = validators["last-modified"]
+    return headers
+
+
+def _cached_response(key: str, entry: CacheEntry) -> httpx.Response:
+    """用缓存条目还原一个 200 响应"""
+    return httpx.Response(
+        200,
+        content=entry.body,
+        headers=entry.headers,
+        request=httpx.Request("GET", key),
+        extensions={"from_cache": True},
+    )
+
+
+def _store_validators(key: str, response: httpx.Response) -> None:
+    validators = {
+        name: response.headers[name]
+        for name in ("etag", "last-modified")
+        if name in response.headers
+    }
+    if validators:
+        _validators[key] = validators
+    else:
+        _validators.pop(key, None)
+
+
+async def _remember(
+    key: str, response: httpx.Response, endpoint: str, validators: bool = True
+) -> None:
+    """
+    响应体解析成功后保存校验值并写入磁盘缓存
+
+    解析失败的响应不保存，否则之后的条件请求会因 304 跳过未能使用的数据。
+    """
+    if response.status_code != 200 or response.extensions.get("from_cache"):
+        return
+    if validators:
+        _store_validators(key, response)
+    await response_cache.put(key, response.content, dict(response.headers))
+
+
+async def discard_subject_validators(subject_id: int) -> None:
+    """
+    丢弃条目及其剧集的校验值和磁盘缓存条目
+
+    当数据写入或剧集获取失败时调用，保证下一次请求拿到完整的新响应，而不是
+    304 或缓存内容。剧集按本进程保存过校验值的分页淘汰缓存条目。
+    """
+    keys = {
+        key
+        for key in _validators
+        if re.search(rf"/v0/subjects/{subject_id}$|[?&]subject_id={subject_id}&", key)
+    }
+    keys.add(_request_key(f"{BASE_URL}/v0/subjects/{subject_id}"))
+    for key in keys:
+        _validators.pop(key, None)
+        await response_cache.discard(key)
+
+
+async def _send(
+    client: httpx.AsyncClient,
+    url: str,
+    params: dict | None = None,
+    conditional: bool = False,
+    endpoint: str | None = None,
+    json_body: dict | None = None,
+) -> httpx.Response:
+    """
+    经磁盘缓存和全局限流器发送请求，并根据响应调整限流速率
+
+    缓存未过期时直接返回缓存内容；缓存过期但带有校验值时发送条件请求，
+    304 后返回缓存内容。调用方要求条件请求 (conditional) 且本进程已见过
+    该 URL 时，304 会原样返回给调用方。200 响应由调用方解析成功后通过
+    _remember 保存校验值和缓存。
+
+    Args:
+        client: 共享的 HTTP 客户端
+        url: 请求地址
+        params: 查询参数
+        conditional: 是否携带 If-None-Match / If-Modified-Since
+        endpoint: 缓存端点名 (subject/episodes/index/search)，为 None 时不使用缓存
+        json_body: 请求体，提供时发送 POST 请求，缓存键包含请求体
+
+    Raises:
+        httpx.HTTPStatusError: 当API返回429时，交给重试装饰器退避重试
+        CircuitOpenError: 当熔断器打开时
+    """
+    key = _request_key(url, params, json_body)
+    cached = await response_cache.get(key) if endpoint else None
+    if endpoint and cached and response_cache.is_fresh(cached, endpoint):
+        logger.debug(f"命中 bgm.tv 响应缓存: {key}")
+        return _cached_response(key, cached)
+    if endpoint and response_cache.offline:
+        logger.warning(f"离线模式下缓存未命中: {key}")
+        return httpx.Response(504, request=httpx.Request("GET", key))
+
+    revalidate_cache = False
+    headers = None
+    if conditional and key in _validators:
+        headers = _conditional_headers(_validators[key])
+    elif cached:
+        headers = _conditional_headers(cached.headers)
+        revalidate_cache = True
+
+    circuit_breaker.before_call()
+    recorded = False
+    try:
+        await rate_limiter.acquire()
+        with timed("bgmtv"):
+            if json_body is None:
+                response = await client.get(url, params=params, headers=headers)
+            else:
+                response = await client.post(
+                    url, params=params, json=json_body, headers=headers
+                )
+        # 429 只说明触发了限流，不计入熔断统计
+        if response.status_code >= 500:
+            circuit_breaker.record_failure()
+            recorded = True
+        elif response.status_code != 429:
+            circuit_breaker.record_success()
+            recorded = True
+    except httpx.TransportError:
+        circuit_breaker.record_failure()
+        recorded = True
+        raise
+    finally:
+        if not recorded:
+            circuit_breaker.release()
+    if response.status_code == 429:
+        rate_limiter.on_throttled(
+            parse_retry_after(response.headers.get("retry-after"))
+        )
+        raise httpx.HTTPStatusError(
+            "BGM API 限流: 429",
+            request=response.request,
+            response=response,
+        )
+    rate_limiter.on_success()
+
+    if response.status_code == 304 and cached:
+        await response_cache.touch(cached)
+        if revalidate_cache:
+            return _cached_response(key, cached)
+    return response
+
+
 @retry_on_failure(max_retries=3)
 async def get_episodes(
+    client: httpx.AsyncClient,
     subject_id: int,
     episode_type: int,
     limit: int,
     offset: int,
+    conditional: bool = False,
     _redirect_count: int = 0,
-) -> Result[PagedEpisode, Exception]:
+) -> Result[AnyPagedEpisode | None, Exception]:
     """
     获取剧集信息
 
     GET /v0/episodes
 
     Args:
+        client: 共享的 HTTP 客户端
         subject_id: 条目ID
         episode_type: 剧集类型 (本篇=0 特别篇=1 OP=2 ED=3 预告/宣传/广告=4 MAD=5 其他=6)
         limit: 每页数量
         offset: 偏移量
+        conditional: 是否发送条件请求，内容未变化时返回 None
         _redirect_count: 内部重定向计数，用于防止无限重定向
 
     Returns:
-        PagedEpisode: 分页剧集数据
+        AnyPagedEpisode | None: 分页剧集数据，条件请求命中 (304) 时为 None
 
     Raises:
         httpx.HTTPStatusError: 当API返回错误状态码时
@@ -143,7 +392,6 @@ async def get_episodes(
         return Failure(ValueError(f"重定向次数过多，已达到最大限制: {_redirect_count}"))
 
     logger.info(f"正在获取条目 {subject_id} 的剧集信息")
-    await asyncio.sleep(0.2)
 
     url = f"{BASE_URL}/v0/episodes"
     params = {
@@ -153,56 +401,63 @@ async def get_episodes(
         "offset": offset,
     }
 
-    async with httpx.AsyncClient(follow_redirects=False) as client:
-        response = await client.get(
-            url,
-            params=params,
-            headers=_get_headers(),
-        )
-
-        # 处理302重定向
-        if response.status_code == 302:
-            location = response.headers.get("location")
-            if location:
-                logger.info(
-                    f"检测到302重定向，从条目 {subject_id} 重定向到: {location}"
-                )
-                try:
-                    new_subject_id = _extract_subject_id_from_redirect_url(location)
-                    logger.info(f"提取到新的subject_id: {new_subject_id}")
-                    # 递归调用处理重定向
-                    result = await get_episodes(
-                        new_subject_id, episode_type, limit, offset, _redirect_count + 1
-                    )
-                    return result
-                except ValueError as e:
-                    logger.error(f"处理重定向失败: {e}")
-                    return Failure(ValueError(f"处理重定向失败: {e}"))
-            else:
-                logger.error("收到302状态码但没有Location头部")
-                return Failure(ValueError("收到302状态码但没有Location头部"))
-
-        if not response.is_success:
-            logger.error(f"BGM API 返回状态码: {response.status_code}")
-            return Failure(
-                httpx.HTTPStatusError(
-                    f"BGM API 返回状态码: {response.status_code}",
-                    request=response.request,
-                    response=response,
+    key = _request_key(url, params)
+    response = await _send(client, url, params, conditional, endpoint="episodes")
+
+    # 处理302重定向
+    if response.status_code == 302:
+        location = response.headers.get("location")
+        if location:
+            logger.info(f"检测到302重定向，从条目 {subject_id} 重定向到: {location}")
+            try:
+                new_subject_id = _extract_subject_id_from_redirect_url(location)
+                logger.info(f"提取到新的subject_id: {new_subject_id}")
+                # 递归调用处理重定向，重定向后不沿用条件请求
+                result = await get_episodes(
+                    client,
+                    new_subject_id,
+                    episode_type,
+                    limit,
+                    offset,
+                    False,
+                    _redirect_count + 1,
                 )
+                return result
+            except ValueError as e:
+                logger.error(f"处理重定向失败: {e}")
+                return Failure(ValueError(f"处理重定向失败: {e}"))
+        else:
+            logger.error("收到302状态码但没有Location头部")
+            return Failure(ValueError("收到302状态码但没有Location头部"))
+
+    if response.status_code == 304:
+        return Success(None)
+
+    if not response.is_success:
+        _validators.pop(key, None)
+        logger.error(f"BGM API 返回状态码: {response.status_code}")
+        return Failure(
+            httpx.HTTPStatusError(
+                f"BGM API 返回状态码: {response.status_code}",
+                request=response.request,
+                response=response,
             )
+        )
 
-        try:
-            data = response.json()
-            return Success(PagedEpisode(**data))
-        except Exception as e:
-            logger.error(f"解析JSON失败: {e}")
-            logger.error(f"响应内容: {response.text}")
-            return Failure(ValueError(f"解析JSON失败: {e}"))
+    try:
+        decoded = decode_episodes(response.content)
+    except Exception as e:
+        _validators.pop(key, None)
+        logger.error(f"解析JSON失败: {e}")
+        logger.error(f"响应内容: {response.text}")
+        return Failure(ValueError(f"解析JSON失败: {e}"))
+    await _remember(key, response, "episodes")
+    return Success(decoded)
 
 
 @retry_on_failure(max_retries=3)
 async def get_index(
+    client: httpx.AsyncClient,
     index_id: int,
     subject_type: int,
     limit: int,
@@ -214,6 +469,7 @@ async def get_index(
     GET /v0/indices/{index_id}/subjects
 
     Args:
+        client: 共享的 HTTP 客户端
         index_id: 索引ID
         subject_type: 条目类型 (1=book, 2=anime, 3=music, 4=game, 6=real)
         limit: 每页数量
@@ -227,7 +483,6 @@ async def get_index(
         ValueError: 当响应数据解析失败时
     """
     logger.info(f"正在获取索引 {index_id} 的条目信息")
-    await asyncio.sleep(0.2)
 
     url = f"{BASE_URL}/v0/indices/{index_id}/subjects"
     params = {
@@ -236,47 +491,52 @@ async def get_index(
         "offset": offset,
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            url,
-            params=params,
-            headers=_get_headers(),
-        )
-
-        if not response.is_success:
-            logger.error(f"BGM API 返回状态码: {response.status_code}")
-            return Failure(
-                httpx.HTTPStatusError(
-                    f"BGM API 返回状态码: {response.status_code}",
-                    request=response.request,
-                    response=response,
-                )
+    key = _request_key(url, params)
+    response = await _send(client, url, params, endpoint="index")
+
+    if not response.is_success:
+        _validators.pop(key, None)
+        logger.error(f"BGM API 返回状态码: {response.status_code}")
+        return Failure(
+            httpx.HTTPStatusError(
+                f"BGM API 返回状态码: {response.status_code}",
+                request=response.request,
+                response=response,
             )
+        )
 
-        try:
-            data = response.json()
-            return Success(PagedIndexSubject(**data))
-        except Exception as e:
-            logger.error(f"解析JSON失败: {e}")
-            logger.error(f"响应内容: {response.text}")
-            return Failure(ValueError(f"解析JSON失败: {e}"))
+    try:
+        data = response.json()
+        index = PagedIndexSubject(**data)
+    except Exception as e:
+        _validators.pop(key, None)
+        logger.error(f"解析JSON失败: {e}")
+        logger.error(f"响应内容: {response.text}")
+        return Failure(ValueError(f"解析JSON失败: {e}"))
+    await _remember(key, response, "index")
+    return Success(index)
 
 
 @retry_on_failure(max_retries=3)
 async def get_subject(
-    subject_id: int, _redirect_count: int = 0
-) -> Result[Subject, Exception]:
+    client: httpx.AsyncClient,
+    subject_id: int,
+    conditional: bool = False,
+    _redirect_count: int = 0,
+) -> Result[AnySubject | None, Exception]:
     """
     获取条目详细信息
 
     GET /v0/subjects/{subject_id}
 
     Args:
+        client: 共享的 HTTP 客户端
         subject_id: 条目ID
+        conditional: 是否发送条件请求，内容未变化时返回 None
         _redirect_count: 内部重定向计数，用于防止无限重定向
 
     Returns:
-        Subject: 条目详细信息
+        AnySubject | None: 条目详细信息，条件请求命中 (304) 时为 None
 
     Raises:
         httpx.HTTPStatusError: 当API返回错误状态码时
@@ -287,50 +547,112 @@ async def get_subject(
         return Failure(ValueError(f"重定向次数过多，已达到最大限制: {_redirect_count}"))
 
     logger.info(f"正在获取条目 {subject_id} 的详细信息")
-    await asyncio.sleep(0.2)
 
     url = f"{BASE_URL}/v0/subjects/{subject_id}"
 
-    async with httpx.AsyncClient(follow_redirects=False) as client:
-        response = await client.get(
-            url,
-            headers=_get_headers(),
+    key = _request_key(url)
+    response = await _send(client, url, conditional=conditional, endpoint="subject")
+
+    # 处理302重定向
+    if response.status_code == 302:
+        location = response.headers.get("location")
+        if location:
+            logger.info(f"检测到302重定向，从条目 {subject_id} 重定向到: {location}")
+            try:
+                new_subject_id = _extract_subject_id_from_redirect_url(location)
+                logger.info(f"提取到新的subject_id: {new_subject_id}")
+                # 递归调用处理重定向
+                # 重定向后的条目可能已被其他ID请求过，不能沿用条件请求
+                result = await get_subject(
+                    client, new_subject_id, False, _redirect_count + 1
+                )
+                return result
+            except ValueError as e:
+                logger.error(f"处理重定向失败: {e}")
+                return Failure(ValueError(f"处理重定向失败: {e}"))
+        else:
+            logger.error("收到302状态码但没有Location头部")
+            return Failure(ValueError("收到302状态码但没有Location头部"))
+
+    if response.status_code == 304:
+        return Success(None)
+
+    if not response.is_success:
+        _validators.pop(key, None)
+        logger.error(f"BGM API 返回状态码: {response.status_code}")
+        return Failure(
+            httpx.HTTPStatusError(
+                f"BGM API 返回状态码: {response.status_code}",
+                request=response.request,
+                response=response,
+            )
         )
 
-        # 处理302重定向
-        if response.status_code == 302:
-            location = response.headers.get("location")
-            if location:
-                logger.info(
-                    f"检测到302重定向，从条目 {subject_id} 重定向到: {location}"
-                )
-                try:
-                    new_subject_id = _extract_subject_id_from_redirect_url(location)
-                    logger.info(f"提取到新的subject_id: {new_subject_id}")
-                    # 递归调用处理重定向
-                    result = await get_subject(new_subject_id, _redirect_count + 1)
-                    return result
-                except ValueError as e:
-                    logger.error(f"处理重定向失败: {e}")
-                    return Failure(ValueError(f"处理重定向失败: {e}"))
-            else:
-                logger.error("收到302状态码但没有Location头部")
-                return Failure(ValueError("收到302状态码但没有Location头部"))
-
-        if not response.is_success:
-            logger.error(f"BGM API 返回状态码: {response.status_code}")
-            return Failure(
-                httpx.HTTPStatusError(
-                    f"BGM API 返回状态码: {response.status_code}",
-                    request=response.request,
-                    response=response,
-                )
+    try:
+        decoded = decode_subject(response.content)
+    except Exception as e:
+        _validators.pop(key, None)
+        logger.error(f"解析JSON失败: {e}")
+        logger.error(f"响应内容: {response.text}")
+        return Failure(ValueError(f"解析JSON失败: {e}"))
+    await _remember(key, response, "subject")
+    return Success(decoded)
+
+
+@retry_on_failure(max_retries=3)
+async def search_subjects(
+    client: httpx.AsyncClient,
+    request: SearchRequest,
+    limit: int,
+    offset: int,
+) -> Result[AnyPagedSubject, Exception]:
+    """
+    搜索条目
+
+    POST /v0/search/subjects
+
+    Args:
+        client: 共享的 HTTP 客户端
+        request: 搜索请求（关键字、排序和筛选条件）
+        limit: 每页数量
+        offset: 偏移量
+
+    Returns:
+        AnyPagedSubject: 分页条目数据
+
+    Raises:
+        httpx.HTTPStatusError: 当API返回错误状态码时
+        ValueError: 当响应数据解析失败时
+    """
+    logger.info(f"正在搜索条目: {request.filter}, offset={offset}")
+
+    url = f"{BASE_URL}/v0/search/subjects"
+    params = {
+        "limit": limit,
+        "offset": offset,
+    }
+
+    json_body = request.model_dump(exclude_none=True)
+    key = _request_key(url, params, json_body)
+    response = await _send(client, url, params, endpoint="search", json_body=json_body)
+
+    if not response.is_success:
+        _validators.pop(key, None)
+        logger.error(f"BGM API 返回状态码: {response.status_code}")
+        return Failure(
+            httpx.HTTPStatusError(
+                f"BGM API 返回状态码: {response.status_code}",
+                request=response.request,
+                response=response,
             )
+        )
 
-        try:
-            data = response.json()
-            return Success(Subject(**data))
-        except Exception as e:
-            logger.error(f"解析JSON失败: {e}")
-            logger.error(f"响应内容: {response.text}")
-            return Failure(ValueError(f"解析JSON失败: {e}"))
+    try:
+        decoded = decode_paged_subjects(response.content)
+    except Exception as e:
+        _validators.pop(key, None)
+        logger.error(f"解析JSON失败: {e}")
+        logger.error(f"响应内容: {response.text}")
+        return Failure(ValueError(f"解析JSON失败: {e}"))
+    await _remember(key, response, "search", validators=False)
+    return Success(decoded)
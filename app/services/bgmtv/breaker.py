@@ -0,0 +1,126 @@
+import time
+from collections import deque
+from enum import Enum
+
+from loguru import logger
+
+from app.config import config
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开时快速失败，不再请求 bgm.tv"""
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    bgm.tv 请求熔断器
+
+    关闭状态下统计最近 window 次请求，失败率达到 failure_rate（且样本数不少于
+    min_calls）时打开；打开期间所有请求直接抛出 CircuitOpenError；冷却
+    cooldown 秒后进入半开状态，放行 half_open_calls 次探测请求，全部成功则
+    关闭，任意一次失败则重新打开；半开超过 cooldown 秒仍未得出结果时也重新打开。
+
+    每次 before_call 之后必须调用 record_success、record_failure 或 release
+    之一，归还半开状态下占用的探测名额。
+    """
+
+    def __init__(
+        self,
+        failure_rate: float,
+        window: int,
+        min_calls: int,
+        cooldown: float,
+        half_open_calls: int = 1,
+    ) -> None:
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.half_open_calls = half_open_calls
+        self._outcomes: deque[bool] = deque(maxlen=window)
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._half_opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probes_succeeded = 0
+
+    @property
+    def state(self) -> CircuitState:
+        now = time.monotonic()
+        if (
+            self._state == CircuitState.HALF_OPEN
+            and now - self._half_opened_at >= self.cooldown
+        ):
+            logger.warning("bgm.tv 熔断器半开探测超时，重新打开")
+            self._open()
+        elif (
+            self._state == CircuitState.OPEN and now - self._opened_at >= self.cooldown
+        ):
+            self._state = CircuitState.HALF_OPEN
+            self._half_opened_at = now
+            self._probes_in_flight = 0
+            self._probes_succeeded = 0
+            logger.info("bgm.tv 熔断器进入半开状态，开始探测")
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == CircuitState.OPEN
+
+    def before_call(self) -> None:
+        """
+        请求前调用
+
+        Raises:
+            CircuitOpenError: 熔断器打开，或半开状态下探测名额已用完
+        """
+        state = self.state
+        if state == CircuitState.OPEN:
+            remaining = self.cooldown - (time.monotonic() - self._opened_at)
+            raise CircuitOpenError(f"bgm.tv 熔断中，{remaining:.0f} 秒后重试")
+        if state == CircuitState.HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_calls:
+                raise CircuitOpenError("bgm.tv 熔断器半开，等待探测结果")
+            self._probes_in_flight += 1
+
+    def release(self) -> None:
+        """请求没有得出结果（被取消、限流或其他异常）时归还探测名额"""
+        if self._state == CircuitState.HALF_OPEN and self._probes_in_flight > 0:
+            self._probes_in_flight -= 1
+
+    def record_success(self) -> None:
+        if self._state == CircuitState.HALF_OPEN:
+            self.release()
+            self._probes_succeeded += 1
+            if self._probes_succeeded >= self.half_open_calls:
+                self._state = CircuitState.CLOSED
+                self._outcomes.clear()
+                logger.info("bgm.tv 熔断器已关闭，恢复正常请求")
+            return
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        if self._state == CircuitState.HALF_OPEN:
+            self._open()
+            return
+        self._outcomes.append(False)
+        failures = self._outcomes.count(False)
+        if (
+            len(self._outcomes) >= self.min_calls
+            and failures / len(self._outcomes) >= self.failure_rate
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        self._state = CircuitState.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        logger.error(f"bgm.tv 熔断器已打开，{self.cooldown:.0f} 秒内请求将直接失败")
+
+
+circuit_breaker = CircuitBreaker(**config.get_bgmtv_breaker_config())
@@ -0,0 +1,234 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+
+from loguru import logger
+
+from app.config import config
+
+# 随响应体一同缓存的头部，用于还原响应和条件请求
+CACHED_HEADERS = ("content-type", "etag", "last-modified")
+# 本进程写入的字节数超过预算的这一比例后，重新扫描磁盘上的实际占用
+RESCAN_FRACTION = 0.1
+
+
+@dataclass
+class CacheEntry:
+    """缓存条目"""
+
+    url: str
+    stored_at: float
+    body: bytes
+    headers: dict[str, str] = field(default_factory=dict)
+
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+
+class ResponseCache:
+    """
+    bgm.tv 响应的磁盘缓存
+
+    以 URL（含查询参数）为键保存原始响应体，按端点设置过期时间，
+    超出字节预算时按最近访问时间淘汰。每个条目一个文件：
+    第一行是 JSON 元数据，其后是原始响应体。文件的修改时间是存储时间，
+    访问时间是最近访问时间。
+
+    多个进程共用缓存目录，各进程的占用统计只包含自己的写入，因此本进程写入
+    一定量后以及淘汰前都重新扫描磁盘，按实际占用淘汰。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        ttls: dict[str, float],
+        enabled: bool = True,
+        offline: bool = False,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = ttls
+        self.enabled = enabled
+        self.offline = offline
+        # key -> (文件大小, 最近访问时间)
+        self._index: dict[str, tuple[int, float]] | None = None
+        self._total_bytes = 0
+        # 上次扫描磁盘后本进程写入的字节数
+        self._unscanned_bytes = 0
+        self._lock = asyncio.Lock()
+
+    def ttl(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, 0.0)
+
+    def is_fresh(self, entry: CacheEntry, endpoint: str) -> bool:
+        """离线模式下所有条目都视为新鲜"""
+        return self.offline or entry.age() < self.ttl(endpoint)
+
+    def _path(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _load_index(self) -> dict[str, tuple[int, float]]:
+        index: dict[str, tuple[int, float]] = {}
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(".tmp"):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except OSError:
+                        # 其他进程刚淘汰的条目
+                        continue
+                    index[name] = (stat.st_size, stat.st_atime)
+        self._total_bytes = sum(size for size, _ in index.values())
+        self._unscanned_bytes = 0
+        # 第一次加载之后的重新扫描较频繁，只记录调试日志
+        log = logger.info if self._index is None else logger.debug
+        log(f"加载 bgm.tv 响应缓存: {len(index)} 个条目, {self._total_bytes} 字节")
+        return index
+
+    def _ensure_index(self) -> dict[str, tuple[int, float]]:
+        if self._index is None:
+            self._index = self._load_index()
+        return self._index
+
+    def _read(self, url: str) -> CacheEntry | None:
+        index = self._ensure_index()
+        path = self._path(url)
+        try:
+            with open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+                stat = os.fstat(f.fileno())
+            # 只更新访问时间，修改时间仍是存储时间
+            now = time.time()
+            os.utime(path, (now, stat.st_mtime))
+        except (OSError, ValueError):
+            return None
+        index[os.path.basename(path)] = (stat.st_size, now)
+        return CacheEntry(
+            url=meta["url"],
+            stored_at=stat.st_mtime,
+            headers=meta["headers"],
+            body=body,
+        )
+
+    def _write(self, entry: CacheEntry) -> None:
+        index = self._ensure_index()
+        path = self._path(entry.url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = {
+            "url": entry.url,
+            "stored_at": entry.stored_at,
+            "headers": entry.headers,
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(meta).encode() + b"\n")
+            f.write(entry.body)
+        # 原子替换，避免多个 worker 读到写了一半的文件
+        os.replace(tmp_path, path)
+
+        name = os.path.basename(path)
+        old_size, _ = index.get(name, (0, 0.0))
+        size = os.path.getsize(path)
+        index[name] = (size, time.time())
+        self._total_bytes += size - old_size
+        self._unscanned_bytes += size
+        if (
+            self._total_bytes > self.max_bytes
+            or self._unscanned_bytes > self.max_bytes * RESCAN_FRACTION
+        ):
+            # 包含其他进程的写入和淘汰
+            index = self._index = self._load_index()
+            if self._total_bytes > self.max_bytes:
+                self._evict(index)
+
+    def _touch(self, entry: CacheEntry) -> None:
+        path = self._path(entry.url)
+        now = time.time()
+        os.utime(path, (now, now))
+        entry.stored_at = now
+        index = self._ensure_index()
+        name = os.path.basename(path)
+        if name in index:
+            index[name] = (index[name][0], now)
+
+    def _evict(self, index: dict[str, tuple[int, float]]) -> None:
+        """按最近访问时间淘汰，直到占用降到预算的 90%"""
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for name, (size, _) in sorted(index.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= target:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name[:2], name))
+            except OSError:
+                pass
+            del index[name]
+            self._total_bytes -= size
+            evicted += 1
+        logger.info(
+            f"bgm.tv 响应缓存淘汰 {evicted} 个条目，当前 {self._total_bytes} 字节"
+        )
+
+    def _remove(self, url: str) -> None:
+        index = self._ensure_index()
+        path = self._path(url)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        size, _ = index.pop(os.path.basename(path), (0, 0.0))
+        self._total_bytes -= size
+
+    async def get(self, url: str) -> CacheEntry | None:
+        """读取缓存条目，不判断是否过期"""
+        if not self.enabled:
+            return None
+        async with self._lock:
+            return await asyncio.to_thread(self._read, url)
+
+    async def put(self, url: str, body: bytes, headers: dict[str, str]) -> None:
+        """写入缓存条目，写入失败只记录日志"""
+        if not self.enabled or len(body) > self.max_bytes:
+            return
+        entry = CacheEntry(
+            url=url,
+            stored_at=time.time(),
+            body=body,
+            headers={k: v for k, v in headers.items() if k in CACHED_HEADERS},
+        )
+        async with self._lock:
+            try:
+                await asyncio.to_thread(self._write, entry)
+            except OSError as e:
+                logger.warning(f"写入 bgm.tv 响应缓存失败: {e}")
+
+    async def discard(self, url: str) -> None:
+        """删除缓存条目，条目不存在时忽略"""
+        if not self.enabled:
+            return
+        async with self._lock:
+            try:
+                await asyncio.to_thread(self._remove, url)
+            except OSError as e:
+                logger.warning(f"删除 bgm.tv 响应缓存失败: {e}")
+
+    async def touch(self, entry: CacheEntry) -> None:
+        """条件请求命中 (304) 后刷新条目的存储时间，只更新文件的修改时间"""
+        if not self.enabled:
+            return
+        async with self._lock:
+            try:
+                await asyncio.to_thread(self._touch, entry)
+            except OSError as e:
+                logger.warning(f"刷新 bgm.tv 响应缓存失败: {e}")
+
+
+response_cache = ResponseCache(**config.get_bgmtv_cache_config())
@@ -1,18 +1,102 @@
+import asyncio
 import re
-from datetime import date, datetime
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator
 
+import httpx
 from loguru import logger
 from returns.result import Failure, Result, Success
 
-from app.services.bgmtv.api import get_episodes, get_index, get_subject
-from app.services.bgmtv.models import PagedEpisode, PagedIndexSubject
-from app.services.bgmtv.models import Subject as BGMTVSubject
+from app.config import config
+from app.services.bgmtv.api import (
+    create_http_client,
+    discard_subject_validators,
+    get_episodes,
+    get_index,
+    get_subject,
+    search_subjects,
+)
+from app.services.bgmtv.breaker import CircuitState, circuit_breaker
+from app.services.bgmtv.models import (
+    AnyPagedEpisode,
+    AnyPagedSubject,
+    PagedIndexSubject,
+    SearchFilter,
+    SearchRequest,
+)
+from app.services.bgmtv.models import AnySubject as BGMTVSubject
+from app.services.db import EpisodeStat
 from app.services.db import Subject as DBSubject
 
+EPISODE_PAGE_SIZE = 100
+SEARCH_PAGE_SIZE = 50
+
+
+@dataclass
+class SubjectDetails:
+    subject: DBSubject
+    # 本次重新获取的剧集统计，没有获取时为 None
+    episodes: list[EpisodeStat] | None = None
+    # bgm.tv 上已不存在、需要删除的已保存剧集ID
+    stale_episode_ids: list[int] = field(default_factory=list)
+
 
 class BGMTVClient:
-    def __init__(self) -> None:
-        pass
+    """bgm.tv 客户端，持有进程内共享的 HTTP 连接池"""
+
+    def __init__(self, http_client: httpx.AsyncClient | None = None) -> None:
+        self.http_client = http_client or create_http_client()
+        # 条目重定向映射: 请求的条目ID -> 实际条目ID
+        self.subject_aliases: dict[int, int] = {}
+        self._new_subject_aliases: dict[int, int] = {}
+
+    async def close(self) -> None:
+        """关闭 HTTP 连接池"""
+        await self.http_client.aclose()
+        logger.info("bgm.tv HTTP 客户端已关闭")
+
+    @property
+    def circuit_open(self) -> bool:
+        """bgm.tv 熔断器是否打开或半开，即请求可能被直接拒绝"""
+        return circuit_breaker.state != CircuitState.CLOSED
+
+    async def forget_subject(self, subject_id: int) -> None:
+        """写库失败时调用，下次获取该条目时不再发送条件请求或使用缓存"""
+        await discard_subject_validators(self.resolve_subject_id(subject_id))
+
+    def load_subject_aliases(self, aliases: dict[int, int]) -> None:
+        """载入已持久化的重定向映射"""
+        self.subject_aliases.update(aliases)
+
+    def pending_subject_aliases(self) -> dict[int, int]:
+        """新发现、尚未持久化的重定向映射"""
+        return dict(self._new_subject_aliases)
+
+    def mark_subject_aliases_saved(self, aliases: dict[int, int]) -> None:
+        for subject_id in aliases:
+            self._new_subject_aliases.pop(subject_id, None)
+
+    def resolve_subject_id(self, subject_id: int) -> int:
+        return self.subject_aliases.get(subject_id, subject_id)
+
+    def can_revalidate(self, subject_id: int) -> bool:
+        """
+        是否可以对条目发送条件请求
+
+        被合并的条目与实际条目共用同一个 URL，304 只说明实际条目未变化，
+        不能说明本条目已经写入，因此只对未合并的条目发送条件请求；
+        跟随 302 的请求同理不沿用条件请求（见 api.get_subject）。
+        """
+        return self.resolve_subject_id(subject_id) == subject_id
+
+    def _record_subject_alias(self, subject_id: int, canonical_id: int) -> None:
+        if self.subject_aliases.get(subject_id) == canonical_id:
+            return
+        logger.info(f"记录条目重定向: {subject_id} -> {canonical_id}")
+        self.subject_aliases[subject_id] = canonical_id
+        self._new_subject_aliases[subject_id] = canonical_id
 
     def _parse_image(self, subject: BGMTVSubject) -> tuple[str | None, str | None]:
         if subject.images:
@@ -71,73 +155,298 @@ class BGMTVClient:
                     return item.value
         return None
 
-    def _parse_episodes(self, episodes: PagedEpisode) -> float:
-        if not episodes or not episodes.data:
-            return 0.0
-
-        current_date = datetime.now().date()
-        total_aired = 0.0
-        total_comments = 0.0
+    def _episode_stats(
+        self, subject_id: int, episodes: AnyPagedEpisode, now: datetime
+    ) -> list[EpisodeStat]:
+        """把一页剧集转换为剧集统计，无法解析的播出日期记为 None"""
+        stats: list[EpisodeStat] = []
         for episode in episodes.data:
+            airdate = None
             if episode.airdate:
-                wrapped_airdate = self._parse_airdate(episode.airdate)
-                match wrapped_airdate:
+                match self._parse_airdate(episode.airdate):
                     case Failure(e):
                         logger.warning(f"无效的播出日期格式: {episode.airdate}, {e}")
-                        continue
-                    case Success(airdate):
-                        if airdate <= current_date and episode.comment:
-                            total_aired += 1.0
-                            total_comments += float(episode.comment)
-            else:
-                continue
-        if total_aired > 0:
-            return total_comments / total_aired
-        else:
-            return 0.0
+                    case Success(_airdate):
+                        airdate = _airdate
+            stats.append(
+                EpisodeStat(
+                    subject_id=subject_id,
+                    id=episode.id,
+                    sort=episode.sort,
+                    airdate=airdate,
+                    comment=episode.comment or 0,
+                    updated_at=now,
+                )
+            )
+        return stats
+
+    def _average_comment(self, stats: list[EpisodeStat]) -> float:
+        """已播出且有评论的剧集的平均评论数"""
+        current_date = datetime.now().date()
+        comments = [
+            stat.comment
+            for stat in stats
+            if stat.airdate and stat.airdate <= current_date and stat.comment
+        ]
+        if comments:
+            return sum(comments) / len(comments)
+        return 0.0
+
+    def _frozen_count(self, stored: list[EpisodeStat]) -> int:
+        """按 sort 排序后开头连续播出超过冻结期的剧集数"""
+        cutoff = datetime.now().date() - timedelta(
+            days=config.update_episode_freeze_days
+        )
+        count = 0
+        for stat in stored:
+            if stat.airdate is None or stat.airdate > cutoff:
+                break
+            count += 1
+        return count
 
-    async def _parse_average_comment(self, subject: BGMTVSubject) -> float:
-        # cuz redirect, use subject.id instead of subject_id
-        wrapped_episodes = await get_episodes(subject.id, 0, 100, 0)
+    async def _get_episodes_page(
+        self, subject_id: int, limit: int, offset: int
+    ) -> Result[AnyPagedEpisode, Exception]:
+        try:
+            wrapped_episodes = await get_episodes(
+                self.http_client, subject_id, 0, limit, offset
+            )
+        except (httpx.HTTPError, ValueError) as e:
+            return Failure(e)
         match wrapped_episodes:
+            case Success(None):
+                return Failure(ValueError(f"条目 {subject_id} 剧集返回了空响应"))
+            case Success(episodes):
+                return Success(episodes)
             case Failure(e):
-                logger.warning(f"获取 {subject.id} 集数失败: {e}")
-                average_comment = 0.0
+                return Failure(e)
+        return Failure(RuntimeError("未知错误"))
+
+    async def iter_episodes(
+        self,
+        subject_id: int,
+        first_page: AnyPagedEpisode | None = None,
+        skip_before: int = 0,
+    ) -> AsyncIterator[Result[AnyPagedEpisode, Exception]]:
+        """
+        分页获取条目的全部本篇剧集
+
+        先拿到第一页（可由调用方提供）得知 total，再在全局限流下并发请求
+        剩余页，按完成顺序逐页产出。任意一页失败时产出 Failure 并停止。
+        完全落在前 skip_before 集中的页（第一页除外）不再请求。
+        """
+        if first_page is None:
+            wrapped_page = await self._get_episodes_page(
+                subject_id, EPISODE_PAGE_SIZE, 0
+            )
+            match wrapped_page:
+                case Failure(e):
+                    yield Failure(e)
+                    return
+                case Success(_page):
+                    first_page = _page
+        yield Success(first_page)
+
+        step = first_page.limit or EPISODE_PAGE_SIZE
+        tasks = [
+            asyncio.create_task(self._get_episodes_page(subject_id, step, offset))
+            for offset in range(step, first_page.total, step)
+            if offset + step > skip_before
+        ]
+        if tasks:
+            logger.info(
+                f"条目 {subject_id} 共 {first_page.total} 集，并发获取剩余 {len(tasks)} 页"
+            )
+        try:
+            for next_page in asyncio.as_completed(tasks):
+                yield await next_page
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _sync_episodes(
+        self,
+        subject_id: int,
+        canonical_id: int,
+        stored: list[EpisodeStat],
+        first_page: AnyPagedEpisode | None = None,
+    ) -> Result[tuple[list[EpisodeStat], list[int]], Exception]:
+        """
+        增量获取剧集统计
+
+        第一页总是请求，用于得知总集数。总集数与已保存的一致时，已保存的剧集
+        中开头连续播出超过冻结期的部分不再重新获取，完全落在这部分中的整页
+        跳过，沿用已保存的数据；不一致时（新增或删除了剧集）全部重新获取，
+        已保存但不再存在的剧集作为 stale 返回。
+
+        Returns:
+            (本次重新获取的剧集统计, stale 剧集ID)
+        """
+        if first_page is None:
+            wrapped_page = await self._get_episodes_page(
+                canonical_id, EPISODE_PAGE_SIZE, 0
+            )
+            match wrapped_page:
+                case Failure(e):
+                    return Failure(e)
+                case Success(_page):
+                    first_page = _page
+        frozen = 0
+        if first_page.total == len(stored):
+            frozen = self._frozen_count(stored)
+        now = datetime.now()
+        stats: list[EpisodeStat] = []
+        async with aclosing(
+            self.iter_episodes(canonical_id, first_page, frozen)
+        ) as pages:
+            async for page in pages:
+                match page:
+                    case Failure(e):
+                        return Failure(e)
+                    case Success(episodes):
+                        stats.extend(self._episode_stats(subject_id, episodes, now))
+        stale: list[int] = []
+        if frozen == 0:
+            fetched_ids = {stat.id for stat in stats}
+            stale = [stat.id for stat in stored if stat.id not in fetched_ids]
+        return Success((stats, stale))
+
+    async def _episode_page_changed(
+        self, subject_id: int, offset: int
+    ) -> tuple[bool, AnyPagedEpisode | None]:
+        wrapped_episodes = await get_episodes(
+            self.http_client,
+            subject_id,
+            0,
+            EPISODE_PAGE_SIZE,
+            offset,
+            conditional=True,
+        )
+        match wrapped_episodes:
+            case Success(None):
+                return False, None
             case Success(episodes):
-                average_comment = self._parse_episodes(episodes)
-        return average_comment
+                return True, episodes
+            case Failure(e):
+                logger.warning(f"条件请求 {subject_id} 集数失败: {e}")
+        return True, None
+
+    async def _episodes_changed(
+        self, subject_id: int, stored: list[EpisodeStat]
+    ) -> tuple[bool, AnyPagedEpisode | None]:
+        """
+        条件请求剧集列表，返回是否变化以及变化后的第一页剧集数据
+
+        第一页包含总集数，未变化时总集数与已保存的一致，再按已保存的集数对
+        其余未冻结的页并发发送条件请求，任意一页变化都视为剧集变化。
+        """
+        changed, first_page = await self._episode_page_changed(subject_id, 0)
+        if changed:
+            return True, first_page
+        frozen = self._frozen_count(stored)
+        offsets = [
+            offset
+            for offset in range(EPISODE_PAGE_SIZE, len(stored), EPISODE_PAGE_SIZE)
+            if offset + EPISODE_PAGE_SIZE > frozen
+        ]
+        results = await asyncio.gather(
+            *(self._episode_page_changed(subject_id, offset) for offset in offsets)
+        )
+        return any(changed for changed, _ in results), None
 
     async def get_subject_details(
-        self, subject_id: int
-    ) -> Result[DBSubject, Exception]:
-        wrapped_subject = await get_subject(subject_id)
+        self, subject_id: int, stored_episodes: list[EpisodeStat] | None = None
+    ) -> Result[SubjectDetails | None, Exception]:
+        """
+        获取条目详情并转换为数据库模型
+
+        条目与剧集都返回 304 时视为未变化，返回 Success(None)，
+        调用方无需解析或写库。
+        已知被合并的条目直接请求实际条目ID，返回的 id 为实际条目ID。
+
+        Args:
+            stored_episodes: 已保存的剧集统计（按 sort 排序）。全部剧集播出都超过
+                冻结期、且条目的集数 (eps) 没有超过已保存数量的条目不再请求剧集，
+                其余条目只重新获取未冻结的剧集，平均评论数由合并后的剧集统计计算
+        """
+        canonical_id = self.resolve_subject_id(subject_id)
+        stored = stored_episodes or []
+        finished = bool(stored) and self._frozen_count(stored) == len(stored)
+        episodes: AnyPagedEpisode | None = None
+        wrapped_subject = await get_subject(
+            self.http_client, canonical_id, conditional=self.can_revalidate(subject_id)
+        )
+        match wrapped_subject:
+            case Success(None):
+                changed, episodes = False, None
+                if not finished:
+                    changed, episodes = await self._episodes_changed(
+                        canonical_id, stored
+                    )
+                if not changed:
+                    logger.info(f"条目 {subject_id} 未变化 (304)")
+                    return Success(None)
+                wrapped_subject = await get_subject(self.http_client, canonical_id)
         match wrapped_subject:
             case Failure(e):
                 return Failure(e)
+            case Success(None):
+                return Failure(ValueError(f"条目 {subject_id} 返回了空响应"))
             case Success(_subject):
                 subject: BGMTVSubject = _subject
 
+        if subject.id != subject_id:
+            self._record_subject_alias(subject_id, subject.id)
+        # 已保存的剧集都已冻结，但条目的集数更多（如第二部分开播）或未知时仍需请求
+        if finished and not (subject.eps and subject.eps <= len(stored)):
+            finished = False
+
         grid, large = self._parse_image(subject)
         rank, score = self._parse_rating(subject)
         total, drop_rate = self._parse_collection(subject)
         air_weekday = self._parse_air_weekday(subject)
-        average_comment = await self._parse_average_comment(subject)
+        fetched: list[EpisodeStat] | None = None
+        stale: list[int] = []
+        # 获取失败时沿用全部已保存的剧集，成功时只沿用冻结且仍存在的部分
+        kept = stored
+        if not finished:
+            # cuz redirect, use subject.id instead of subject_id
+            match await self._sync_episodes(subject_id, subject.id, stored, episodes):
+                case Failure(e):
+                    logger.warning(f"获取 {subject.id} 集数失败: {e}")
+                    # 部分分页可能已保存校验值，下次重新获取完整的条目和剧集
+                    await discard_subject_validators(subject.id)
+                case Success((_fetched, _stale)):
+                    fetched, stale = _fetched, _stale
+                    kept = [
+                        stat
+                        for stat in stored[: self._frozen_count(stored)]
+                        if stat.id not in stale
+                    ]
+        fetched_ids = {stat.id for stat in fetched or []}
+        average_comment = self._average_comment(
+            (fetched or []) + [stat for stat in kept if stat.id not in fetched_ids]
+        )
 
         return Success(
-            DBSubject(
-                id=subject.id,
-                name=subject.name,
-                name_cn=subject.name_cn,
-                images_grid=grid,
-                images_large=large,
-                rank=rank,
-                score=score,
-                collection_total=total,
-                average_comment=average_comment,
-                drop_rate=drop_rate,
-                air_weekday=air_weekday,
-                meta_tags=subject.meta_tags,
-                updated_at=datetime.now(),
+            SubjectDetails(
+                subject=DBSubject(
+                    id=subject.id,
+                    name=subject.name,
+                    name_cn=subject.name_cn,
+                    images_grid=grid,
+                    images_large=large,
+                    rank=rank,
+                    score=score,
+                    collection_total=total,
+                    average_comment=average_comment,
+                    drop_rate=drop_rate,
+                    air_weekday=air_weekday,
+                    meta_tags=subject.meta_tags,
+                    updated_at=datetime.now(),
+                ),
+                episodes=fetched,
+                stale_episode_ids=stale,
             )
         )
 
@@ -183,16 +492,174 @@ class BGMTVClient:
 
         return Failure(Exception("Invalid airdate"))
 
-    async def get_index_subject_ids(
-        self, index_id: int
-    ) -> Result[list[int], Exception]:
-        wrapped_index = await get_index(
-            index_id=index_id, subject_type=2, limit=100, offset=0
-        )
+    async def _get_index_page(
+        self, index_id: int, limit: int, offset: int
+    ) -> Result[PagedIndexSubject, Exception]:
+        try:
+            return await get_index(
+                self.http_client,
+                index_id=index_id,
+                subject_type=2,
+                limit=limit,
+                offset=offset,
+            )
+        except (httpx.HTTPError, ValueError) as e:
+            return Failure(e)
+
+    async def iter_index_subject_ids(
+        self, index_id: int, page_size: int = 100
+    ) -> AsyncIterator[Result[list[int], Exception]]:
+        """
+        分页获取索引中的全部条目ID
+
+        先请求第一页拿到 total，再并发请求剩余页，按偏移顺序逐页产出，
+        保证条目ID的顺序与索引一致，写库时不会因顺序不同误判为变化。
+        任意一页失败时产出 Failure 并停止。
+        """
+        wrapped_index = await self._get_index_page(index_id, page_size, 0)
         match wrapped_index:
             case Failure(e):
-                return Failure(e)
+                yield Failure(e)
+                return
             case Success(_index):
                 index: PagedIndexSubject = _index
+        yield Success([subject.id for subject in index.data])
+
+        # 以服务端实际使用的 limit 作为步长，避免服务端截断 limit 时漏页
+        step = index.limit or page_size
+        tasks = [
+            asyncio.create_task(self._get_index_page(index_id, step, offset))
+            for offset in range(step, index.total, step)
+        ]
+        if tasks:
+            logger.info(
+                f"索引 {index_id} 共 {index.total} 个条目，并发获取剩余 {len(tasks)} 页"
+            )
+        try:
+            for task in tasks:
+                wrapped_page = await task
+                match wrapped_page:
+                    case Failure(e):
+                        yield Failure(e)
+                        return
+                    case Success(page):
+                        yield Success([subject.id for subject in page.data])
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_index_subject_ids(
+        self, index_id: int
+    ) -> Result[list[int], Exception]:
+        subject_ids: list[int] = []
+        async with aclosing(self.iter_index_subject_ids(index_id)) as pages:
+            async for page in pages:
+                match page:
+                    case Failure(e):
+                        return Failure(e)
+                    case Success(ids):
+                        subject_ids.extend(ids)
+        return Success(subject_ids)
+
+    async def _search_page(
+        self, request: SearchRequest, limit: int, offset: int
+    ) -> Result[AnyPagedSubject, Exception]:
+        try:
+            return await search_subjects(self.http_client, request, limit, offset)
+        except (httpx.HTTPError, ValueError) as e:
+            return Failure(e)
+
+    async def iter_search_subjects(
+        self, request: SearchRequest
+    ) -> AsyncIterator[Result[list[BGMTVSubject], Exception]]:
+        """
+        分页获取全部搜索结果
+
+        先请求第一页拿到 total，再并发请求剩余页。搜索结果只用于刷新条目，
+        不依赖顺序，因此按完成顺序逐页产出；任意一页失败时产出 Failure 并停止。
+        """
+        wrapped_page = await self._search_page(request, SEARCH_PAGE_SIZE, 0)
+        match wrapped_page:
+            case Failure(e):
+                yield Failure(e)
+                return
+            case Success(_page):
+                page: AnyPagedSubject = _page
+        yield Success(list(page.data))
+
+        step = page.limit or SEARCH_PAGE_SIZE
+        tasks = [
+            asyncio.create_task(self._search_page(request, step, offset))
+            for offset in range(step, page.total, step)
+        ]
+        try:
+            for next_page in asyncio.as_completed(tasks):
+                wrapped_page = await next_page
+                match wrapped_page:
+                    case Failure(e):
+                        yield Failure(e)
+                        return
+                    case Success(_page):
+                        yield Success(list(_page.data))
+        finally:
+            for task in tasks:
+                task.cancel()
 
-        return Success([subject.id for subject in index.data])
+    async def search_anime_by_air_date(
+        self, start: date, end: date
+    ) -> Result[dict[int, BGMTVSubject], Exception]:
+        """
+        搜索播出日期在 [start, end) 内的全部动画条目
+
+        一次请求即可拿到一页条目的评分、排名和收藏，用于批量刷新。
+        """
+        request = SearchRequest(
+            keyword="",
+            sort="rank",
+            filter=SearchFilter(
+                type=[2],
+                air_date=[f">={start.isoformat()}", f"<{end.isoformat()}"],
+            ),
+        )
+        subjects: dict[int, BGMTVSubject] = {}
+        async with aclosing(self.iter_search_subjects(request)) as pages:
+            async for wrapped_page in pages:
+                match wrapped_page:
+                    case Failure(e):
+                        return Failure(e)
+                    case Success(page):
+                        subjects.update((subject.id, subject) for subject in page)
+        logger.info(f"搜索 {start} ~ {end} 播出的动画，共 {len(subjects)} 个条目")
+        return Success(subjects)
+
+    def refresh_subject(self, existing: DBSubject, subject: BGMTVSubject) -> DBSubject:
+        """
+        用搜索结果刷新已有条目
+
+        更新评分、排名、收藏等字段；搜索结果中没有的字段以及平均评论数
+        （需要逐集统计）保留数据库中的值。
+        """
+        if subject.rating:
+            rank, score = self._parse_rating(subject)
+        else:
+            rank, score = existing.rank, existing.score
+        if subject.collection:
+            total, drop_rate = self._parse_collection(subject)
+        else:
+            total, drop_rate = existing.collection_total, existing.drop_rate
+        grid, large = self._parse_image(subject)
+        return DBSubject(
+            id=existing.id,
+            name=subject.name or existing.name,
+            name_cn=subject.name_cn or existing.name_cn,
+            images_grid=grid or existing.images_grid,
+            images_large=large or existing.images_large,
+            rank=rank,
+            score=score,
+            collection_total=total,
+            average_comment=existing.average_comment,
+            drop_rate=drop_rate,
+            air_weekday=self._parse_air_weekday(subject) or existing.air_weekday,
+            meta_tags=subject.meta_tags or existing.meta_tags,
+            updated_at=datetime.now(),
+        )
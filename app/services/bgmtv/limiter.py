@@ -0,0 +1,108 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from loguru import logger
+
+from app.config import config
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    解析 Retry-After 头部
+
+    Args:
+        value: 头部取值，可能是秒数或 HTTP 日期
+
+    Returns:
+        float | None: 需要等待的秒数，无法解析时返回 None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimiter:
+    """
+    自适应令牌桶限流器
+
+    所有 bgm.tv 请求在发出前都需要获取一个令牌。收到 429 时速率减半并按
+    Retry-After 暂停发放令牌；之后每连续成功 recovery_threshold 次，速率
+    线性回升，直到恢复为配置的上限。
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        min_rate: float,
+        recovery_threshold: int = 20,
+    ) -> None:
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.burst = burst
+        self.recovery_threshold = recovery_threshold
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._healthy_streak = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated_at)
+        self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """等待并获取一个令牌"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+    def on_throttled(self, retry_after: float | None = None) -> None:
+        """收到 429 时降低速率，并在 Retry-After 期间暂停发放令牌"""
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = 0.0
+        self._healthy_streak = 0
+        self._updated_at = time.monotonic()
+        if retry_after:
+            self._blocked_until = max(
+                self._blocked_until, self._updated_at + retry_after
+            )
+            self._updated_at = self._blocked_until
+        logger.warning(
+            f"bgm.tv 限流，速率降至 {self.rate:.2f} req/s，Retry-After: {retry_after}"
+        )
+
+    def on_success(self) -> None:
+        """请求成功时逐步恢复速率"""
+        if self.rate >= self.max_rate:
+            return
+        self._healthy_streak += 1
+        if self._healthy_streak >= self.recovery_threshold:
+            self._healthy_streak = 0
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+            logger.info(f"bgm.tv 请求恢复正常，速率升至 {self.rate:.2f} req/s")
+
+
+rate_limiter = RateLimiter(**config.get_bgmtv_rate_limit_config())
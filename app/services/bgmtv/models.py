@@ -225,3 +225,57 @@ class AddSubjectToIndexRequest(BaseModel):
     subject_id: int = Field(description="条目ID")
     sort: int = Field(description="排序")
     comment: str = Field(description="评论")
+
+
+class SlimImages(BaseModel):
+    """图片信息的精简投影"""
+
+    large: Optional[str] = Field(None, description="大图")
+    grid: Optional[str] = Field(None, description="网格图")
+
+
+class SlimSubject(BaseModel):
+    """条目信息的精简投影，只包含写库需要的字段"""
+
+    id: int = Field(description="条目ID")
+    name: Optional[str] = Field(None, description="条目名称")
+    name_cn: Optional[str] = Field(None, description="条目中文名称")
+    images: Optional[SlimImages] = Field(None, description="图片")
+    infobox: Optional[List[InfoboxItem]] = Field(None, description="信息框")
+    eps: Optional[int] = Field(None, description="集数")
+    rating: Optional[Rating] = Field(None, description="评分")
+    collection: Optional[Collection] = Field(None, description="收藏")
+    meta_tags: Optional[List[str]] = Field(None, description="元标签")
+
+
+class SlimEpisode(BaseModel):
+    """剧集信息的精简投影"""
+
+    id: int
+    sort: Optional[float] = Field(None, description="同类条目的排序和集数")
+    airdate: Optional[str] = Field(None, description="播出日期 YYYY-MM-DD 格式")
+    comment: Optional[int] = Field(None, description="评论")
+
+
+class SlimPagedEpisode(BaseModel):
+    """分页剧集数据的精简投影"""
+
+    total: int
+    limit: int
+    offset: int
+    data: List[SlimEpisode]
+
+
+class SlimPagedSubject(BaseModel):
+    """分页条目数据的精简投影"""
+
+    total: int
+    limit: int
+    offset: int
+    data: List[SlimSubject]
+
+
+# 完整模型用于调试，精简模型用于更新任务
+AnySubject = Subject | SlimSubject
+AnyPagedEpisode = PagedEpisode | SlimPagedEpisode
+AnyPagedSubject = PagedSubject | SlimPagedSubject
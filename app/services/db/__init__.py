@@ -1,8 +1,23 @@
-from .client import DBClient
-from .schemas import Index, Subject
+from .client import BulkUpsertResult, DBClient, RefreshState
+from .schemas import (
+    DeployRequest,
+    EpisodeStat,
+    Index,
+    Subject,
+    SubjectAlias,
+    SubjectRefresh,
+    UpdateRun,
+)
 
 __all__ = [
+    "BulkUpsertResult",
     "DBClient",
+    "DeployRequest",
+    "EpisodeStat",
     "Index",
+    "RefreshState",
     "Subject",
+    "SubjectAlias",
+    "SubjectRefresh",
+    "UpdateRun",
 ]
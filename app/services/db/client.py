@@ -1,20 +1,73 @@
 import asyncio
-from typing import Awaitable, Callable, Sequence, TypeVar
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Sequence,
+    TypeVar,
+)
 
 from loguru import logger
 from returns.result import Failure, Result, Success
-from sqlalchemy import Column
+from sqlalchemy import Column, Integer, cast, delete, func, or_, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.exc import (
+    DataError,
+    IntegrityError,
     OperationalError,
     PendingRollbackError,
 )
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlmodel import select
+from sqlmodel import SQLModel, col, select
 
 from app.config import config
-from app.services.db.schemas import Index, Subject
+from app.services.db.schemas import (
+    DeployRequest,
+    EpisodeStat,
+    Index,
+    Subject,
+    SubjectAlias,
+    SubjectRefresh,
+    UpdateRun,
+)
+from app.services.timing import timed
 
 T = TypeVar("T")
+M = TypeVar("M", bound=SQLModel)
+
+# 等待 advisory lock 时的轮询间隔（秒）
+LOCK_POLL_INTERVAL = 10.0
+# 未正常结束、可以继续执行的任务状态
+RESUMABLE_RUN_STATUSES = ("running", "aborted", "failed")
+# deploy_request 表中唯一一行的 id
+DEPLOY_REQUEST_ID = 1
+
+
+@dataclass
+class BulkUpsertResult:
+    """批量写入结果，按主键记录"""
+
+    changed: list[int] = field(default_factory=list)  # 新增或内容有变化
+    unchanged: list[int] = field(default_factory=list)  # 内容未变化，未改写
+    failed: list[int] = field(default_factory=list)
+
+
+@dataclass
+class RefreshState:
+    """条目上一次获取时的状态，供刷新策略判断是否需要刷新"""
+
+    checked_at: datetime
+    score: float | None = None
+    rank: int | None = None
+    collection_total: int | None = None
+    # 刷新计划，没有时为 None
+    interval_hours: float | None = None
+    next_refresh_at: datetime | None = None
 
 
 class DBClient:
@@ -25,6 +78,7 @@ class DBClient:
         self.engine = create_async_engine(db_url, echo=False, **pool_config)
         self._max_retries = 3
         self._retry_delays = [1, 2, 4]  # 指数退避延迟
+        self._batch_size = config.db_batch_size
 
     async def _get_session(self) -> AsyncSession:
         """创建新的数据库会话"""
@@ -74,10 +128,11 @@ class DBClient:
             session = None
             try:
                 session = await self._get_session()
-                result = await operation(session)
-                if session.dirty or session.new or session.deleted:
-                    await session.commit()
-                    logger.debug("数据库事务已提交")
+                with timed("db"):
+                    result = await operation(session)
+                    if session.dirty or session.new or session.deleted:
+                        await session.commit()
+                        logger.debug("数据库事务已提交")
                 return Success(result)
 
             except Exception as e:
@@ -102,6 +157,148 @@ class DBClient:
 
         return Failure(RuntimeError("未知错误"))
 
+    async def _bulk_upsert(
+        self,
+        session: AsyncSession,
+        model: type[M],
+        rows: list[M],
+        compare: list[str] | None = None,
+    ) -> tuple[list[M], list[M]]:
+        """
+        INSERT ... ON CONFLICT DO UPDATE 分批写入，每批一个 SAVEPOINT
+
+        某一批失败时回滚该批的 SAVEPOINT，再逐行写入找出出错的行，
+        其余行照常写入。调用方负责提交事务。
+
+        Args:
+            compare: 只有这些列与已有行不同时才更新，其余行保持不变
+
+        Returns:
+            (新增或更新的行, 写入失败的行)，其余的行内容未变化
+        """
+        table: Any = model.__table__  # type: ignore[attr-defined]
+        keys = [column.name for column in table.primary_key.columns]
+        # 同一条语句不能两次更新同一行，按主键去重，保留最后一个
+        unique_rows = list(
+            {tuple(getattr(row, key) for key in keys): row for row in rows}.values()
+        )
+
+        async def execute(batch: list[M]) -> list[M]:
+            stmt = insert(table).values(
+                [
+                    {column.name: getattr(row, column.name) for column in table.columns}
+                    for row in batch
+                ]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=keys,
+                set_={
+                    column.name: stmt.excluded[column.name]
+                    for column in table.columns
+                    if column.name not in keys
+                },
+                where=or_(
+                    *(
+                        table.c[name].is_distinct_from(stmt.excluded[name])
+                        for name in compare
+                    )
+                )
+                if compare
+                else None,
+            )
+            async with session.begin_nested():
+                if not compare:
+                    await session.execute(stmt)
+                    return batch
+                # 被 WHERE 跳过的行不会出现在 RETURNING 中
+                result = await session.execute(
+                    stmt.returning(*(table.c[key] for key in keys))
+                )
+                written = {tuple(row) for row in result.all()}
+            return [
+                row
+                for row in batch
+                if tuple(getattr(row, key) for key in keys) in written
+            ]
+
+        changed: list[M] = []
+        failed: list[M] = []
+        for start in range(0, len(unique_rows), self._batch_size):
+            batch = unique_rows[start : start + self._batch_size]
+            try:
+                changed.extend(await execute(batch))
+                continue
+            except (IntegrityError, DataError) as e:
+                logger.warning(f"批量写入 {table.name} 失败，逐行重试: {e}")
+            for row in batch:
+                try:
+                    changed.extend(await execute([row]))
+                except (IntegrityError, DataError) as e:
+                    logger.error(f"写入 {table.name} 失败: {row!r}: {e}")
+                    failed.append(row)
+        return changed, failed
+
+    async def _touch_subjects(
+        self, session: AsyncSession, ids: list[int], checked_at: datetime
+    ) -> None:
+        """只更新 checked_at，内容和 updated_at 保持不变"""
+        for start in range(0, len(ids), self._batch_size):
+            stmt = (
+                update(Subject)
+                .where(Column("id").in_(ids[start : start + self._batch_size]))
+                .values(checked_at=checked_at)
+            )
+            await session.execute(stmt)
+
+    @asynccontextmanager
+    async def advisory_lock(
+        self, key: int, timeout: float = 0
+    ) -> AsyncIterator[Result[bool, Exception]]:
+        """
+        尝试获取 PostgreSQL 会话级 advisory lock，锁被占用时每
+        LOCK_POLL_INTERVAL 秒重试一次，最多等待 timeout 秒（默认不等待）
+
+        锁在退出上下文时释放；持有期间占用一个连接池连接（自动提交，不会长时间
+        挂起事务），连接断开时数据库也会释放锁，不会因进程崩溃而残留。
+
+        Yields:
+            Success(True): 已获取锁; Success(False): 锁被其他会话持有
+        """
+        try:
+            connection = await self.engine.connect()
+        except Exception as e:
+            logger.error(f"获取 advisory lock {key} 的数据库连接失败: {e}")
+            yield Failure(e)
+            return
+
+        acquired = False
+        try:
+            connection = await connection.execution_options(
+                isolation_level="AUTOCOMMIT"
+            )
+            deadline = asyncio.get_running_loop().time() + timeout
+            try:
+                while True:
+                    acquired = bool(
+                        await connection.scalar(select(func.pg_try_advisory_lock(key)))
+                    )
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    if acquired or remaining <= 0:
+                        break
+                    await asyncio.sleep(min(LOCK_POLL_INTERVAL, remaining))
+            except Exception as e:
+                logger.error(f"获取 advisory lock {key} 失败: {e}")
+                yield Failure(e)
+                return
+            yield Success(acquired)
+        finally:
+            if acquired:
+                try:
+                    await connection.scalar(select(func.pg_advisory_unlock(key)))
+                except Exception as e:
+                    logger.warning(f"释放 advisory lock {key} 失败: {e}")
+            await connection.close()
+
     async def close(self) -> None:
         """关闭数据库引擎"""
         await self.engine.dispose()
@@ -165,14 +362,32 @@ class DBClient:
 
         return await self._execute_with_retry(operation)
 
-    async def upsert_index(
-        self, season_id: int, index_id: int, subject_ids: list[int]
-    ) -> Result[None, Exception]:
-        async def operation(session: AsyncSession) -> None:
-            index = Index(
-                season_id=season_id, index_id=index_id, subject_ids=subject_ids
+    async def bulk_upsert_indices(
+        self, indices: list[Index]
+    ) -> Result[BulkUpsertResult, Exception]:
+        """
+        在一个事务内分批写入多个季度的索引
+
+        条目列表与数据库中相同的索引不改写。
+
+        Returns:
+            按季度ID记录的写入结果
+        """
+
+        async def operation(session: AsyncSession) -> BulkUpsertResult:
+            changed, failed = await self._bulk_upsert(
+                session, Index, indices, compare=["subject_ids"]
+            )
+            changed_ids = {index.season_id for index in changed}
+            failed_ids = {index.season_id for index in failed}
+            await session.commit()
+            return BulkUpsertResult(
+                changed=list(changed_ids),
+                unchanged=list(
+                    {index.season_id for index in indices} - changed_ids - failed_ids
+                ),
+                failed=list(failed_ids),
             )
-            await session.merge(index)
 
         return await self._execute_with_retry(operation)
 
@@ -186,8 +401,494 @@ class DBClient:
 
         return await self._execute_with_retry(operation)
 
-    async def upsert_subject(self, subject: Subject) -> Result[None, Exception]:
+    async def get_refresh_states(
+        self, ids: Iterable[int] | None = None
+    ) -> Result[dict[int, RefreshState], Exception]:
+        """
+        一次查询获取多个条目的刷新状态
+
+        内容未变化的条目只更新 checked_at，因此检查时间优先取 checked_at，
+        旧数据没有 checked_at 时取 updated_at。
+
+        Args:
+            ids: 条目ID，为 None 时查询所有索引中的条目
+
+        Returns:
+            {条目ID: 刷新状态}，数据库中没有的条目不在结果中
+        """
+
+        # 在重试之前取出 ids，传入的迭代器只能消费一次
+        if ids is None:
+            indexed_ids = select(func.unnest(Index.subject_ids))
+            condition = col(Subject.id).in_(indexed_ids)
+        else:
+            condition = col(Subject.id).in_(list(ids))
+
+        async def operation(session: AsyncSession) -> dict[int, RefreshState]:
+            stmt = (
+                select(
+                    Subject.id,
+                    func.coalesce(Subject.checked_at, Subject.updated_at),
+                    Subject.score,
+                    Subject.rank,
+                    Subject.collection_total,
+                    SubjectRefresh.interval_hours,
+                    SubjectRefresh.next_refresh_at,
+                )
+                .outerjoin(SubjectRefresh, SubjectRefresh.id == Subject.id)
+                .where(condition)
+            )
+            result = await session.execute(stmt)
+            return {id: RefreshState(*state) for id, *state in result.all()}
+
+        return await self._execute_with_retry(operation)
+
+    async def bulk_upsert_subjects(
+        self, subjects: list[Subject]
+    ) -> Result[BulkUpsertResult, Exception]:
+        """
+        在一个事务内分批写入多个条目
+
+        按内容指纹比较，内容未变化的条目不改写，只更新 checked_at，
+        updated_at 保留为内容最近一次变化的时间。
+
+        Returns:
+            按条目ID记录的写入结果，Failure 表示整个事务失败
+        """
+
+        async def operation(session: AsyncSession) -> BulkUpsertResult:
+            checked_at = datetime.now()
+            for subject in subjects:
+                subject.fingerprint = subject.content_fingerprint()
+                subject.checked_at = subject.checked_at or checked_at
+            changed, failed = await self._bulk_upsert(
+                session, Subject, subjects, compare=["fingerprint"]
+            )
+            changed_ids = {subject.id for subject in changed}
+            failed_ids = {subject.id for subject in failed}
+            unchanged_ids = list(
+                {subject.id for subject in subjects} - changed_ids - failed_ids
+            )
+            await self._touch_subjects(session, unchanged_ids, checked_at)
+            await session.commit()
+            return BulkUpsertResult(
+                changed=list(changed_ids),
+                unchanged=unchanged_ids,
+                failed=list(failed_ids),
+            )
+
+        return await self._execute_with_retry(operation)
+
+    async def touch_subjects(self, ids: list[int]) -> Result[None, Exception]:
+        """记录条目已检查且内容未变化（如 bgm.tv 返回 304），只更新 checked_at"""
+
+        async def operation(session: AsyncSession) -> None:
+            await self._touch_subjects(session, ids, datetime.now())
+            await session.commit()
+
+        return await self._execute_with_retry(operation)
+
+    async def bulk_upsert_refresh(
+        self, rows: list[SubjectRefresh]
+    ) -> Result[None, Exception]:
+        """批量保存条目的刷新计划"""
+
+        async def operation(session: AsyncSession) -> None:
+            _, failed = await self._bulk_upsert(session, SubjectRefresh, rows)
+            if failed:
+                logger.warning(f"保存 {len(failed)} 个条目的刷新计划失败")
+            await session.commit()
+
+        return await self._execute_with_retry(operation)
+
+    async def get_episode_stats(
+        self, subject_ids: Iterable[int]
+    ) -> Result[dict[int, list[EpisodeStat]], Exception]:
+        """
+        一次查询获取多个条目已保存的剧集统计
+
+        Returns:
+            {条目ID: 按 sort 排序的剧集统计}，没有保存过的条目不在结果中
+        """
+
+        # 在重试之前取出 subject_ids，传入的迭代器只能消费一次
+        ids = list(subject_ids)
+
+        async def operation(session: AsyncSession) -> dict[int, list[EpisodeStat]]:
+            stmt = (
+                select(EpisodeStat)
+                .where(col(EpisodeStat.subject_id).in_(ids))
+                .order_by(col(EpisodeStat.subject_id), col(EpisodeStat.sort))
+            )
+            result = await session.execute(stmt)
+            stats: dict[int, list[EpisodeStat]] = {}
+            for stat in result.scalars().all():
+                stats.setdefault(stat.subject_id, []).append(stat)
+            return stats
+
+        return await self._execute_with_retry(operation)
+
+    async def bulk_upsert_episode_stats(
+        self, rows: list[EpisodeStat]
+    ) -> Result[None, Exception]:
+        """批量保存剧集统计，播出日期和评论数未变化的剧集不改写"""
+
+        async def operation(session: AsyncSession) -> None:
+            _, failed = await self._bulk_upsert(
+                session, EpisodeStat, rows, compare=["sort", "airdate", "comment"]
+            )
+            if failed:
+                logger.warning(f"保存 {len(failed)} 个剧集统计失败")
+            await session.commit()
+
+        return await self._execute_with_retry(operation)
+
+    async def delete_episode_stats(
+        self, episodes: list[tuple[int, int]]
+    ) -> Result[None, Exception]:
+        """删除 bgm.tv 上已不存在的剧集统计，episodes 为 (条目ID, 剧集ID)"""
+
+        async def operation(session: AsyncSession) -> None:
+            for start in range(0, len(episodes), self._batch_size):
+                stmt = delete(EpisodeStat).where(
+                    tuple_(col(EpisodeStat.subject_id), col(EpisodeStat.id)).in_(
+                        episodes[start : start + self._batch_size]
+                    )
+                )
+                await session.execute(stmt)
+            await session.commit()
+
+        return await self._execute_with_retry(operation)
+
+    async def get_subject_aliases(self) -> Result[dict[int, int], Exception]:
+        async def operation(session: AsyncSession) -> dict[int, int]:
+            stmt = select(SubjectAlias.id, SubjectAlias.canonical_id)
+            result = await session.execute(stmt)
+            return {id: canonical_id for id, canonical_id in result.all()}
+
+        return await self._execute_with_retry(operation)
+
+    async def upsert_subject_aliases(
+        self, aliases: dict[int, int]
+    ) -> Result[None, Exception]:
         async def operation(session: AsyncSession) -> None:
-            await session.merge(subject)
+            now = datetime.now()
+            for id, canonical_id in aliases.items():
+                alias = SubjectAlias(id=id, canonical_id=canonical_id, updated_at=now)
+                await session.merge(alias)
+
+        return await self._execute_with_retry(operation)
+
+    async def request_deploy(self, reason: str) -> Result[datetime, Exception]:
+        """记录一次部署请求，返回当前等待窗口开始的时间"""
+
+        async def operation(session: AsyncSession) -> datetime:
+            stmt = insert(DeployRequest).values(
+                id=DEPLOY_REQUEST_ID, requested_at=datetime.now(), reasons=[reason]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["id"],
+                set_={
+                    "requested_at": func.coalesce(
+                        col(DeployRequest.requested_at), stmt.excluded.requested_at
+                    ),
+                    "reasons": func.array_cat(
+                        col(DeployRequest.reasons), stmt.excluded.reasons
+                    ),
+                },
+            ).returning(col(DeployRequest.requested_at))
+            result = await session.execute(stmt)
+            requested_at = result.scalar_one()
+            await session.commit()
+            return requested_at
+
+        return await self._execute_with_retry(operation)
+
+    async def get_deploy_request(self) -> Result[datetime | None, Exception]:
+        """当前等待窗口开始的时间，没有等待中的部署请求时为 None"""
+
+        async def operation(session: AsyncSession) -> datetime | None:
+            stmt = select(DeployRequest.requested_at).where(
+                DeployRequest.id == DEPLOY_REQUEST_ID
+            )
+            result = await session.execute(stmt)
+            return result.scalars().first()
+
+        return await self._execute_with_retry(operation)
+
+    async def claim_deploy(
+        self, requested_before: datetime | None = None
+    ) -> Result[list[str] | None, Exception]:
+        """
+        领取 requested_before 之前开始等待的部署请求并清空等待窗口
+
+        多个进程同时领取时只有一个能领到，其余返回 None。
+
+        Args:
+            requested_before: None 表示领取所有等待中的请求
+
+        Returns:
+            合并的请求原因，没有可领取的请求时为 None
+        """
+
+        async def operation(session: AsyncSession) -> list[str] | None:
+            stmt = (
+                select(DeployRequest)
+                .where(
+                    DeployRequest.id == DEPLOY_REQUEST_ID,
+                    col(DeployRequest.requested_at).is_not(None),
+                )
+                .with_for_update()
+            )
+            if requested_before is not None:
+                stmt = stmt.where(col(DeployRequest.requested_at) <= requested_before)
+            result = await session.execute(stmt)
+            request = result.scalars().first()
+            if request is None:
+                return None
+            reasons = list(request.reasons)
+            request.requested_at = None
+            request.reasons = []
+            request.fired_at = datetime.now()
+            await session.commit()
+            return reasons
+
+        return await self._execute_with_retry(operation)
+
+    async def create_run(
+        self,
+        job_id: str,
+        name: str,
+        scope: str,
+        fast_refresh: bool = False,
+        queued: bool = False,
+    ) -> Result[UpdateRun, Exception]:
+        """
+        登记一次更新任务，工作集在任务开始执行时由 plan_run 写入
+
+        Args:
+            queued: 任务交给 worker 执行，由 claim_queued_run 领取
+        """
+
+        async def operation(session: AsyncSession) -> UpdateRun:
+            now = datetime.now()
+            run = UpdateRun(
+                job_id=job_id,
+                name=name,
+                scope=scope,
+                seasons={},
+                completed=[],
+                status="pending",
+                fast_refresh=fast_refresh,
+                created_at=now,
+                claimed_at=None if queued else now,
+                updated_at=now,
+            )
+            session.add(run)
+            await session.commit()
+            await session.refresh(run)
+            return run
+
+        return await self._execute_with_retry(operation)
+
+    async def claim_queued_run(self) -> Result[UpdateRun | None, Exception]:
+        """领取最早登记、尚未被领取的 worker 任务，多个 worker 不会领到同一个任务"""
+
+        async def operation(session: AsyncSession) -> UpdateRun | None:
+            stmt = (
+                select(UpdateRun)
+                .where(
+                    UpdateRun.status == "pending",
+                    col(UpdateRun.claimed_at).is_(None),
+                    col(UpdateRun.job_id).is_not(None),
+                )
+                .order_by(col(UpdateRun.created_at))
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            result = await session.execute(stmt)
+            run = result.scalars().first()
+            if run is None:
+                return None
+            run.claimed_at = run.updated_at = datetime.now()
+            await session.commit()
+            await session.refresh(run)
+            return run
+
+        return await self._execute_with_retry(operation)
+
+    async def find_queued_run(
+        self, scope: str, since: datetime
+    ) -> Result[UpdateRun | None, Exception]:
+        """获取 since 之后登记、范围包含 scope 且尚未被 worker 领取的任务"""
+
+        async def operation(session: AsyncSession) -> UpdateRun | None:
+            stmt = (
+                select(UpdateRun)
+                .where(
+                    UpdateRun.status == "pending",
+                    col(UpdateRun.claimed_at).is_(None),
+                    col(UpdateRun.scope).in_((scope, "all")),
+                    col(UpdateRun.job_id).is_not(None),
+                    col(UpdateRun.created_at) >= since,
+                )
+                .order_by(col(UpdateRun.created_at))
+                .limit(1)
+            )
+            result = await session.execute(stmt)
+            return result.scalars().first()
+
+        return await self._execute_with_retry(operation)
+
+    async def get_run(self, job_id: str) -> Result[UpdateRun | None, Exception]:
+        async def operation(session: AsyncSession) -> UpdateRun | None:
+            stmt = select(UpdateRun).where(UpdateRun.job_id == job_id)
+            result = await session.execute(stmt)
+            return result.scalars().first()
+
+        return await self._execute_with_retry(operation)
+
+    async def list_runs(self, limit: int) -> Result[list[UpdateRun], Exception]:
+        """最近登记的更新任务，按创建时间倒序"""
+
+        async def operation(session: AsyncSession) -> list[UpdateRun]:
+            stmt = (
+                select(UpdateRun)
+                .where(col(UpdateRun.job_id).is_not(None))
+                .order_by(col(UpdateRun.created_at).desc())
+                .limit(limit)
+            )
+            result = await session.execute(stmt)
+            return list(result.scalars().all())
+
+        return await self._execute_with_retry(operation)
+
+    async def get_resumable_run(
+        self, scope: str, since: datetime, exclude_id: int | None = None
+    ) -> Result[UpdateRun | None, Exception]:
+        """
+        获取 since 之后开始、未正常结束的最近一次同范围任务
+
+        同一范围的任务由 advisory lock 保证同时只有一个在执行，调用方持有锁时
+        其余 running 状态的任务都是被中断的任务。
+        """
+
+        async def operation(session: AsyncSession) -> UpdateRun | None:
+            stmt = (
+                select(UpdateRun)
+                .where(
+                    UpdateRun.scope == scope,
+                    col(UpdateRun.status).in_(RESUMABLE_RUN_STATUSES),
+                    col(UpdateRun.started_at) >= since,
+                    col(UpdateRun.id) != exclude_id,
+                )
+                .order_by(col(UpdateRun.started_at).desc())
+                .limit(1)
+            )
+            result = await session.execute(stmt)
+            return result.scalars().first()
+
+        return await self._execute_with_retry(operation)
+
+    async def get_running_run(
+        self, scope: str, exclude_id: int | None = None
+    ) -> Result[UpdateRun | None, Exception]:
+        """
+        获取同一范围最近有进展的、已开始处理但未结束的任务
+
+        调用方未能获取该范围的 advisory lock 时，持有锁的任务就在其中。
+        """
+
+        async def operation(session: AsyncSession) -> UpdateRun | None:
+            stmt = (
+                select(UpdateRun)
+                .where(
+                    UpdateRun.scope == scope,
+                    col(UpdateRun.status).in_(("pending", "running")),
+                    col(UpdateRun.claimed_at).is_not(None),
+                    col(UpdateRun.job_id).is_not(None),
+                    col(UpdateRun.id) != exclude_id,
+                )
+                .order_by(col(UpdateRun.updated_at).desc())
+                .limit(1)
+            )
+            result = await session.execute(stmt)
+            return result.scalars().first()
+
+        return await self._execute_with_retry(operation)
+
+    async def plan_run(
+        self,
+        run_id: int,
+        seasons: dict[int, list[int]],
+        completed: list[int],
+        resumed_from: int | None = None,
+    ) -> Result[None, Exception]:
+        """
+        写入任务计划的工作集
+
+        Args:
+            resumed_from: 沿用的中断任务，标记为 resumed，之后不再被继续执行
+        """
+
+        async def operation(session: AsyncSession) -> None:
+            now = datetime.now()
+            await session.execute(
+                update(UpdateRun)
+                .where(col(UpdateRun.id) == run_id)
+                .values(
+                    seasons={
+                        str(season_id): subject_ids
+                        for season_id, subject_ids in seasons.items()
+                    },
+                    completed=completed,
+                    updated_at=now,
+                )
+            )
+            if resumed_from is not None:
+                await session.execute(
+                    update(UpdateRun)
+                    .where(col(UpdateRun.id) == resumed_from)
+                    .values(status="resumed", updated_at=now)
+                )
+            await session.commit()
+
+        return await self._execute_with_retry(operation)
+
+    async def add_run_progress(
+        self, run_id: int, subject_ids: list[int], state: dict[str, Any] | None = None
+    ) -> Result[None, Exception]:
+        """把已完成的条目追加到任务检查点，同时保存任务状态 state"""
+
+        async def operation(session: AsyncSession) -> None:
+            stmt = (
+                update(UpdateRun)
+                .where(Column("id") == run_id)
+                .values(
+                    completed=func.array_cat(
+                        Column("completed"), cast(subject_ids, ARRAY(Integer))
+                    ),
+                    updated_at=datetime.now(),
+                    **(state or {}),
+                )
+            )
+            await session.execute(stmt)
+            await session.commit()
+
+        return await self._execute_with_retry(operation)
+
+    async def save_run_state(
+        self, run_id: int, state: dict[str, Any]
+    ) -> Result[None, Exception]:
+        """保存任务的状态和进度"""
+
+        async def operation(session: AsyncSession) -> None:
+            stmt = (
+                update(UpdateRun)
+                .where(Column("id") == run_id)
+                .values(updated_at=datetime.now(), **state)
+            )
+            await session.execute(stmt)
+            await session.commit()
 
         return await self._execute_with_retry(operation)
@@ -1,11 +1,29 @@
-from datetime import datetime
-from typing import List, Optional
+import hashlib
+import json
+from datetime import date, datetime
+from typing import Dict, List, Optional
 
 from sqlalchemy import Column, Integer, String
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlmodel import Field, SQLModel
 
 
+# 参与内容指纹计算的字段
+FINGERPRINT_FIELDS = {
+    "name",
+    "name_cn",
+    "images_grid",
+    "images_large",
+    "rank",
+    "score",
+    "collection_total",
+    "average_comment",
+    "drop_rate",
+    "air_weekday",
+    "meta_tags",
+}
+
+
 class Index(SQLModel, table=True):
     season_id: int = Field(primary_key=True)
     index_id: int = Field(primary_key=True)
@@ -33,6 +51,140 @@ class Subject(SQLModel, table=True):
         default=None, sa_column=Column(ARRAY(String))
     )
     updated_at: datetime = Field(nullable=False)
+    # 内容指纹和最近一次检查时间，只供更新任务使用，不在 API 中返回
+    fingerprint: Optional[str] = Field(default=None, exclude=True)
+    checked_at: Optional[datetime] = Field(default=None, exclude=True)
+
+    def content_fingerprint(self) -> str:
+        """展示内容的指纹，内容不变时指纹不变"""
+        content = self.model_dump(include=FINGERPRINT_FIELDS)
+        encoded = json.dumps(content, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(encoded.encode()).hexdigest()
+
+    def __repr__(self) -> str:
+        return f"Subject(id={self.id}, name={self.name}, name_cn={self.name_cn}, images_grid={self.images_grid}, images_large={self.images_large}, rank={self.rank}, score={self.score}, collection_total={self.collection_total}, average_comment={self.average_comment}, drop_rate={self.drop_rate}, air_weekday={self.air_weekday}, meta_tags={self.meta_tags}, updated_at={self.updated_at}, checked_at={self.checked_at})"
+
+
+class EpisodeStat(SQLModel, table=True):
+    """本篇剧集的播出日期和评论数，用于计算条目的平均评论数"""
+
+    __tablename__ = "episode_stat"
+
+    # 与 Subject 一致，使用请求的条目ID（重定向前）
+    subject_id: int = Field(primary_key=True)
+    id: int = Field(primary_key=True)
+    sort: Optional[float] = None
+    airdate: Optional[date] = None
+    comment: int = Field(default=0, nullable=False)
+    updated_at: datetime = Field(nullable=False)
+
+    def __repr__(self) -> str:
+        return f"EpisodeStat(subject_id={self.subject_id}, id={self.id}, sort={self.sort}, airdate={self.airdate}, comment={self.comment}, updated_at={self.updated_at})"
+
+
+class SubjectAlias(SQLModel, table=True):
+    """bgm.tv 条目合并后的重定向映射: 请求的条目ID -> 实际条目ID"""
+
+    __tablename__ = "subject_alias"
+
+    id: int = Field(primary_key=True)
+    canonical_id: int = Field(nullable=False)
+    updated_at: datetime = Field(nullable=False)
+
+    def __repr__(self) -> str:
+        return f"SubjectAlias(id={self.id}, canonical_id={self.canonical_id}, updated_at={self.updated_at})"
+
+
+class DeployRequest(SQLModel, table=True):
+    """
+    等待触发的部署请求，只有 id=1 一行
+
+    各进程（API 进程、worker）的部署请求合并到同一个等待窗口，窗口到期后
+    领取到请求的进程触发一次部署。
+    """
+
+    __tablename__ = "deploy_request"
+
+    id: int = Field(primary_key=True)
+    # 当前等待窗口中第一次请求的时间，没有等待中的请求时为 None
+    requested_at: Optional[datetime] = Field(default=None)
+    reasons: List[str] = Field(
+        default_factory=list,
+        sa_column=Column(ARRAY(String), nullable=False, server_default="{}"),
+    )
+    fired_at: Optional[datetime] = Field(default=None)
+
+    def __repr__(self) -> str:
+        return f"DeployRequest(requested_at={self.requested_at}, reasons={len(self.reasons)}, fired_at={self.fired_at})"
+
+
+class SubjectRefresh(SQLModel, table=True):
+    """条目的刷新计划，由刷新策略在每次获取条目后计算"""
+
+    __tablename__ = "subject_refresh"
+
+    id: int = Field(primary_key=True)
+    # 当前的刷新间隔（小时）
+    interval_hours: float = Field(nullable=False)
+    next_refresh_at: datetime = Field(nullable=False, index=True)
+    # 计算该计划的策略名称
+    policy: str = Field(nullable=False)
+    updated_at: datetime = Field(nullable=False)
+
+    def __repr__(self) -> str:
+        return f"SubjectRefresh(id={self.id}, interval_hours={self.interval_hours}, next_refresh_at={self.next_refresh_at}, policy={self.policy}, updated_at={self.updated_at})"
+
+
+class UpdateRun(SQLModel, table=True):
+    """
+    更新任务的状态、进度和检查点
+
+    每次登记的更新任务对应一行，各进程都从这里查询任务进度；进程重启后
+    同一范围的任务沿用中断任务计划的工作集，从中断处继续。
+    """
+
+    __tablename__ = "update_run"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # 对外的任务ID
+    job_id: Optional[str] = Field(default=None, unique=True, index=True)
+    name: Optional[str] = Field(default=None)
+    # 更新范围: "all" 或逗号分隔的季度ID
+    scope: str = Field(nullable=False, index=True)
+    # 计划的工作集: {季度ID: 条目ID}，JSON 的键为字符串
+    seasons: Dict[str, List[int]] = Field(
+        default_factory=dict, sa_column=Column(JSONB, nullable=False)
+    )
+    # 已完成的条目ID
+    completed: List[int] = Field(
+        default_factory=list,
+        sa_column=Column(ARRAY(Integer), nullable=False, server_default="{}"),
+    )
+    # pending / running / completed / aborted / skipped / failed，
+    # 以及 resumed（工作集已由后续任务接手）
+    status: str = Field(nullable=False)
+    error: Optional[str] = Field(default=None)
+    # 未能获取范围锁时合并到的任务 job_id，此时 status 为 skipped
+    merged_into: Optional[str] = Field(default=None)
+    fast_refresh: bool = Field(
+        default=False, sa_column_kwargs={"server_default": "false"}
+    )
+    created_at: datetime = Field(nullable=False)
+    # 开始处理该任务的时间；API 进程交给 worker 执行的任务在 worker 领取前为 None
+    claimed_at: Optional[datetime] = Field(default=None)
+    started_at: Optional[datetime] = Field(default=None)
+    finished_at: Optional[datetime] = Field(default=None)
+    updated_at: datetime = Field(nullable=False)
+    # 计划处理的条目数，以及其中已写入/跳过/失败/有变化的条目数
+    planned: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    done: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    skipped: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    failed: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    changed: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    bgmtv_requests: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    bgmtv_seconds: float = Field(default=0.0, sa_column_kwargs={"server_default": "0"})
+    db_calls: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    db_seconds: float = Field(default=0.0, sa_column_kwargs={"server_default": "0"})
 
     def __repr__(self) -> str:
-        return f"Subject(id={self.id}, name={self.name}, name_cn={self.name_cn}, images_grid={self.images_grid}, images_large={self.images_large}, rank={self.rank}, score={self.score}, collection_total={self.collection_total}, average_comment={self.average_comment}, drop_rate={self.drop_rate}, air_weekday={self.air_weekday}, meta_tags={self.meta_tags}, updated_at={self.updated_at})"
+        return f"UpdateRun(id={self.id}, job_id={self.job_id}, scope={self.scope}, status={self.status}, completed={len(self.completed)}, started_at={self.started_at}, updated_at={self.updated_at})"
@@ -0,0 +1,53 @@
+"""
+按任务统计 bgm.tv 请求和数据库操作的次数与耗时
+
+更新任务开始时用 collect_timings() 绑定一个 Timings，同一上下文（包括其中
+创建的子任务）里的 bgm.tv 请求和数据库操作都计入其中；没有绑定时不统计。
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Literal
+
+
+@dataclass
+class Timings:
+    bgmtv_requests: int = 0
+    bgmtv_seconds: float = 0.0
+    db_calls: int = 0
+    db_seconds: float = 0.0
+
+
+_current_timings: ContextVar[Timings | None] = ContextVar(
+    "current_timings", default=None
+)
+
+
+@contextmanager
+def collect_timings(timings: Timings) -> Iterator[Timings]:
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextmanager
+def timed(kind: Literal["bgmtv", "db"]) -> Iterator[None]:
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if kind == "bgmtv":
+            timings.bgmtv_requests += 1
+            timings.bgmtv_seconds += elapsed
+        else:
+            timings.db_calls += 1
+            timings.db_seconds += elapsed
@@ -0,0 +1,56 @@
+"""
+独立的更新 worker，负责定时更新任务和 API 登记的手动更新任务
+
+与 API 进程只通过数据库协作：API 进程设置 APP_SCHEDULER_ENABLED=false，
+POST /update/subjects 只在 update_run 中登记任务，由 worker 每隔
+UPDATE_POLL_INTERVAL 秒领取执行，更新任务不占用提供查询的事件循环。
+
+用法:
+    python -m app.worker
+"""
+
+import asyncio
+import signal
+
+from loguru import logger
+
+from app.api.v0.utils import deploy_hooks
+from app.config import config
+from app.log import setup_logging
+from app.scheduler import create_scheduler, run_queued_updates, shutdown_scheduler
+from app.services import BGMTVClient, DBClient
+from app.services.bgmtv import create_http_client
+
+
+async def main() -> None:
+    setup_logging("worker.log")
+
+    db_client = DBClient(config.db_url)
+    bgmtv_client = BGMTVClient(create_http_client())
+    scheduler = create_scheduler(bgmtv_client, db_client)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info("Worker starting up...")
+    scheduler.start()
+    logger.info("调度器已启动，按季度分档执行更新任务")
+    queue = asyncio.create_task(run_queued_updates(bgmtv_client, db_client, stop))
+
+    await stop.wait()
+
+    logger.info("Worker shutting down...")
+    await shutdown_scheduler(scheduler)
+    # 领取循环空闲等待或刚领取任务时直接取消，执行中的任务已由上面等待或取消
+    queue.cancel()
+    await asyncio.gather(queue, return_exceptions=True)
+    await deploy_hooks.flush(db_client)
+    await bgmtv_client.close()
+    await db_client.close()
+    await logger.complete()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+"""
+bgm.tv 响应解析微基准
+
+对比旧的解析路径 (response.json() + 完整 pydantic 模型) 与精简解析路径
+(model_validate_json + 精简模型) 的 CPU 耗时。
+
+用法:
+    python -m benchmarks.bench_decode
+    python -m benchmarks.bench_decode --dir data/bgmtv_cache --subjects 3000
+
+--dir 可指向 benchmarks/fixtures 或磁盘缓存目录 (data/bgmtv_cache)，
+会递归读取其中的所有响应体。
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import Callable
+
+from app.services.bgmtv.api import decode_episodes, decode_subject
+from app.services.bgmtv.models import PagedEpisode, Subject
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def load_payloads(directory: str) -> tuple[list[bytes], list[bytes]]:
+    """读取目录下的条目与剧集响应体，兼容磁盘缓存的元数据首行"""
+    subjects: list[bytes] = []
+    episodes: list[bytes] = []
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.endswith(".tmp"):
+                continue
+            with open(os.path.join(root, name), "rb") as f:
+                content = f.read()
+            first_line, _, rest = content.partition(b"\n")
+            if rest and b'"stored_at"' in first_line:
+                content = rest
+            try:
+                data = json.loads(content)
+            except ValueError:
+                continue
+            if not isinstance(data, dict):
+                continue
+            items = data.get("data")
+            if isinstance(items, list) and items and "airdate" in items[0]:
+                episodes.append(content)
+            elif "rating" in data and "type" in data:
+                subjects.append(content)
+    return subjects, episodes
+
+
+def measure(
+    func: Callable[[bytes], object], payloads: list[bytes], rounds: int
+) -> float:
+    """返回每个响应体的平均耗时（微秒）"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for payload in payloads:
+            func(payload)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(payloads)) * 1e6
+
+
+def report(
+    name: str,
+    payloads: list[bytes],
+    full: Callable[[bytes], object],
+    slim: Callable[[bytes], object],
+    rounds: int,
+) -> tuple[float, float]:
+    if not payloads:
+        print(f"{name}: 没有可用的响应体")
+        return 0.0, 0.0
+    full_us = measure(full, payloads, rounds)
+    slim_us = measure(slim, payloads, rounds)
+    saved = (1 - slim_us / full_us) * 100 if full_us else 0.0
+    print(
+        f"{name}: {len(payloads)} 个响应体, 完整模型 {full_us:.1f} µs, "
+        f"精简模型 {slim_us:.1f} µs, 节省 {saved:.1f}%"
+    )
+    return full_us, slim_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dir", default=FIXTURES_DIR, help="响应体所在目录")
+    parser.add_argument("--rounds", type=int, default=2000, help="每个响应体的重复次数")
+    parser.add_argument(
+        "--subjects", type=int, default=3000, help="估算一次全量更新的条目数"
+    )
+    args = parser.parse_args()
+
+    subjects, episodes = load_payloads(args.dir)
+    subject_full, subject_slim = report(
+        "条目",
+        subjects,
+        lambda content: Subject(**json.loads(content)),
+        lambda content: decode_subject(content, full=False),
+        args.rounds,
+    )
+    episode_full, episode_slim = report(
+        "剧集",
+        episodes,
+        lambda content: PagedEpisode(**json.loads(content)),
+        lambda content: decode_episodes(content, full=False),
+        args.rounds,
+    )
+
+    per_subject_saved = (subject_full - subject_slim) + (episode_full - episode_slim)
+    print(f"每个条目节省 {per_subject_saved:.1f} µs (条目 + 一页剧集)")
+    print(
+        f"一次全量更新 ({args.subjects} 个条目) 约节省 "
+        f"{per_subject_saved * args.subjects / 1e6:.3f} s CPU"
+    )
+
+
+if __name__ == "__main__":
+    main()
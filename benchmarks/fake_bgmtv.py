@@ -0,0 +1,308 @@
+"""
+本地 bgm.tv 替身服务，用于离线基准测试
+
+回放 benchmarks/fixtures 中录制的响应，并可模拟延迟、错误、302 重定向和 429。
+搜索接口只在录制的条目中按类型和播出日期筛选。
+
+用法:
+    uvicorn benchmarks.fake_bgmtv:app --port 9000
+    BGMTV_BASE_URL=http://localhost:9000 fastapi run app/main.py
+
+环境变量:
+    FAKE_BGMTV_FIXTURES      录制响应目录，默认 benchmarks/fixtures
+    FAKE_BGMTV_LATENCY       每个请求的平均延迟（秒），默认 0.05
+    FAKE_BGMTV_JITTER        延迟抖动（秒），默认 0.02
+    FAKE_BGMTV_ERROR_RATE    返回 503 的概率，默认 0
+    FAKE_BGMTV_THROTTLE_RATE 返回 429 的概率，默认 0
+    FAKE_BGMTV_RETRY_AFTER   429 响应的 Retry-After（秒），默认 1
+    FAKE_BGMTV_REDIRECTS     条目重定向，如 "1001:1002,1003:1004"
+    FAKE_BGMTV_SYNTHESIZE    缺少录制响应时用已有条目为模板合成，默认 true
+    FAKE_BGMTV_INDEX_SIZE    合成索引的条目数，默认 60
+    FAKE_BGMTV_MAX_LIMIT     单页最多返回的条数，超出时截断 limit，默认 100
+    FAKE_BGMTV_RECORD        上游地址（如 https://api.bgm.tv），缺少录制响应时
+                             请求上游并保存到 FAKE_BGMTV_FIXTURES
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+from collections import Counter
+from typing import Any
+
+import httpx
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+from app.services.bgmtv.api import DEFAULT_USER_AGENT
+
+FIXTURES_DIR = os.getenv(
+    "FAKE_BGMTV_FIXTURES", os.path.join(os.path.dirname(__file__), "fixtures")
+)
+LATENCY = float(os.getenv("FAKE_BGMTV_LATENCY", "0.05"))
+JITTER = float(os.getenv("FAKE_BGMTV_JITTER", "0.02"))
+ERROR_RATE = float(os.getenv("FAKE_BGMTV_ERROR_RATE", "0"))
+THROTTLE_RATE = float(os.getenv("FAKE_BGMTV_THROTTLE_RATE", "0"))
+RETRY_AFTER = os.getenv("FAKE_BGMTV_RETRY_AFTER", "1")
+SYNTHESIZE = os.getenv("FAKE_BGMTV_SYNTHESIZE", "true").lower() == "true"
+INDEX_SIZE = int(os.getenv("FAKE_BGMTV_INDEX_SIZE", "60"))
+MAX_LIMIT = int(os.getenv("FAKE_BGMTV_MAX_LIMIT", "100"))
+RECORD_UPSTREAM = os.getenv("FAKE_BGMTV_RECORD")
+REDIRECTS = {
+    int(source): int(target)
+    for source, target in (
+        pair.split(":")
+        for pair in os.getenv("FAKE_BGMTV_REDIRECTS", "").split(",")
+        if pair
+    )
+}
+
+app = FastAPI(docs_url=None, redoc_url=None)
+stats: Counter[str] = Counter()
+
+
+def _fixture_path(kind: str, id: int) -> str:
+    return os.path.join(FIXTURES_DIR, kind, f"{id}.json")
+
+
+def _load_fixture(kind: str, id: int) -> Any | None:
+    try:
+        with open(_fixture_path(kind, id), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_fixture(kind: str, id: int, data: Any) -> None:
+    path = _fixture_path(kind, id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def _template(kind: str) -> Any | None:
+    directory = os.path.join(FIXTURES_DIR, kind)
+    if not os.path.isdir(directory):
+        return None
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".json"):
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                return json.load(f)
+    return None
+
+
+async def _record(path: str, params: dict[str, Any] | None = None) -> Any | None:
+    """从上游获取响应，用于录制缺失的 fixture"""
+    if not RECORD_UPSTREAM:
+        return None
+    async with httpx.AsyncClient(
+        headers={"User-Agent": DEFAULT_USER_AGENT}, follow_redirects=True
+    ) as client:
+        response = await client.get(f"{RECORD_UPSTREAM}{path}", params=params)
+    if not response.is_success:
+        return None
+    return response.json()
+
+
+async def _record_all_pages(path: str, params: dict[str, Any]) -> Any | None:
+    """分页录制完整列表，保存为一个 fixture"""
+    first = await _record(path, {**params, "limit": 50, "offset": 0})
+    if first is None:
+        return None
+    data = list(first["data"])
+    for offset in range(len(data), first["total"], 50):
+        page = await _record(path, {**params, "limit": 50, "offset": offset})
+        if page is None:
+            return None
+        data.extend(page["data"])
+    return {"total": len(data), "data": data}
+
+
+async def _simulate_upstream() -> Response | None:
+    """模拟延迟、429 和 5xx"""
+    await asyncio.sleep(max(0.0, random.gauss(LATENCY, JITTER)))
+    roll = random.random()
+    if roll < THROTTLE_RATE:
+        stats["429"] += 1
+        return JSONResponse(
+            {"title": "Too Many Requests"},
+            status_code=429,
+            headers={"Retry-After": RETRY_AFTER},
+        )
+    if roll < THROTTLE_RATE + ERROR_RATE:
+        stats["503"] += 1
+        return JSONResponse({"title": "Service Unavailable"}, status_code=503)
+    return None
+
+
+def _json_response(request: Request, data: Any) -> Response:
+    """返回 JSON，并支持 ETag 条件请求"""
+    body = json.dumps(data, ensure_ascii=False).encode()
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+    if request.headers.get("if-none-match") == etag:
+        stats["304"] += 1
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
+def _paginate(data: dict[str, Any], limit: int, offset: int) -> dict[str, Any]:
+    items = data["data"]
+    limit = min(limit, MAX_LIMIT)
+    return {
+        "total": len(items),
+        "limit": limit,
+        "offset": offset,
+        "data": items[offset : offset + limit],
+    }
+
+
+@app.get("/v0/subjects/{subject_id}")
+async def get_subject(subject_id: int, request: Request) -> Response:
+    stats["subjects"] += 1
+    if error := await _simulate_upstream():
+        return error
+    if subject_id in REDIRECTS:
+        stats["302"] += 1
+        return Response(
+            status_code=302,
+            headers={"Location": f"/v0/subjects/{REDIRECTS[subject_id]}"},
+        )
+
+    data = _load_fixture("subjects", subject_id)
+    if data is None and (data := await _record(f"/v0/subjects/{subject_id}")):
+        _save_fixture("subjects", subject_id, data)
+    if data is None and SYNTHESIZE and (data := _template("subjects")):
+        data = {**data, "id": subject_id}
+    if data is None:
+        return JSONResponse({"title": "Not Found"}, status_code=404)
+    return _json_response(request, data)
+
+
+@app.get("/v0/episodes")
+async def get_episodes(
+    subject_id: int,
+    request: Request,
+    type: int = 0,
+    limit: int = 100,
+    offset: int = 0,
+) -> Response:
+    stats["episodes"] += 1
+    if error := await _simulate_upstream():
+        return error
+    if subject_id in REDIRECTS:
+        stats["302"] += 1
+        return Response(
+            status_code=302,
+            headers={"Location": f"/v0/subjects/{REDIRECTS[subject_id]}"},
+        )
+
+    data = _load_fixture("episodes", subject_id)
+    if data is None and (
+        data := await _record_all_pages(
+            "/v0/episodes", {"subject_id": subject_id, "type": type}
+        )
+    ):
+        _save_fixture("episodes", subject_id, data)
+    if data is None and SYNTHESIZE and (data := _template("episodes")):
+        data = {
+            "data": [{**episode, "subject_id": subject_id} for episode in data["data"]]
+        }
+    if data is None:
+        data = {"data": []}
+    return _json_response(request, _paginate(data, limit, offset))
+
+
+@app.get("/v0/indices/{index_id}/subjects")
+async def get_index(
+    index_id: int,
+    request: Request,
+    type: int = 2,
+    limit: int = 30,
+    offset: int = 0,
+) -> Response:
+    stats["indices"] += 1
+    if error := await _simulate_upstream():
+        return error
+    data = _load_fixture("indices", index_id)
+    if data is None and (
+        data := await _record_all_pages(
+            f"/v0/indices/{index_id}/subjects", {"type": type}
+        )
+    ):
+        _save_fixture("indices", index_id, data)
+    if data is None and SYNTHESIZE:
+        rng = random.Random(index_id)
+        data = {
+            "data": [
+                {
+                    "id": rng.randint(1, 600_000),
+                    "type": 2,
+                    "added_at": "2025-01-01T00:00:00Z",
+                }
+                for _ in range(INDEX_SIZE)
+            ]
+        }
+    if data is None:
+        return JSONResponse({"title": "Not Found"}, status_code=404)
+    return _json_response(request, _paginate(data, limit, offset))
+
+
+def _match_air_date(subject: dict[str, Any], conditions: list[str]) -> bool:
+    """按 ">=2024-01-01" / "<2024-04-01" 形式的条件筛选播出日期"""
+    air_date = subject.get("date")
+    if not air_date:
+        return False
+    for condition in conditions:
+        operator = condition.rstrip("0123456789-")
+        value = condition[len(operator) :]
+        if not {
+            ">=": air_date >= value,
+            ">": air_date > value,
+            "<=": air_date <= value,
+            "<": air_date < value,
+            "": air_date == value,
+        }.get(operator, False):
+            return False
+    return True
+
+
+@app.post("/v0/search/subjects")
+async def search_subjects(
+    request: Request, limit: int = 30, offset: int = 0
+) -> Response:
+    """只在录制的条目中按类型和播出日期筛选，按排名排序"""
+    stats["search"] += 1
+    if error := await _simulate_upstream():
+        return error
+    body = await request.json()
+    filter = body.get("filter") or {}
+    directory = os.path.join(FIXTURES_DIR, "subjects")
+    subjects = []
+    if os.path.isdir(directory):
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                subject = json.load(f)
+            if filter.get("type") and subject.get("type") not in filter["type"]:
+                continue
+            if filter.get("air_date") and not _match_air_date(
+                subject, filter["air_date"]
+            ):
+                continue
+            subjects.append(subject)
+    subjects.sort(key=lambda subject: (subject.get("rating") or {}).get("rank") or 0)
+    return _json_response(request, _paginate({"data": subjects}, limit, offset))
+
+
+@app.get("/_stats")
+async def get_stats() -> dict[str, int]:
+    """各端点的请求计数，用于统计一次运行的请求量"""
+    return dict(stats)
+
+
+@app.delete("/_stats")
+async def reset_stats() -> dict[str, int]:
+    stats.clear()
+    return {}
@@ -0,0 +1,203 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Awaitable, Iterable, TypeVar
+
+import httpx
+import pytest
+from returns.result import Result, Success
+
+# 测试使用本地的 bgm.tv 替身服务，不读写磁盘缓存，也不限速
+os.environ.setdefault("BGMTV_BASE_URL", "http://fake")
+os.environ.setdefault("BGMTV_CACHE_ENABLED", "false")
+os.environ.setdefault("BGMTV_RATE_LIMIT", "1000")
+os.environ.setdefault("BGMTV_RATE_BURST", "1000")
+os.environ.setdefault("FAKE_BGMTV_LATENCY", "0")
+os.environ.setdefault("FAKE_BGMTV_JITTER", "0")
+
+from app.services.bgmtv import BGMTVClient, api  # noqa: E402
+from app.services.db import (  # noqa: E402
+    BulkUpsertResult,
+    EpisodeStat,
+    RefreshState,
+    Subject,
+    UpdateRun,
+)
+from benchmarks import fake_bgmtv  # noqa: E402
+
+T = TypeVar("T")
+
+FakeData = dict[tuple[str, int], Any]
+
+
+def run(awaitable: Awaitable[T]) -> T:
+    async def wrapper() -> T:
+        return await awaitable
+
+    return asyncio.run(wrapper())
+
+
+class FakeDB:
+    """内存中的 DBClient 替身，只实现更新流程用到的方法"""
+
+    def __init__(self) -> None:
+        # 各季度索引中的条目ID
+        self.index: dict[int, list[int]] = {}
+        self.subjects: dict[int, Subject] = {}
+        self.runs: list[UpdateRun] = []
+
+    async def get_all_subjects(self) -> Result[dict[int, list[int]], Exception]:
+        return Success(dict(self.index))
+
+    async def get_refresh_states(
+        self, ids: Iterable[int] | None = None
+    ) -> Result[dict[int, RefreshState], Exception]:
+        return Success({})
+
+    async def bulk_upsert_subjects(
+        self, subjects: list[Subject]
+    ) -> Result[BulkUpsertResult, Exception]:
+        self.subjects.update((subject.id, subject) for subject in subjects)
+        return Success(BulkUpsertResult(changed=[subject.id for subject in subjects]))
+
+    async def touch_subjects(self, ids: list[int]) -> Result[None, Exception]:
+        return Success(None)
+
+    async def bulk_upsert_refresh(self, rows: list[Any]) -> Result[None, Exception]:
+        return Success(None)
+
+    async def get_episode_stats(
+        self, subject_ids: Iterable[int]
+    ) -> Result[dict[int, list[EpisodeStat]], Exception]:
+        return Success({})
+
+    async def bulk_upsert_episode_stats(
+        self, rows: list[EpisodeStat]
+    ) -> Result[None, Exception]:
+        return Success(None)
+
+    async def delete_episode_stats(
+        self, episodes: list[tuple[int, int]]
+    ) -> Result[None, Exception]:
+        return Success(None)
+
+    async def create_run(
+        self,
+        job_id: str,
+        name: str,
+        scope: str,
+        fast_refresh: bool = False,
+        queued: bool = False,
+    ) -> Result[UpdateRun, Exception]:
+        now = datetime.now()
+        run = UpdateRun(
+            id=len(self.runs) + 1,
+            job_id=job_id,
+            name=name,
+            scope=scope,
+            seasons={},
+            completed=[],
+            status="pending",
+            fast_refresh=fast_refresh,
+            created_at=now,
+            claimed_at=None if queued else now,
+            updated_at=now,
+        )
+        self.runs.append(run)
+        return Success(run)
+
+    def run(self, run_id: int) -> UpdateRun:
+        return self.runs[run_id - 1]
+
+    def _queued_runs(self) -> list[UpdateRun]:
+        return [
+            run
+            for run in self.runs
+            if run.status == "pending" and run.claimed_at is None
+        ]
+
+    async def claim_queued_run(self) -> Result[UpdateRun | None, Exception]:
+        queued = self._queued_runs()
+        if not queued:
+            return Success(None)
+        queued[0].claimed_at = datetime.now()
+        return Success(queued[0])
+
+    async def find_queued_run(
+        self, scope: str, since: datetime
+    ) -> Result[UpdateRun | None, Exception]:
+        for run in self._queued_runs():
+            if run.scope == scope and run.created_at >= since:
+                return Success(run)
+        return Success(None)
+
+    async def get_resumable_run(
+        self, scope: str, since: datetime, exclude_id: int | None = None
+    ) -> Result[UpdateRun | None, Exception]:
+        runs = [
+            run
+            for run in self.runs
+            if run.scope == scope
+            and run.status in ("running", "aborted", "failed")
+            and run.started_at is not None
+            and run.started_at >= since
+            and run.id != exclude_id
+        ]
+        return Success(max(runs, key=lambda run: run.started_at) if runs else None)
+
+    async def plan_run(
+        self,
+        run_id: int,
+        seasons: dict[int, list[int]],
+        completed: list[int],
+        resumed_from: int | None = None,
+    ) -> Result[None, Exception]:
+        run = self.run(run_id)
+        run.seasons = {str(season_id): ids for season_id, ids in seasons.items()}
+        run.completed = list(completed)
+        if resumed_from is not None:
+            self.run(resumed_from).status = "resumed"
+        return Success(None)
+
+    async def add_run_progress(
+        self, run_id: int, subject_ids: list[int], state: dict[str, Any] | None = None
+    ) -> Result[None, Exception]:
+        run = self.run(run_id)
+        run.completed = run.completed + subject_ids
+        return await self.save_run_state(run_id, state or {})
+
+    async def save_run_state(
+        self, run_id: int, state: dict[str, Any]
+    ) -> Result[None, Exception]:
+        run = self.run(run_id)
+        for name, value in state.items():
+            setattr(run, name, value)
+        run.updated_at = datetime.now()
+        return Success(None)
+
+
+@pytest.fixture
+def fake_db() -> FakeDB:
+    return FakeDB()
+
+
+@pytest.fixture
+def fake_data(monkeypatch: pytest.MonkeyPatch) -> FakeData:
+    """替身服务的响应数据，键为 (kind, id)，没有时回退到 benchmarks/fixtures"""
+    data: FakeData = {}
+    load_fixture = fake_bgmtv._load_fixture
+    monkeypatch.setattr(
+        fake_bgmtv,
+        "_load_fixture",
+        lambda kind, id: data.get((kind, id)) or load_fixture(kind, id),
+    )
+    return data
+
+
+@pytest.fixture
+def bgmtv_client(monkeypatch: pytest.MonkeyPatch) -> BGMTVClient:
+    """请求替身服务的客户端，每个测试使用独立的条件请求校验值和请求统计"""
+    monkeypatch.setattr(api, "_validators", {})
+    fake_bgmtv.stats.clear()
+    transport = httpx.ASGITransport(app=fake_bgmtv.app)
+    return BGMTVClient(httpx.AsyncClient(transport=transport, base_url="http://fake"))
@@ -0,0 +1,159 @@
+import asyncio
+import re
+from typing import Any
+
+import pytest
+from returns.result import Failure, Result, Success
+from sqlalchemy.dialects import postgresql
+
+from app.api.v0.update.endpoints import scope_lock_key, update_and_deploy
+from app.api.v0.update.jobs import UpdateJob
+from app.config import config
+from app.services.db import DBClient, UpdateRun, client as db_client_module
+from tests.conftest import run
+
+
+class FakeConnection:
+    def __init__(self, engine: "FakeEngine") -> None:
+        self.engine = engine
+        self.closed = False
+
+    async def execution_options(self, **_: Any) -> "FakeConnection":
+        return self
+
+    async def scalar(self, stmt: Any) -> bool:
+        sql = str(
+            stmt.compile(
+                dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+            )
+        )
+        match = re.search(r"(pg_\w+)\((\d+)\)", sql)
+        assert match is not None
+        function, key = match.group(1), int(match.group(2))
+        self.engine.calls.append(function)
+        if function == "pg_try_advisory_lock":
+            if self.engine.locks.get(key, self) is not self:
+                return False
+            self.engine.locks[key] = self
+            return True
+        return self.engine.locks.pop(key, None) is self
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeEngine:
+    """pg_try_advisory_lock / pg_advisory_unlock 按连接记录锁的持有者"""
+
+    def __init__(self) -> None:
+        self.locks: dict[int, FakeConnection] = {}
+        self.connections: list[FakeConnection] = []
+        self.calls: list[str] = []
+
+    async def connect(self) -> FakeConnection:
+        connection = FakeConnection(self)
+        self.connections.append(connection)
+        return connection
+
+
+@pytest.fixture
+def engine(monkeypatch: pytest.MonkeyPatch) -> FakeEngine:
+    monkeypatch.setattr(db_client_module, "LOCK_POLL_INTERVAL", 0.01)
+    return FakeEngine()
+
+
+def make_client(engine: FakeEngine) -> DBClient:
+    client = DBClient(config.db_url)
+    client.engine = engine  # type: ignore[assignment]
+    return client
+
+
+async def try_lock(client: DBClient, key: int, timeout: float = 0) -> Any:
+    async with client.advisory_lock(key, timeout) as lock:
+        return lock
+
+
+def test_lock_is_released_on_exit(engine: FakeEngine) -> None:
+    client = make_client(engine)
+    assert run(try_lock(client, 1)) == Success(True)
+    assert engine.calls == ["pg_try_advisory_lock", "pg_advisory_unlock"]
+    assert engine.locks == {}
+    assert all(connection.closed for connection in engine.connections)
+
+
+def test_held_lock_without_timeout_fails_once(engine: FakeEngine) -> None:
+    engine.locks[1] = FakeConnection(engine)
+    assert run(try_lock(make_client(engine), 1)) == Success(False)
+    assert engine.calls == ["pg_try_advisory_lock"]
+
+
+def test_held_lock_polls_until_timeout(engine: FakeEngine) -> None:
+    engine.locks[1] = FakeConnection(engine)
+    assert run(try_lock(make_client(engine), 1, timeout=0.05)) == Success(False)
+    assert engine.calls.count("pg_try_advisory_lock") > 1
+    assert "pg_advisory_unlock" not in engine.calls
+
+
+def test_waits_for_released_lock(engine: FakeEngine) -> None:
+    client = make_client(engine)
+
+    async def hold_then_release(held: asyncio.Event) -> None:
+        async with client.advisory_lock(1) as lock:
+            assert lock == Success(True)
+            held.set()
+            await asyncio.sleep(0.03)
+
+    async def main() -> Any:
+        held = asyncio.Event()
+        holder = asyncio.create_task(hold_then_release(held))
+        await held.wait()
+        lock = await try_lock(client, 1, timeout=1)
+        await holder
+        return lock
+
+    assert run(main()) == Success(True)
+    assert engine.locks == {}
+
+
+def test_connect_failure(engine: FakeEngine, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def refuse() -> None:
+        raise ConnectionError("连接被拒绝")
+
+    monkeypatch.setattr(engine, "connect", refuse)
+    match run(try_lock(make_client(engine), 1)):
+        case Failure(ConnectionError()):
+            pass
+        case result:
+            pytest.fail(f"应当失败: {result}")
+
+
+def test_merges_into_run_holding_the_lock(
+    engine: FakeEngine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    client = make_client(engine)
+    running = UpdateRun(id=1, job_id="running", scope="all")
+    saved: dict[int, dict[str, Any]] = {}
+
+    async def get_running_run(
+        scope: str, exclude_id: int | None
+    ) -> Result[UpdateRun | None, Exception]:
+        assert (scope, exclude_id) == ("all", 2)
+        return Success(running)
+
+    async def save_run_state(
+        run_id: int, values: dict[str, Any]
+    ) -> Result[None, Exception]:
+        saved[run_id] = values
+        return Success(None)
+
+    monkeypatch.setattr(client, "get_running_run", get_running_run)
+    monkeypatch.setattr(client, "save_run_state", save_run_state)
+    engine.locks[scope_lock_key(None)] = FakeConnection(engine)
+
+    job = UpdateJob("全部季度")
+    job.run_id = 2
+    result = run(update_and_deploy(None, client, job))  # type: ignore[arg-type]
+    assert result.status == "skipped"
+    assert result.job_id == "running"
+    assert saved[2]["merged_into"] == "running"
+    assert saved[2]["status"] == "skipped"
@@ -0,0 +1,105 @@
+import pytest
+
+from app.services.bgmtv import breaker
+from app.services.bgmtv.breaker import CircuitBreaker, CircuitOpenError, CircuitState
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(breaker.time, "monotonic", clock)
+    return clock
+
+
+def make_breaker(half_open_calls: int = 1) -> CircuitBreaker:
+    return CircuitBreaker(
+        failure_rate=0.5,
+        window=4,
+        min_calls=4,
+        cooldown=30,
+        half_open_calls=half_open_calls,
+    )
+
+
+def trip(cb: CircuitBreaker) -> None:
+    for _ in range(4):
+        cb.before_call()
+        cb.record_failure()
+
+
+def test_opens_after_failure_rate_reached(clock: Clock) -> None:
+    cb = make_breaker()
+    for outcome in (True, False, True):
+        cb.before_call()
+        cb.record_success() if outcome else cb.record_failure()
+    assert cb.state == CircuitState.CLOSED
+    cb.before_call()
+    cb.record_failure()
+    assert cb.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        cb.before_call()
+
+
+def test_half_open_after_cooldown_and_closes_on_success(clock: Clock) -> None:
+    cb = make_breaker()
+    trip(cb)
+    clock.now += 30
+    assert cb.state == CircuitState.HALF_OPEN
+    cb.before_call()
+    with pytest.raises(CircuitOpenError):
+        cb.before_call()
+    cb.record_success()
+    assert cb.state == CircuitState.CLOSED
+
+
+def test_half_open_failure_reopens(clock: Clock) -> None:
+    cb = make_breaker()
+    trip(cb)
+    clock.now += 30
+    cb.before_call()
+    cb.record_failure()
+    assert cb.state == CircuitState.OPEN
+
+
+def test_release_returns_probe_slot(clock: Clock) -> None:
+    cb = make_breaker()
+    trip(cb)
+    clock.now += 30
+    cb.before_call()
+    cb.release()
+    assert cb.state == CircuitState.HALF_OPEN
+    cb.before_call()
+    cb.record_success()
+    assert cb.state == CircuitState.CLOSED
+
+
+def test_half_open_without_result_reopens_after_cooldown(clock: Clock) -> None:
+    cb = make_breaker()
+    trip(cb)
+    clock.now += 30
+    cb.before_call()
+    clock.now += 30
+    assert cb.state == CircuitState.OPEN
+    clock.now += 30
+    assert cb.state == CircuitState.HALF_OPEN
+    cb.before_call()
+
+
+def test_needs_all_probes_to_close(clock: Clock) -> None:
+    cb = make_breaker(half_open_calls=2)
+    trip(cb)
+    clock.now += 30
+    cb.before_call()
+    cb.before_call()
+    cb.record_success()
+    assert cb.state == CircuitState.HALF_OPEN
+    cb.record_success()
+    assert cb.state == CircuitState.CLOSED
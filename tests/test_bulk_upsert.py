@@ -0,0 +1,113 @@
+from typing import Any, Awaitable, Callable
+
+import pytest
+from returns.result import Result, Success
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from app.config import config
+from app.services.db import BulkUpsertResult, DBClient, Index
+from tests.conftest import run
+
+# 写入这个季度的语句会违反约束
+BAD_SEASON_ID = 666
+
+
+class FakeResult:
+    def __init__(self, rows: list[tuple[Any, ...]]) -> None:
+        self.rows = rows
+
+    def all(self) -> list[tuple[Any, ...]]:
+        return self.rows
+
+
+class FakeSavepoint:
+    def __init__(self, session: "FakeSession") -> None:
+        self.session = session
+
+    async def __aenter__(self) -> None:
+        self.session.savepoints += 1
+
+    async def __aexit__(self, exc_type: Any, *_: Any) -> bool:
+        if exc_type is not None:
+            self.session.rollbacks += 1
+        return False
+
+
+class FakeSession:
+    """记录执行的语句；RETURNING 只返回 changed 中的主键"""
+
+    def __init__(self, changed: set[tuple[int, int]] | None = None) -> None:
+        self.changed = changed or set()
+        self.statements: list[str] = []
+        self.savepoints = 0
+        self.rollbacks = 0
+
+    def begin_nested(self) -> FakeSavepoint:
+        return FakeSavepoint(self)
+
+    async def execute(self, stmt: Any) -> FakeResult:
+        sql = str(
+            stmt.compile(
+                dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+            )
+        )
+        self.statements.append(sql)
+        if f"({BAD_SEASON_ID}, " in sql:
+            raise IntegrityError(sql, {}, Exception("违反约束"))
+        return FakeResult(list(self.changed))
+
+    async def commit(self) -> None:
+        pass
+
+
+def make_client(
+    session: FakeSession, monkeypatch: pytest.MonkeyPatch, batch_size: int = 2
+) -> DBClient:
+    client = DBClient(config.db_url)
+    client._batch_size = batch_size
+
+    async def execute_once(
+        operation: Callable[[Any], Awaitable[Any]],
+    ) -> Result[Any, Exception]:
+        return Success(await operation(session))
+
+    monkeypatch.setattr(client, "_execute_with_retry", execute_once)
+    return client
+
+
+def index(season_id: int, subject_ids: list[int] | None = None) -> Index:
+    return Index(season_id=season_id, index_id=1, subject_ids=subject_ids or [1])
+
+
+def test_failed_batch_falls_back_to_rows(monkeypatch: pytest.MonkeyPatch) -> None:
+    session = FakeSession()
+    client = make_client(session, monkeypatch)
+    rows = [index(season_id) for season_id in (1, 2, BAD_SEASON_ID, 4, 5)]
+    changed, failed = run(client._bulk_upsert(session, Index, rows))  # type: ignore[arg-type]
+    assert [row.season_id for row in changed] == [1, 2, 4, 5]
+    assert [row.season_id for row in failed] == [BAD_SEASON_ID]
+    # 三批各一个 SAVEPOINT，失败的一批再逐行各一个
+    assert session.savepoints == 5
+    assert session.rollbacks == 2
+
+
+def test_duplicate_keys_keep_last_row(monkeypatch: pytest.MonkeyPatch) -> None:
+    session = FakeSession()
+    client = make_client(session, monkeypatch, batch_size=10)
+    rows = [index(1, [1]), index(2), index(1, [7, 8])]
+    changed, _ = run(client._bulk_upsert(session, Index, rows))  # type: ignore[arg-type]
+    assert len(changed) == 2
+    assert len(session.statements) == 1
+    assert "(1, 1, ARRAY[7, 8])" in session.statements[0]
+    assert "(1, 1, ARRAY[1])" not in session.statements[0]
+
+
+def test_indices_compare_subject_ids_only(monkeypatch: pytest.MonkeyPatch) -> None:
+    session = FakeSession(changed={(1, 1)})
+    client = make_client(session, monkeypatch)
+    result = run(client.bulk_upsert_indices([index(1), index(2)]))
+    assert result == Success(BulkUpsertResult(changed=[1], unchanged=[2], failed=[]))
+    sql = session.statements[0]
+    assert "index.subject_ids IS DISTINCT FROM excluded.subject_ids" in sql
+    assert "index.index_id IS DISTINCT FROM" not in sql
@@ -0,0 +1,40 @@
+import pytest
+from returns.result import Success
+
+from app.services.bgmtv import BGMTVClient
+from benchmarks import fake_bgmtv
+from tests.conftest import run
+
+CANONICAL_ID = 1002
+MERGED_ID = 1001
+
+
+@pytest.fixture
+def client(bgmtv_client: BGMTVClient, monkeypatch: pytest.MonkeyPatch) -> BGMTVClient:
+    monkeypatch.setitem(fake_bgmtv.REDIRECTS, MERGED_ID, CANONICAL_ID)
+    return bgmtv_client
+
+
+def fetch(client: BGMTVClient, subject_id: int) -> object:
+    match run(client.get_subject_details(subject_id)):
+        case Success(details):
+            return details
+    pytest.fail(f"获取条目 {subject_id} 失败")
+
+
+def test_unchanged_subject_returns_none(client: BGMTVClient) -> None:
+    assert fetch(client, CANONICAL_ID) is not None
+    assert fetch(client, CANONICAL_ID) is None
+
+
+def test_redirect_does_not_reuse_canonical_validators(client: BGMTVClient) -> None:
+    # 实际条目已请求过，跟随 302 时不能因为 304 跳过被合并的条目
+    assert fetch(client, CANONICAL_ID) is not None
+    assert fetch(client, MERGED_ID) is not None
+    assert client.resolve_subject_id(MERGED_ID) == CANONICAL_ID
+
+
+def test_known_merged_subject_is_not_revalidated(client: BGMTVClient) -> None:
+    assert fetch(client, MERGED_ID) is not None
+    assert not client.can_revalidate(MERGED_ID)
+    assert fetch(client, MERGED_ID) is not None
@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Awaitable, Callable
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.config import config
+from app.services.db import DBClient
+
+
+class FakeResult:
+    def all(self) -> list[Any]:
+        return []
+
+    def scalars(self) -> "FakeResult":
+        return self
+
+
+class FakeSession:
+    """记录执行的语句，返回空结果"""
+
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    async def execute(self, stmt: Any) -> FakeResult:
+        compiled = stmt.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+        self.statements.append(str(compiled))
+        return FakeResult()
+
+
+@pytest.fixture
+def db_client(monkeypatch: pytest.MonkeyPatch) -> tuple[DBClient, FakeSession]:
+    client = DBClient(config.db_url)
+    session = FakeSession()
+
+    async def execute_twice(operation: Callable[[Any], Awaitable[Any]]) -> Any:
+        # 模拟第一次执行失败后的重试
+        await operation(session)
+        return await operation(session)
+
+    monkeypatch.setattr(client, "_execute_with_retry", execute_twice)
+    return client, session
+
+
+def test_refresh_states_ids_survive_retry(
+    db_client: tuple[DBClient, FakeSession],
+) -> None:
+    client, session = db_client
+    asyncio.run(client.get_refresh_states(i for i in (1, 2, 3)))
+    assert len(session.statements) == 2
+    assert all("IN (1, 2, 3)" in stmt for stmt in session.statements)
+
+
+def test_episode_stats_ids_survive_retry(
+    db_client: tuple[DBClient, FakeSession],
+) -> None:
+    client, session = db_client
+    asyncio.run(client.get_episode_stats(i for i in (4, 5)))
+    assert len(session.statements) == 2
+    assert all("IN (4, 5)" in stmt for stmt in session.statements)
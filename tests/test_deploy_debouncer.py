@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from returns.result import Failure, Result, Success
+
+from app.api.v0 import utils
+from app.api.v0.utils import DeployHookDebouncer
+from tests.conftest import run
+
+DELAY = 0.1
+
+
+class FakeDeployStore:
+    """内存中的 deploy_request 表，多个 DeployHookDebouncer 共享"""
+
+    def __init__(self) -> None:
+        self.requested_at: datetime | None = None
+        self.reasons: list[str] = []
+        self.claimed: list[list[str]] = []
+        self.broken = False
+
+    async def request_deploy(self, reason: str) -> Result[datetime, Exception]:
+        if self.broken:
+            return Failure(ConnectionError("数据库不可用"))
+        self.requested_at = self.requested_at or datetime.now()
+        self.reasons.append(reason)
+        return Success(self.requested_at)
+
+    async def get_deploy_request(self) -> Result[datetime | None, Exception]:
+        return Success(self.requested_at)
+
+    async def claim_deploy(
+        self, requested_before: datetime | None = None
+    ) -> Result[list[str] | None, Exception]:
+        if self.requested_at is None or (
+            requested_before is not None and self.requested_at > requested_before
+        ):
+            return Success(None)
+        reasons, self.reasons, self.requested_at = self.reasons, [], None
+        self.claimed.append(reasons)
+        return Success(reasons)
+
+
+@pytest.fixture
+def fired(monkeypatch: pytest.MonkeyPatch) -> list[datetime]:
+    fired: list[datetime] = []
+
+    async def trigger_deploy_hooks() -> None:
+        fired.append(datetime.now())
+
+    monkeypatch.setattr(utils, "trigger_deploy_hooks", trigger_deploy_hooks)
+    return fired
+
+
+def test_processes_share_one_window(fired: list[datetime]) -> None:
+    store = FakeDeployStore()
+    api, worker = DeployHookDebouncer(DELAY), DeployHookDebouncer(DELAY)
+
+    async def main() -> None:
+        await api.request(store, "手动更新")  # type: ignore[arg-type]
+        await asyncio.sleep(DELAY / 2)
+        await worker.request(store, "定时更新")  # type: ignore[arg-type]
+        await api.request(store, "再次手动更新")  # type: ignore[arg-type]
+        await asyncio.sleep(DELAY * 2)
+
+    run(main())
+    assert len(fired) == 1
+    assert store.claimed == [["手动更新", "定时更新", "再次手动更新"]]
+    assert api._task is None and worker._task is None
+
+
+def test_request_after_trigger_opens_new_window(fired: list[datetime]) -> None:
+    store = FakeDeployStore()
+    debouncer = DeployHookDebouncer(DELAY)
+
+    async def main() -> None:
+        await debouncer.request(store, "第一次")  # type: ignore[arg-type]
+        await asyncio.sleep(DELAY * 1.5)
+        await debouncer.request(store, "第二次")  # type: ignore[arg-type]
+        await asyncio.sleep(DELAY * 1.5)
+
+    run(main())
+    assert store.claimed == [["第一次"], ["第二次"]]
+
+
+def test_waits_for_window_reopened_by_other_process(fired: list[datetime]) -> None:
+    store = FakeDeployStore()
+    first, second = DeployHookDebouncer(DELAY), DeployHookDebouncer(DELAY)
+
+    async def main() -> None:
+        await first.request(store, "a")  # type: ignore[arg-type]
+        # 其他进程领取并触发了部署，随后又开始新的等待窗口
+        await asyncio.sleep(DELAY / 2)
+        await store.claim_deploy()
+        await second.request(store, "b")  # type: ignore[arg-type]
+        await asyncio.sleep(DELAY * 2)
+
+    run(main())
+    assert store.claimed == [["a"], ["b"]]
+    assert len(fired) == 1
+    assert first._task is None and second._task is None
+
+
+def test_db_failure_triggers_immediately(fired: list[datetime]) -> None:
+    store = FakeDeployStore()
+    store.broken = True
+    debouncer = DeployHookDebouncer(DELAY)
+    run(debouncer.request(store, "手动更新"))  # type: ignore[arg-type]
+    assert len(fired) == 1
+    assert debouncer._task is None
+
+
+def test_flush_triggers_pending_deploy(fired: list[datetime]) -> None:
+    store = FakeDeployStore()
+    debouncer = DeployHookDebouncer(60)
+
+    async def main() -> None:
+        await debouncer.flush(store)  # type: ignore[arg-type]
+        assert not fired
+        await debouncer.request(store, "关闭前的更新")  # type: ignore[arg-type]
+        await debouncer.flush(store)  # type: ignore[arg-type]
+
+    run(main())
+    assert store.claimed == [["关闭前的更新"]]
+    assert debouncer._task is None
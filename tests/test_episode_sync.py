@@ -0,0 +1,134 @@
+from datetime import date, datetime, timedelta
+from typing import Any
+
+import pytest
+from returns.result import Failure, Success
+
+from app.services.bgmtv import BGMTVClient, api
+from app.services.bgmtv.client import SubjectDetails
+from app.services.db import EpisodeStat
+from benchmarks import fake_bgmtv
+from tests.conftest import FakeData, run
+
+SUBJECT_ID = 5001
+OLD = date(2020, 1, 1)
+
+
+def episode(id: int, airdate: date, comment: int = 10) -> dict[str, Any]:
+    return {"id": id, "sort": id, "airdate": airdate.isoformat(), "comment": comment}
+
+
+def stat(id: int, airdate: date, comment: int = 10) -> EpisodeStat:
+    return EpisodeStat(
+        subject_id=SUBJECT_ID,
+        id=id,
+        sort=id,
+        airdate=airdate,
+        comment=comment,
+        updated_at=datetime.now(),
+    )
+
+
+def serve(fake_data: FakeData, eps: int, episodes: list[dict[str, Any]]) -> None:
+    fake_data[("subjects", SUBJECT_ID)] = {"id": SUBJECT_ID, "name": "测试", "eps": eps}
+    fake_data[("episodes", SUBJECT_ID)] = {"data": episodes}
+
+
+def fetch(client: BGMTVClient, stored: list[EpisodeStat]) -> SubjectDetails:
+    match run(client.get_subject_details(SUBJECT_ID, stored)):
+        case Success(SubjectDetails() as details):
+            return details
+    raise AssertionError("获取条目失败")
+
+
+def test_frozen_subject_skips_episode_requests(
+    bgmtv_client: BGMTVClient, fake_data: FakeData
+) -> None:
+    serve(fake_data, 2, [episode(1, OLD), episode(2, OLD)])
+    details = fetch(bgmtv_client, [stat(1, OLD), stat(2, OLD)])
+    assert fake_bgmtv.stats["episodes"] == 0
+    assert details.episodes is None
+    assert details.subject.average_comment == 10
+
+
+def test_frozen_subject_with_new_episodes_is_fetched(
+    bgmtv_client: BGMTVClient, fake_data: FakeData
+) -> None:
+    # 已保存的剧集都已冻结，但条目的集数增加了（如第二部分开播）
+    recent = date.today() - timedelta(days=1)
+    serve(fake_data, 3, [episode(1, OLD), episode(2, OLD), episode(3, recent, 40)])
+    details = fetch(bgmtv_client, [stat(1, OLD), stat(2, OLD)])
+    assert details.episodes is not None
+    assert {stat.id for stat in details.episodes} == {1, 2, 3}
+    assert details.subject.average_comment == 20
+
+
+def test_removed_episodes_are_reported_stale(
+    bgmtv_client: BGMTVClient, fake_data: FakeData
+) -> None:
+    recent = date.today() - timedelta(days=1)
+    serve(fake_data, 2, [episode(1, OLD), episode(2, recent)])
+    stored = [stat(1, OLD), stat(2, recent), stat(3, recent, 1000)]
+    details = fetch(bgmtv_client, stored)
+    assert details.stale_episode_ids == [3]
+    assert details.subject.average_comment == 10
+
+
+def test_frozen_pages_are_skipped_when_total_matches(
+    bgmtv_client: BGMTVClient, fake_data: FakeData
+) -> None:
+    recent = date.today() - timedelta(days=1)
+    airdates = [OLD] * 210 + [recent] * 40
+    serve(fake_data, 250, [episode(i, d) for i, d in enumerate(airdates, 1)])
+    stored = [stat(i, d) for i, d in enumerate(airdates, 1)]
+    details = fetch(bgmtv_client, stored)
+    # 第一页总是请求，第二页完全冻结被跳过，第三页包含未冻结的剧集
+    assert fake_bgmtv.stats["episodes"] == 2
+    assert details.stale_episode_ids == []
+    assert details.episodes is not None
+    assert len(details.episodes) == 150
+
+
+def test_total_mismatch_refetches_every_page(
+    bgmtv_client: BGMTVClient, fake_data: FakeData
+) -> None:
+    recent = date.today() - timedelta(days=1)
+    airdates = [OLD] * 210 + [recent] * 40
+    serve(fake_data, 250, [episode(i, d) for i, d in enumerate(airdates, 1)])
+    stored = [stat(i, d) for i, d in enumerate(airdates, 1)] + [stat(999, OLD)]
+    details = fetch(bgmtv_client, stored)
+    assert fake_bgmtv.stats["episodes"] == 3
+    assert details.stale_episode_ids == [999]
+    assert details.episodes is not None
+    assert len(details.episodes) == 250
+
+
+def test_skipped_pages_keep_stored_comments(
+    bgmtv_client: BGMTVClient, fake_data: FakeData
+) -> None:
+    recent = date.today() - timedelta(days=1)
+    airdates = [OLD] * 210 + [recent] * 40
+    serve(fake_data, 250, [episode(i, d) for i, d in enumerate(airdates, 1)])
+    stored = [stat(i, d, 40) for i, d in enumerate(airdates, 1)]
+    details = fetch(bgmtv_client, stored)
+    # 第二页沿用已保存的评论数 40，其余剧集使用重新获取的 10
+    assert details.subject.average_comment == (150 * 10 + 100 * 40) / 250
+
+
+def test_episode_failure_keeps_stored_stats_and_drops_validators(
+    bgmtv_client: BGMTVClient, fake_data: FakeData, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    recent = date.today() - timedelta(days=1)
+    serve(fake_data, 2, [episode(1, recent), episode(2, recent)])
+    fetch(bgmtv_client, [])
+    assert any(str(SUBJECT_ID) in key for key in api._validators)
+
+    async def fail(subject_id: int, limit: int, offset: int) -> Any:
+        return Failure(ValueError("page failed"))
+
+    monkeypatch.setattr(bgmtv_client, "_get_episodes_page", fail)
+    fake_data[("subjects", SUBJECT_ID)]["name"] = "改名"
+    details = fetch(bgmtv_client, [stat(1, recent, 10), stat(2, recent, 30)])
+    assert details.episodes is None
+    assert details.subject.average_comment == 20
+    assert not any(str(SUBJECT_ID) in key for key in api._validators)
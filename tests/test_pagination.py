@@ -0,0 +1,112 @@
+from typing import Any
+
+import pytest
+from returns.result import Failure, Success
+
+from app.services.bgmtv import BGMTVClient
+from benchmarks import fake_bgmtv
+from tests.conftest import FakeData, run
+
+INDEX_ID = 9001
+SUBJECT_ID = 9002
+
+
+def index_subject(id: int) -> dict[str, Any]:
+    return {"id": id, "type": 2, "added_at": "2025-01-01T00:00:00Z"}
+
+
+@pytest.fixture
+def index_ids(fake_data: FakeData) -> list[int]:
+    ids = list(range(1000, 1250))
+    fake_data[("indices", INDEX_ID)] = {"data": [index_subject(id) for id in ids]}
+    return ids
+
+
+def test_index_pages_keep_offset_order(
+    bgmtv_client: BGMTVClient, index_ids: list[int]
+) -> None:
+    assert run(bgmtv_client.get_index_subject_ids(INDEX_ID)) == Success(index_ids)
+    assert fake_bgmtv.stats["indices"] == 3
+
+
+def test_index_follows_truncated_limit(
+    bgmtv_client: BGMTVClient, index_ids: list[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # 服务端把 limit 截断为 30 时按实际的 limit 翻页，不漏页
+    monkeypatch.setattr(fake_bgmtv, "MAX_LIMIT", 30)
+    assert run(bgmtv_client.get_index_subject_ids(INDEX_ID)) == Success(index_ids)
+    assert fake_bgmtv.stats["indices"] == 9
+
+
+def test_index_page_failure_fails_the_whole_index(
+    bgmtv_client: BGMTVClient, index_ids: list[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    get_index_page = bgmtv_client._get_index_page
+
+    async def fail_second_page(index_id: int, limit: int, offset: int) -> Any:
+        if offset == 100:
+            return Failure(ValueError("page failed"))
+        return await get_index_page(index_id, limit, offset)
+
+    monkeypatch.setattr(bgmtv_client, "_get_index_page", fail_second_page)
+    match run(bgmtv_client.get_index_subject_ids(INDEX_ID)):
+        case Failure(ValueError() as e):
+            assert str(e) == "page failed"
+        case result:
+            pytest.fail(f"应当失败: {result}")
+
+
+@pytest.fixture
+def episode_ids(fake_data: FakeData) -> list[int]:
+    ids = list(range(1, 251))
+    fake_data[("episodes", SUBJECT_ID)] = {
+        "data": [
+            {"id": id, "sort": id, "airdate": "2020-01-01", "comment": 1} for id in ids
+        ]
+    }
+    return ids
+
+
+def collect_episode_ids(client: BGMTVClient) -> list[int] | Exception:
+    async def collect() -> list[int] | Exception:
+        ids: list[int] = []
+        async for page in client.iter_episodes(SUBJECT_ID):
+            match page:
+                case Failure(e):
+                    return e
+                case Success(episodes):
+                    ids.extend(episode.id for episode in episodes.data)
+        return ids
+
+    return run(collect())
+
+
+def test_episodes_fetch_every_page(
+    bgmtv_client: BGMTVClient, episode_ids: list[int]
+) -> None:
+    ids = collect_episode_ids(bgmtv_client)
+    assert isinstance(ids, list) and sorted(ids) == episode_ids
+    assert fake_bgmtv.stats["episodes"] == 3
+
+
+def test_episodes_follow_truncated_limit(
+    bgmtv_client: BGMTVClient, episode_ids: list[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(fake_bgmtv, "MAX_LIMIT", 30)
+    ids = collect_episode_ids(bgmtv_client)
+    assert isinstance(ids, list) and sorted(ids) == episode_ids
+    assert fake_bgmtv.stats["episodes"] == 9
+
+
+def test_episode_page_failure_stops_iteration(
+    bgmtv_client: BGMTVClient, episode_ids: list[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    get_episodes_page = bgmtv_client._get_episodes_page
+
+    async def fail_last_page(subject_id: int, limit: int, offset: int) -> Any:
+        if offset == 200:
+            return Failure(ValueError("page failed"))
+        return await get_episodes_page(subject_id, limit, offset)
+
+    monkeypatch.setattr(bgmtv_client, "_get_episodes_page", fail_last_page)
+    assert isinstance(collect_episode_ids(bgmtv_client), ValueError)
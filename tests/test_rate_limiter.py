@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from app.services.bgmtv import limiter
+from app.services.bgmtv.limiter import RateLimiter, parse_retry_after
+from tests.conftest import run
+
+
+class Clock:
+    """替代 time.monotonic，asyncio.sleep 只推进时间"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.slept: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(limiter.time, "monotonic", clock)
+    monkeypatch.setattr(limiter.asyncio, "sleep", clock.sleep)
+    return clock
+
+
+def acquire(rate_limiter: RateLimiter, times: int) -> None:
+    async def acquire_all() -> None:
+        for _ in range(times):
+            await rate_limiter.acquire()
+
+    run(acquire_all())
+
+
+def test_parse_retry_after() -> None:
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+    seconds = parse_retry_after(format_datetime(retry_at, usegmt=True))
+    assert seconds is not None and 55 < seconds <= 60
+
+
+def test_burst_then_rate(clock: Clock) -> None:
+    rate_limiter = RateLimiter(rate=2, burst=3, min_rate=0.5)
+    acquire(rate_limiter, 3)
+    assert clock.slept == []
+    acquire(rate_limiter, 2)
+    assert clock.now == pytest.approx(1001.0)
+
+
+def test_throttled_halves_rate_and_blocks(clock: Clock) -> None:
+    rate_limiter = RateLimiter(rate=4, burst=4, min_rate=1)
+    rate_limiter.on_throttled(10)
+    assert rate_limiter.rate == 2
+    acquire(rate_limiter, 1)
+    # Retry-After 期间不发放令牌，之后按减半的速率补充
+    assert clock.now == pytest.approx(1010.5)
+    for _ in range(3):
+        rate_limiter.on_throttled()
+    assert rate_limiter.rate == 1
+
+
+def test_recovers_after_healthy_streak(clock: Clock) -> None:
+    rate_limiter = RateLimiter(rate=10, burst=1, min_rate=1, recovery_threshold=3)
+    rate_limiter.on_throttled()
+    assert rate_limiter.rate == 5
+    for _ in range(2):
+        rate_limiter.on_success()
+    assert rate_limiter.rate == 5
+    rate_limiter.on_success()
+    assert rate_limiter.rate == 6
+    for _ in range(20):
+        rate_limiter.on_success()
+    assert rate_limiter.rate == 10
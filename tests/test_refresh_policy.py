@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.api.v0.update.refresh import AdaptivePolicy
+from app.api.v0.utils import current_season_id
+from app.services.db import RefreshState, Subject
+
+NOW = datetime.now()
+SEASON_ID = 202401
+
+
+@pytest.fixture
+def policy() -> AdaptivePolicy:
+    return AdaptivePolicy(min_hours=4, max_hours=336, popular_collections=5000)
+
+
+def make_state(
+    interval_hours: float | None = 48,
+    next_refresh_at: datetime | None = None,
+    checked_at: datetime = NOW,
+    collection_total: int | None = 1000,
+) -> RefreshState:
+    return RefreshState(
+        checked_at=checked_at,
+        score=7.5,
+        rank=1000,
+        collection_total=collection_total,
+        interval_hours=interval_hours,
+        next_refresh_at=next_refresh_at,
+    )
+
+
+def make_subject(
+    score: float = 7.5, rank: int | None = 1000, collection_total: int | None = 1000
+) -> Subject:
+    return Subject(
+        id=1, score=score, rank=rank, collection_total=collection_total, updated_at=NOW
+    )
+
+
+def test_new_subject_is_due(policy: AdaptivePolicy) -> None:
+    assert policy.is_due(SEASON_ID, None, NOW)
+
+
+def test_is_due_follows_next_refresh_at(policy: AdaptivePolicy) -> None:
+    assert not policy.is_due(
+        SEASON_ID, make_state(next_refresh_at=NOW + timedelta(hours=1)), NOW
+    )
+    assert policy.is_due(SEASON_ID, make_state(next_refresh_at=NOW), NOW)
+    assert policy.is_due(
+        SEASON_ID, make_state(next_refresh_at=NOW - timedelta(hours=1)), NOW
+    )
+
+
+def test_is_due_without_plan_falls_back_to_season_age(policy: AdaptivePolicy) -> None:
+    # 200001 季度的开播时间规则下刷新间隔远大于一天，远小于十年
+    recent = make_state(interval_hours=None, checked_at=NOW - timedelta(days=1))
+    stale = make_state(interval_hours=None, checked_at=NOW - timedelta(days=3650))
+    assert not policy.is_due(200001, recent, NOW)
+    assert policy.is_due(200001, stale, NOW)
+
+
+def test_schedule_halves_interval_when_moved(policy: AdaptivePolicy) -> None:
+    refresh = policy.schedule(SEASON_ID, 1, make_state(), make_subject(score=7.6), NOW)
+    assert refresh is not None
+    assert refresh.interval_hours == 24
+    assert refresh.next_refresh_at == NOW + timedelta(hours=24)
+    assert refresh.policy == AdaptivePolicy.name
+
+
+def test_schedule_grows_interval_when_unchanged(policy: AdaptivePolicy) -> None:
+    refresh = policy.schedule(SEASON_ID, 1, make_state(), make_subject(), NOW)
+    assert refresh is not None
+    assert refresh.interval_hours == 48 * AdaptivePolicy.GROWTH
+
+
+def test_schedule_grows_interval_on_not_modified(policy: AdaptivePolicy) -> None:
+    refresh = policy.schedule(SEASON_ID, 1, make_state(), None, NOW)
+    assert refresh is not None
+    assert refresh.interval_hours == 48 * AdaptivePolicy.GROWTH
+
+
+def test_schedule_clamps_to_min_hours(policy: AdaptivePolicy) -> None:
+    state = make_state(interval_hours=6)
+    refresh = policy.schedule(SEASON_ID, 1, state, make_subject(score=8.0), NOW)
+    assert refresh is not None
+    assert refresh.interval_hours == 4
+
+
+def test_schedule_clamps_to_max_hours(policy: AdaptivePolicy) -> None:
+    refresh = policy.schedule(
+        SEASON_ID, 1, make_state(interval_hours=300), make_subject(), NOW
+    )
+    assert refresh is not None
+    assert refresh.interval_hours == 336
+
+
+def test_popular_subjects_get_a_lower_cap(policy: AdaptivePolicy) -> None:
+    subject = make_subject(collection_total=50000)
+    state = make_state(collection_total=50000)
+    refresh = policy.schedule(SEASON_ID, 1, state, subject, NOW)
+    assert refresh is not None
+    assert refresh.interval_hours == pytest.approx(336 * 5000 / 50000)
+
+
+def test_popularity_cap_never_goes_below_min_hours(policy: AdaptivePolicy) -> None:
+    assert policy.max_interval(10**9) == 4
+    assert policy.max_interval(None) == 336
+
+
+def test_popularity_cap_uses_stored_total_on_not_modified(
+    policy: AdaptivePolicy,
+) -> None:
+    refresh = policy.schedule(
+        SEASON_ID, 1, make_state(collection_total=50000), None, NOW
+    )
+    assert refresh is not None
+    assert refresh.interval_hours == pytest.approx(33.6)
+
+
+def test_first_schedule_starts_from_season_age(policy: AdaptivePolicy) -> None:
+    # 当季条目按开播时间规则的间隔为 0，限制到 min_hours；很早的季度限制到上限
+    current = policy.schedule(current_season_id(), 1, None, make_subject(), NOW)
+    ancient = policy.schedule(200001, 1, None, make_subject(), NOW)
+    assert current is not None and current.interval_hours == 4
+    assert ancient is not None and ancient.interval_hours == 336
+
+
+def test_missing_plan_restarts_from_season_age(policy: AdaptivePolicy) -> None:
+    state = make_state(interval_hours=None)
+    refresh = policy.schedule(
+        current_season_id(), 1, state, make_subject(score=9.0), NOW
+    )
+    assert refresh is not None
+    assert refresh.interval_hours == 4
+
+
+def test_has_moved_uses_relative_thresholds(policy: AdaptivePolicy) -> None:
+    state = make_state()
+    assert not policy.has_moved(state, make_subject(rank=1005))
+    assert policy.has_moved(state, make_subject(rank=1010))
+    assert not policy.has_moved(state, make_subject(collection_total=1009))
+    assert policy.has_moved(state, make_subject(rank=None))
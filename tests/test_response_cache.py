@@ -0,0 +1,94 @@
+import os
+import time
+from pathlib import Path
+
+from app.services.bgmtv.cache import ResponseCache
+from tests.conftest import run
+
+BODY = b"x" * 1000
+
+
+def make_cache(directory: Path, max_bytes: int = 4000) -> ResponseCache:
+    return ResponseCache(str(directory), max_bytes, {"subject": 60})
+
+
+def set_access_time(cache: ResponseCache, url: str, at: float) -> None:
+    path = cache._path(url)
+    os.utime(path, (at, os.stat(path).st_mtime))
+
+
+def test_round_trip_keeps_only_cached_headers(tmp_path: Path) -> None:
+    cache = make_cache(tmp_path)
+    run(cache.put("u", BODY, {"etag": '"1"', "set-cookie": "a=b"}))
+    entry = run(cache.get("u"))
+    assert entry is not None
+    assert entry.body == BODY
+    assert entry.headers == {"etag": '"1"'}
+    assert cache.is_fresh(entry, "subject")
+    assert not cache.is_fresh(entry, "episodes")
+    assert run(cache.get("missing")) is None
+
+
+def test_oversized_body_is_not_stored(tmp_path: Path) -> None:
+    cache = make_cache(tmp_path, max_bytes=500)
+    run(cache.put("u", BODY, {}))
+    assert run(cache.get("u")) is None
+
+
+def test_touch_refreshes_stored_time_in_place(tmp_path: Path) -> None:
+    cache = make_cache(tmp_path)
+    run(cache.put("u", BODY, {}))
+    path = cache._path("u")
+    stored_at = time.time() - 3600
+    os.utime(path, (stored_at, stored_at))
+    entry = run(cache.get("u"))
+    assert entry is not None and not cache.is_fresh(entry, "subject")
+
+    inode = os.stat(path).st_ino
+    run(cache.touch(entry))
+    assert os.stat(path).st_ino == inode
+    touched = run(cache.get("u"))
+    assert touched is not None and cache.is_fresh(touched, "subject")
+    assert touched.body == BODY
+
+
+def test_read_does_not_refresh_stored_time(tmp_path: Path) -> None:
+    cache = make_cache(tmp_path)
+    run(cache.put("u", BODY, {}))
+    stored_at = time.time() - 3600
+    os.utime(cache._path("u"), (stored_at, stored_at))
+    run(cache.get("u"))
+    entry = run(cache.get("u"))
+    assert entry is not None and entry.stored_at == stored_at
+
+
+def test_evicts_least_recently_read(tmp_path: Path) -> None:
+    cache = make_cache(tmp_path)
+    now = time.time()
+    for i, url in enumerate(("a", "b", "c")):
+        run(cache.put(url, BODY, {}))
+        set_access_time(cache, url, now - 100 + i)
+    run(cache.get("a"))
+    run(cache.put("d", BODY, {}))
+    assert run(cache.get("b")) is None
+    assert all(run(cache.get(url)) is not None for url in ("a", "c", "d"))
+
+
+def test_counts_entries_written_by_other_processes(tmp_path: Path) -> None:
+    first = make_cache(tmp_path)
+    second = make_cache(tmp_path)
+    for url in ("a", "b"):
+        run(first.put(url, BODY, {}))
+    for url in ("c", "d", "e"):
+        run(second.put(url, BODY, {}))
+    total = sum(path.stat().st_size for path in tmp_path.rglob("*") if path.is_file())
+    assert total <= 4000
+
+
+def test_discard(tmp_path: Path) -> None:
+    cache = make_cache(tmp_path)
+    run(cache.put("u", BODY, {}))
+    run(cache.discard("u"))
+    run(cache.discard("u"))
+    assert run(cache.get("u")) is None
+    assert cache._total_bytes == 0
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytest
+from returns.result import Success
+
+from app.api.v0.update.endpoints import start_run, update_seasons
+from app.api.v0.update.jobs import UpdateJob
+from app.services.bgmtv import BGMTVClient
+from benchmarks import fake_bgmtv
+from tests.conftest import FakeData, FakeDB, run
+
+INDEX = {202401: [1, 2, 3], 202404: [4]}
+
+
+def interrupted_run(
+    db: FakeDB, seasons: dict[str, list[int]], completed: list[int], hours: float = 1
+) -> int:
+    created = run(db.create_run("old", "中断的任务", "all")).unwrap()
+    created.status = "aborted"
+    created.started_at = datetime.now() - timedelta(hours=hours)
+    created.seasons = seasons
+    created.completed = completed
+    assert created.id is not None
+    return created.id
+
+
+def new_job(db: FakeDB) -> UpdateJob:
+    job = UpdateJob("新任务")
+    job.run_id = run(db.create_run(job.id, job.name, "all")).unwrap().id
+    return job
+
+
+@pytest.fixture
+def db(fake_db: FakeDB) -> FakeDB:
+    fake_db.index = INDEX
+    return fake_db
+
+
+def test_resumes_work_set_and_checkpoint(db: FakeDB) -> None:
+    old_id = interrupted_run(db, {"202401": [1, 2]}, [1])
+    job = new_job(db)
+    result = run(start_run(db, job))  # type: ignore[arg-type]
+    assert result == Success(({202401: [1, 2]}, {1}))
+    assert db.run(old_id).status == "resumed"
+    assert job.run_id is not None
+    assert db.run(job.run_id).completed == [1]
+
+
+def test_plans_from_index_without_resumable_run(db: FakeDB) -> None:
+    old_id = interrupted_run(db, {"202401": [1, 2]}, [1], hours=48)
+    result = run(start_run(db, new_job(db)))  # type: ignore[arg-type]
+    assert result == Success((INDEX, set()))
+    assert db.run(old_id).status == "aborted"
+
+
+def test_replans_when_interrupted_run_has_no_work_set(db: FakeDB) -> None:
+    old_id = interrupted_run(db, {}, [])
+    result = run(start_run(db, new_job(db)))  # type: ignore[arg-type]
+    assert result == Success((INDEX, set()))
+    assert db.run(old_id).status == "resumed"
+
+
+def test_completed_subjects_are_not_fetched_again(
+    bgmtv_client: BGMTVClient, db: FakeDB, fake_data: FakeData
+) -> None:
+    for subject_id in (1, 2, 3):
+        fake_data[("subjects", subject_id)] = {"id": subject_id, "name": "测试"}
+        fake_data[("episodes", subject_id)] = {"data": []}
+    job = new_job(db)
+    assert job.run_id is not None
+    results = run(
+        update_seasons(
+            {202401: [1, 2, 3]},
+            bgmtv_client,
+            db,  # type: ignore[arg-type]
+            run_id=job.run_id,
+            completed={1},
+            job=job,
+        )
+    )
+    assert fake_bgmtv.stats["subjects"] == 2
+    assert sorted(results[202401].success) == [1, 2, 3]
+    assert sorted(db.run(job.run_id).completed) == [2, 3]
+    assert (job.planned, job.skipped, job.done) == (3, 1, 2)
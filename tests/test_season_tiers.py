@@ -0,0 +1,19 @@
+from app.api.v0.update.data import DATA
+from app.api.v0.update.endpoints import SEASON_TIERS
+
+
+def test_tiers_cover_every_season_in_data() -> None:
+    covered = set().union(*(tier() for tier in SEASON_TIERS.values()))
+    assert covered & DATA.keys() == DATA.keys()
+
+
+def test_tiers_do_not_overlap() -> None:
+    tiers = [tier() for tier in SEASON_TIERS.values()]
+    for i, tier in enumerate(tiers):
+        for other in tiers[i + 1 :]:
+            assert not tier & other
+
+
+def test_ancient_includes_earliest_seasons() -> None:
+    ancient = SEASON_TIERS["ancient"]()
+    assert {200001, 201110, 201201} <= ancient
@@ -0,0 +1,94 @@
+from app.api.v0.update.jobs import JobRegistry, UpdateJob
+from app.api.v0.update.models import UpdateResponse
+from tests.conftest import FakeDB, run
+
+
+def test_job_lifecycle() -> None:
+    job = UpdateJob("全部季度")
+    assert job.state == "pending" and job.active
+    job.start()
+    job.plan(4)
+    job.record("done", 2)
+    job.record("skipped")
+    job.record("failed")
+    snapshot = job.snapshot()
+    assert snapshot.state == "running"
+    assert (snapshot.done, snapshot.skipped, snapshot.failed) == (2, 1, 1)
+    assert snapshot.eta_seconds == 0
+
+    job.finish(UpdateResponse(success=[1, 2], failed=[3], changed=[1]))
+    assert job.state == "completed" and not job.active
+    assert job.changed == 1
+    assert job.finished_at is not None
+    assert job.snapshot().eta_seconds is None
+
+
+def test_fail_and_cancel_record_error() -> None:
+    failed = UpdateJob("a")
+    failed.start()
+    failed.fail(ValueError("数据库不可用"))
+    assert (failed.state, failed.error) == ("failed", "数据库不可用")
+
+    cancelled = UpdateJob("b")
+    cancelled.start()
+    cancelled.cancel()
+    assert cancelled.state == "aborted" and cancelled.finished_at is not None
+
+
+def test_round_trip_through_update_run(fake_db: FakeDB) -> None:
+    job = UpdateJob("两个季度", {202401, 202404})
+    saved = run(fake_db.create_run(job.id, job.name, "202401,202404")).unwrap()
+    job.run_id = saved.id
+    job.start()
+    job.plan(3)
+    job.record("done", 3)
+    job.merged_into = "abcd1234"
+    job.timings.bgmtv_requests = 5
+    for key, value in job.state_values().items():
+        setattr(saved, key, value)
+
+    restored = UpdateJob.from_run(saved)
+    assert (restored.id, restored.run_id) == (job.id, saved.id)
+    assert restored.season_ids == {202401, 202404}
+    assert restored.state == "running"
+    assert restored.merged_into == "abcd1234"
+    assert restored.snapshot().bgmtv_requests == 5
+    assert (restored.planned, restored.done) == (3, 3)
+
+
+def test_resumed_run_is_reported_as_aborted(fake_db: FakeDB) -> None:
+    saved = run(fake_db.create_run("old", "全部季度", "all")).unwrap()
+    saved.status = "resumed"
+    restored = UpdateJob.from_run(saved)
+    assert restored.state == "aborted"
+    assert restored.season_ids is None
+
+
+def test_covers() -> None:
+    assert UpdateJob("全部").covers(None)
+    assert UpdateJob("全部").covers({202401})
+    partial = UpdateJob("部分", {202401, 202404})
+    assert partial.covers({202401})
+    assert not partial.covers({202401, 202407})
+    assert not partial.covers(None)
+
+
+def test_registry_finds_active_covering_job() -> None:
+    registry = JobRegistry()
+    finished = UpdateJob("全部")
+    finished.cancel()
+    partial = UpdateJob("部分", {202401})
+    registry.add(finished)
+    registry.add(partial)
+    assert registry.find_active({202401}) is partial
+    assert registry.find_active(None) is None
+    assert registry.get(partial.id) is partial
+
+
+def test_registry_keeps_latest_jobs() -> None:
+    registry = JobRegistry(max_jobs=2)
+    jobs = [UpdateJob(str(i)) for i in range(3)]
+    for job in jobs:
+        registry.add(job)
+    assert registry.list() == [jobs[2], jobs[1]]
+    assert registry.get(jobs[0].id) is None
@@ -0,0 +1,52 @@
+from typing import Any
+
+import pytest
+
+from app.api.v0.update.endpoints import plan_subjects, update_seasons
+from app.api.v0.update.models import UpdateResponse
+from app.services.bgmtv import BGMTVClient
+from benchmarks import fake_bgmtv
+from tests.conftest import FakeData, FakeDB, run
+
+SEASONS = {
+    202401: [1, 2],
+    202404: [2, 3],
+    202407: [3, 4],
+}
+
+
+@pytest.fixture
+def subjects(fake_data: FakeData) -> None:
+    for season_ids in SEASONS.values():
+        for subject_id in season_ids:
+            fake_data[("subjects", subject_id)] = {"id": subject_id, "name": "测试"}
+            fake_data[("episodes", subject_id)] = {"data": []}
+
+
+def update(client: BGMTVClient, db: FakeDB, **kwargs: Any) -> dict[int, UpdateResponse]:
+    return run(update_seasons(SEASONS, client, db, **kwargs))  # type: ignore[arg-type]
+
+
+def test_subject_belongs_to_latest_season() -> None:
+    assert plan_subjects(SEASONS) == {202401: [1], 202404: [2], 202407: [3, 4]}
+    assert plan_subjects({202401: [], 202404: [5]}) == {202401: [], 202404: [5]}
+
+
+def test_shared_subject_fetched_once_and_reported_everywhere(
+    bgmtv_client: BGMTVClient, fake_db: FakeDB, subjects: None
+) -> None:
+    results = update(bgmtv_client, fake_db)
+    assert fake_bgmtv.stats["subjects"] == 4
+    assert sorted(fake_db.subjects) == [1, 2, 3, 4]
+    for season_id, subject_ids in SEASONS.items():
+        assert sorted(results[season_id].success) == subject_ids
+
+
+def test_season_filter_skips_subjects_owned_by_other_seasons(
+    bgmtv_client: BGMTVClient, fake_db: FakeDB, subjects: None
+) -> None:
+    results = update(bgmtv_client, fake_db, season_ids={202401, 202404})
+    # 条目 3 归入 202407，不在本次范围内
+    assert sorted(fake_db.subjects) == [1, 2]
+    assert set(results) == {202401, 202404}
+    assert results[202404].success == [2]
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from returns.result import Failure
+
+from app import scheduler
+from app.api.v0.update import endpoints
+from app.api.v0.update.endpoints import register_update_job
+from app.api.v0.update.jobs import JobRegistry, UpdateJob
+from app.services.db import UpdateRun
+from tests.conftest import FakeDB, run
+
+
+@pytest.fixture
+def registry(monkeypatch: pytest.MonkeyPatch) -> JobRegistry:
+    registry = JobRegistry()
+    monkeypatch.setattr(endpoints, "job_registry", registry)
+    return registry
+
+
+def register(
+    db: FakeDB, season_ids: set[int] | None, queued: bool = True
+) -> tuple[UpdateJob, bool]:
+    return run(
+        register_update_job("手动更新", season_ids, db, queued=queued)  # type: ignore[arg-type]
+    )
+
+
+def test_queued_job_is_left_to_worker(fake_db: FakeDB, registry: JobRegistry) -> None:
+    job, created = register(fake_db, {202401})
+    assert created
+    assert registry.get(job.id) is None
+    assert fake_db.run(job.run_id).claimed_at is None
+
+
+def test_same_scope_merges_into_queued_job(
+    fake_db: FakeDB, registry: JobRegistry
+) -> None:
+    first, _ = register(fake_db, {202401})
+    second, created = register(fake_db, {202401})
+    assert not created
+    assert (second.id, second.run_id) == (first.id, first.run_id)
+    assert second.season_ids == {202401}
+
+    other, created = register(fake_db, None)
+    assert created and other.id != first.id
+    assert len(fake_db.runs) == 2
+
+
+def test_unregistered_job_runs_in_this_process(
+    fake_db: FakeDB, registry: JobRegistry, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def create_run(*_: object) -> Failure[Exception]:
+        return Failure(ConnectionError("数据库不可用"))
+
+    monkeypatch.setattr(fake_db, "create_run", create_run)
+    job, created = register(fake_db, None)
+    assert created and job.run_id is None
+    assert registry.get(job.id) is job
+
+
+def test_worker_claims_queued_jobs_in_order(
+    fake_db: FakeDB, registry: JobRegistry, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    first, _ = register(fake_db, {202401})
+    second, _ = register(fake_db, None)
+    executed: list[str | None] = []
+
+    async def main() -> None:
+        stop = asyncio.Event()
+
+        async def run_queued_update(
+            bgmtv_client: object, db_client: object, queued: UpdateRun
+        ) -> None:
+            executed.append(queued.job_id)
+            if len(executed) == 2:
+                stop.set()
+
+        monkeypatch.setattr(scheduler, "run_queued_update", run_queued_update)
+        await asyncio.wait_for(
+            scheduler.run_queued_updates(None, fake_db, stop),  # type: ignore[arg-type]
+            timeout=1,
+        )
+
+    run(main())
+    assert executed == [first.id, second.id]
+    assert all(queued.claimed_at is not None for queued in fake_db.runs)